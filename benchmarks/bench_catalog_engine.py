@@ -0,0 +1,92 @@
+"""
+Compares catalog filtering on the NumPy snapshot with the SQL path
+(build_filtered_product_query + count + page query).
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m benchmarks.bench_catalog_engine [--queries 200] [--max-filters 3]
+"""
+import argparse
+import random
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import select, func
+from starlette.datastructures import QueryParams
+from src.api.endpoints.catalog import build_filtered_product_query, parse_property_filters
+from src.db.base import SessionLocal
+from src.db.models import Product
+from src.schemas import SortOptions
+from src.services.catalog_engine import CatalogSnapshot, bytes_to_uid
+
+
+def random_query(snapshot: CatalogSnapshot, rnd: random.Random, max_filters: int) -> list:
+    params = []
+    int_columns = list(snapshot.int_columns.items())
+    list_columns = list(snapshot.list_columns.items())
+    for _ in range(rnd.randint(1, max_filters)):
+        if int_columns and (not list_columns or rnd.random() < 0.5):
+            prop_uid, column = rnd.choice(int_columns)
+            values = snapshot.int_values[snapshot.int_mask[:, column], column]
+            if values.size:
+                low, high = sorted(rnd.choices(values.tolist(), k=2))
+                params += [(f"property_{prop_uid}_from", str(low)), (f"property_{prop_uid}_to", str(high))]
+        elif list_columns:
+            prop_uid, column = rnd.choice(list_columns)
+            codes = snapshot.list_codes[:, column]
+            codes = codes[codes >= 0]
+            if codes.size:
+                for code in set(rnd.choices(codes.tolist(), k=2)):
+                    params.append((f"property_{prop_uid}", str(bytes_to_uid(snapshot.list_value_uids[code]))))
+    return params
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    print(f"{label:<8} p50={statistics.median(samples):8.3f} ms  p95={samples[int(len(samples) * 0.95) - 1]:8.3f} ms  mean={statistics.fmean(samples):8.3f} ms")
+
+
+def main(queries: int, max_filters: int, seed: int):
+    rnd = random.Random(seed)
+    with SessionLocal() as session:
+        started = time.perf_counter()
+        snapshot = CatalogSnapshot.load(session)
+        load_ms = (time.perf_counter() - started) * 1000
+        print(f"snapshot: {snapshot.product_count} products loaded in {load_ms:.1f} ms")
+
+        sql_samples, engine_samples = [], []
+        for _ in range(queries):
+            query_params = QueryParams(random_query(snapshot, rnd, max_filters))
+            sort = rnd.choice([SortOptions.UID, SortOptions.NAME])
+
+            def run_sql():
+                base_query = build_filtered_product_query(session, None, query_params)
+                session.execute(select(func.count()).select_from(base_query.subquery())).scalar_one()
+                order = Product.name if sort == SortOptions.NAME else Product.uid
+                session.execute(base_query.with_only_columns(Product.uid).order_by(order).limit(10)).scalars().all()
+
+            def run_engine():
+                snapshot.query(None, parse_property_filters(query_params), sort, 0, 10)
+
+            sql_samples.append(timed(run_sql))
+            engine_samples.append(timed(run_engine))
+
+    report("sql", sql_samples)
+    report("engine", engine_samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-filters", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.queries, args.max_filters, args.seed)
@@ -0,0 +1,105 @@
+"""
+Compares POST /catalog/search with the equivalent query-string GET /catalog/
+request: every random filter combination of benchmarks.bench_filter_planner is
+also run as an AND tree of the same predicates. Times the count plus
+- first: the first page, query_catalog_page against query_catalog_search
+- deep:  the page after --deep-pages pages, by OFFSET against by cursor
+and, without a query-string equivalent, an OR of two combinations and an AND
+of one with the NOT of another, to compare with the AND trees' latency.
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m benchmarks.bench_catalog_search [--combinations 30] [--deep-pages 20]
+"""
+import argparse
+import random
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from starlette.datastructures import QueryParams
+from benchmarks.bench_filter_planner import filter_combinations
+from src.api.endpoints.catalog import decode_cursor, parse_property_filters, query_catalog_page, query_catalog_search
+from src.db.base import SessionLocal
+from src.schemas import CatalogSearchInputSchema, ProductProjection, SortOptions
+
+
+def to_tree(query_params: QueryParams) -> dict:
+    """The AND tree of a query string's property filters."""
+    conditions = []
+    for prop_uid, data in parse_property_filters(query_params).items():
+        if data["list_values"]:
+            conditions.append({"property": str(prop_uid), "values": [str(value) for value in data["list_values"]]})
+        else:
+            conditions.append({"property": str(prop_uid), "from": data["int_from"], "to": data["int_to"]})
+    return {"and": conditions}
+
+
+def timed(call) -> float:
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+
+def search(session, tree: dict, page_size: int, cursor: str = None):
+    body = CatalogSearchInputSchema.model_validate({"filter": tree, "page_size": page_size, "cursor": cursor})
+    after = decode_cursor(body) if cursor else None
+    return query_catalog_search(session, body, SortOptions.UID, after, ProductProjection())
+
+
+def cursor_after(session, tree: dict, page_size: int, pages: int):
+    """The cursor of the page after the given number of pages, None when the result is shorter."""
+    cursor = None
+    for _ in range(pages):
+        cursor = search(session, tree, page_size, cursor).next_cursor
+        if cursor is None:
+            break
+    return cursor
+
+
+def main(combinations: int, max_filters: int, repeat: int, page_size: int, deep_pages: int, seed: int):
+    rnd = random.Random(seed)
+    samples = {name: [] for name in ("first GET", "first search", "deep GET", "deep search", "OR search", "AND NOT search")}
+
+    def sample(name: str, call):
+        call() # warm the plan and buffer cache
+        samples[name].append(statistics.median(timed(call) for _ in range(repeat)))
+        session.rollback()
+
+    with SessionLocal() as session:
+        workload = filter_combinations(session, combinations, max_filters, rnd)
+        for query_params in workload:
+            tree = to_tree(query_params)
+            sample("first GET", lambda: query_catalog_page(session, query_params, None, SortOptions.UID, 0, page_size, ProductProjection()))
+            sample("first search", lambda: search(session, tree, page_size))
+            cursor = cursor_after(session, tree, page_size, deep_pages)
+            if cursor is not None:
+                offset = deep_pages * page_size
+                sample("deep GET", lambda: query_catalog_page(session, query_params, None, SortOptions.UID, offset, page_size, ProductProjection()))
+                sample("deep search", lambda: search(session, tree, page_size, cursor))
+        for first, second in zip(workload, workload[1:]):
+            sample("OR search", lambda: search(session, {"or": [to_tree(first), to_tree(second)]}, page_size))
+            sample("AND NOT search", lambda: search(session, {"and": [to_tree(first), {"not": to_tree(second)}]}, page_size))
+
+    print(f"{len(workload)} filter combinations, page size {page_size}, median of {repeat} runs each")
+    print(f"{'':>16} {'queries':>8} {'p50':>11} {'p95':>11}")
+    for name, timings in samples.items():
+        if not timings:
+            print(f"{name:>16} {0:>8} {'-':>11} {'-':>11}")
+            continue
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        print(f"{name:>16} {len(timings):>8} {statistics.median(timings):>8.2f} ms {p95:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--combinations", type=int, default=30)
+    parser.add_argument("--max-filters", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--deep-pages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.combinations, args.max_filters, args.repeat, args.page_size, args.deep_pages, args.seed)
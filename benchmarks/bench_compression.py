@@ -0,0 +1,74 @@
+"""
+Bytes sent and CPU cost of response compression for a catalog page.
+
+Builds a synthetic /catalog/ page (page_size products with N properties each,
+serialized like the endpoint does) and compresses it with every available
+encoding and a few levels, both in one shot and as a stream of per-product chunks.
+
+Usage (from repo root, no database needed):
+    python -m benchmarks.bench_compression [--products 100] [--properties 12] [--iterations 50]
+"""
+import argparse
+import random
+import time
+import uuid
+from src.core.compression import COMPRESSORS
+from src.schemas import CatalogOutputSchema, ProductOutputSchema, PropertyOutputSchema
+
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 6, 11], "zstd": [1, 3, 9, 19]}
+
+
+def catalog_page(products: int, properties: int, seed: int) -> bytes:
+    rnd = random.Random(seed)
+    property_defs = [(uuid.UUID(int=rnd.getrandbits(128)), f"Property {i}", i % 2 == 0) for i in range(properties)]
+    list_values = {uid: [(uuid.UUID(int=rnd.getrandbits(128)), f"Value {j}") for j in range(8)] for uid, _, is_list in property_defs if is_list}
+    output = []
+    for i in range(products):
+        product_properties = []
+        for uid, name, is_list in property_defs:
+            if is_list:
+                value_uid, value = rnd.choice(list_values[uid])
+                product_properties.append(PropertyOutputSchema(uid=uid, name=name, value_uid=value_uid, value=value))
+            else:
+                product_properties.append(PropertyOutputSchema(uid=uid, name=name, value=rnd.randint(1, 10000)))
+        output.append(ProductOutputSchema(uid=uuid.UUID(int=rnd.getrandbits(128)), name=f"Product {i}", properties=product_properties))
+    return CatalogOutputSchema(products=output, count=products * 10).model_dump_json().encode()
+
+
+def compress(encoding: str, level: int, chunks: list) -> bytes:
+    compressor = COMPRESSORS[encoding](level)
+    parts = []
+    for chunk in chunks[:-1]:
+        parts.append(compressor.compress(chunk) + compressor.flush())
+    parts.append(compressor.compress(chunks[-1]) + compressor.finish())
+    return b"".join(parts)
+
+
+def main(products: int, properties: int, iterations: int):
+    body = catalog_page(products, properties, seed=0)
+    chunk_size = max(1, len(body) // products)
+    streamed = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    print(f"identity: {len(body)} bytes")
+    print(f"{'encoding':<8} {'level':>5} {'bytes':>9} {'ratio':>7} {'cpu/op':>10} {'stream bytes':>13} {'stream cpu/op':>14}")
+    for encoding, levels in LEVELS.items():
+        if not COMPRESSORS.get(encoding):
+            print(f"{encoding:<8} not installed")
+            continue
+        for level in levels:
+            results = []
+            for chunks in ([body], streamed):
+                started = time.process_time()
+                for _ in range(iterations):
+                    compressed = compress(encoding, level, chunks)
+                results.append((len(compressed), (time.process_time() - started) / iterations * 1000))
+            (size, cpu), (stream_size, stream_cpu) = results
+            print(f"{encoding:<8} {level:>5} {size:>9} {len(body) / size:>6.1f}x {cpu:>8.3f}ms {stream_size:>13} {stream_cpu:>12.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--properties", type=int, default=12)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    main(args.products, args.properties, args.iterations)
@@ -0,0 +1,93 @@
+"""
+Compares filter strategies for multi-property catalog queries: query-string
+order EXISTS ('off') against the planner's ordered EXISTS, driving semi-join,
+INTERSECT and its automatic choice. Times the count query plus the first page
+of UIDs, as /catalog/ runs them.
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m benchmarks.bench_filter_planner [--combinations 50] [--max-filters 6]
+"""
+import argparse
+import random
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import select, func
+from starlette.datastructures import QueryParams
+from src.api.endpoints.catalog import build_filtered_product_query
+from src.core.config import get_settings
+from src.db.base import SessionLocal
+from src.db.models import Product, ProductPropertyValue, Property, PropertyListValue
+from src.schemas import PropertyTypeEnum
+from src.services.filter_planner import get_filter_statistics
+
+STRATEGIES = ["off", "exists", "driving", "intersect", "auto"]
+
+
+def filter_combinations(session, count: int, max_filters: int, rnd: random.Random) -> list:
+    properties = session.execute(select(Property.uid, Property.type)).all()
+    list_values = {}
+    for value_uid, prop_uid in session.execute(select(PropertyListValue.value_uid, PropertyListValue.property_uid)).all():
+        list_values.setdefault(prop_uid, []).append(value_uid)
+    ranges = {
+        prop_uid: (low, high)
+        for prop_uid, low, high in session.execute(
+            select(Property.uid, func.min(ProductPropertyValue.int_value), func.max(ProductPropertyValue.int_value))
+            .join(Property, ProductPropertyValue.property_id == Property.id)
+            .group_by(Property.uid)
+        ).all()
+        if low is not None
+    }
+    combinations = []
+    for _ in range(count):
+        params = []
+        for prop_uid, prop_type in rnd.sample(properties, k=min(len(properties), rnd.randint(1, max_filters))):
+            if prop_type == PropertyTypeEnum.LIST and list_values.get(prop_uid):
+                for value_uid in rnd.sample(list_values[prop_uid], k=min(len(list_values[prop_uid]), rnd.randint(1, 3))):
+                    params.append((f"property_{prop_uid}", str(value_uid)))
+            elif prop_type == PropertyTypeEnum.INT and prop_uid in ranges:
+                low, high = ranges[prop_uid]
+                start = rnd.randint(low, high)
+                params += [(f"property_{prop_uid}_from", str(start)), (f"property_{prop_uid}_to", str(rnd.randint(start, high)))]
+        combinations.append(QueryParams(params))
+    return combinations
+
+
+def run(session, query_params: QueryParams) -> float:
+    started = time.perf_counter()
+    base_query = build_filtered_product_query(session, None, query_params)
+    session.execute(select(func.count()).select_from(base_query.subquery())).scalar_one()
+    session.execute(base_query.with_only_columns(Product.uid).order_by(Product.uid).limit(10)).scalars().all()
+    return (time.perf_counter() - started) * 1000
+
+
+def main(combinations: int, max_filters: int, seed: int):
+    settings = get_settings()
+    rnd = random.Random(seed)
+    with SessionLocal() as session:
+        get_filter_statistics().load(session)
+        workload = filter_combinations(session, combinations, max_filters, rnd)
+        by_size = {}
+        for query_params in workload:
+            size = len({key.removesuffix("_from").removesuffix("_to") for key in query_params.keys()})
+            for strategy in STRATEGIES:
+                settings.FILTER_PLANNER = strategy
+                run(session, query_params) # warm the plan and buffer cache
+                by_size.setdefault(size, {}).setdefault(strategy, []).append(run(session, query_params))
+
+    print(f"{'filters':>7} {'n':>4} " + " ".join(f"{strategy:>12}" for strategy in STRATEGIES) + "   (median ms)")
+    for size in sorted(by_size):
+        results = by_size[size]
+        print(f"{size:>7} {len(results['off']):>4} " + " ".join(f"{statistics.median(results[strategy]):>12.2f}" for strategy in STRATEGIES))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--combinations", type=int, default=50)
+    parser.add_argument("--max-filters", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.combinations, args.max_filters, args.seed)
@@ -0,0 +1,76 @@
+"""
+Compares catalog request latency with the independent queries of a request
+run one after another (CATALOG_PARALLEL_QUERIES=false) and concurrently in one
+exported snapshot (true):
+- page:   query_catalog_page, count + first page of products with their properties
+- filter: query_catalog_filter, count + LIST value counts + INT bounds (or histogram)
+Concurrent latency should approach the slowest query instead of the sum.
+Uses random filter combinations as benchmarks.bench_filter_planner, plus the
+unfiltered catalog.
+
+Usage (from repo root, DATABASE_URL in .env, PostgreSQL for the concurrent mode):
+    python -m benchmarks.bench_parallel_queries [--combinations 30] [--repeat 5] [--histogram fixed]
+"""
+import argparse
+import random
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from starlette.datastructures import QueryParams
+from benchmarks.bench_filter_planner import filter_combinations
+from src.api.endpoints.catalog import query_catalog_page, query_catalog_filter
+from src.core.config import get_settings
+from src.db.base import SessionLocal
+from src.schemas import HistogramOptions, ProductProjection, SortOptions
+
+MODES = {"sequential": False, "concurrent": True}
+
+
+def timed(call) -> float:
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+
+def main(combinations: int, max_filters: int, repeat: int, page_size: int, histogram, seed: int):
+    settings = get_settings()
+    rnd = random.Random(seed)
+    with SessionLocal() as session:
+        workload = [QueryParams()] + filter_combinations(session, combinations, max_filters, rnd)
+        samples = {(endpoint, mode): [] for endpoint in ("page", "filter") for mode in MODES}
+        for query_params in workload:
+            calls = {
+                "page": lambda: query_catalog_page(session, query_params, None, SortOptions.UID, 0, page_size, ProductProjection()),
+                "filter": lambda: query_catalog_filter(session, query_params, None, histogram, 10),
+            }
+            for endpoint, call in calls.items():
+                for mode, parallel in MODES.items():
+                    settings.CATALOG_PARALLEL_QUERIES = parallel
+                    call() # warm the plan and buffer cache
+                    samples[endpoint, mode].append(statistics.median(timed(call) for _ in range(repeat)))
+                    session.rollback()
+
+    print(f"{len(workload)} queries, median of {repeat} runs each")
+    print(f"{'':>8} " + " ".join(f"{mode + ' p50':>16} {mode + ' p95':>16}" for mode in MODES) + f" {'speedup':>8}")
+    for endpoint in ("page", "filter"):
+        cells, medians = [], {}
+        for mode in MODES:
+            timings = sorted(samples[endpoint, mode])
+            medians[mode] = statistics.median(timings)
+            cells.append(f"{medians[mode]:>13.2f} ms {timings[max(0, int(len(timings) * 0.95) - 1)]:>13.2f} ms")
+        print(f"{endpoint:>8} " + " ".join(cells) + f" {medians['sequential'] / medians['concurrent']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--combinations", type=int, default=30)
+    parser.add_argument("--max-filters", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--histogram", type=HistogramOptions, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.combinations, args.max_filters, args.repeat, args.page_size, args.histogram, args.seed)
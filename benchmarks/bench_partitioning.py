@@ -0,0 +1,145 @@
+"""
+Compares product_property_values layouts for the catalog's query shapes:
+unpartitioned, hash-partitioned by property_id and by product_id.
+
+Copies the current product_property_values rows into three tables in a
+scratch schema and times, per layout:
+- filter:  count of products matching a LIST and an INT filter (EXISTS, as build_filtered_product_query)
+- facets:  LIST value counts over the whole catalog (GROUP BY property_id, list_value_id)
+- sort:    first page of products ordered by an INT property (per-product lookup, as sort_value_expression)
+- product: property values of 20 products by product_id (get_product / get_products)
+and reports how many partitions each plan touches.
+
+Usage (from repo root, DATABASE_URL in .env, PostgreSQL only):
+    python -m benchmarks.bench_partitioning [--partitions 16] [--repeat 20] [--keep]
+"""
+import argparse
+import json
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text
+from src.core.config import settings
+from src.db.base import get_engine
+
+SCHEMA = "bench_partitioning"
+LAYOUTS = {
+    "plain": None,
+    "by_property": "property_id",
+    "by_product": "product_id",
+}
+QUERIES = {
+    "filter": """
+        SELECT count(*) FROM public.products p
+        WHERE EXISTS (SELECT 1 FROM {table} v WHERE v.product_id = p.id
+                      AND v.property_id = :list_property AND v.list_value_id = :list_value)
+          AND EXISTS (SELECT 1 FROM {table} v WHERE v.product_id = p.id
+                      AND v.property_id = :int_property AND v.int_value BETWEEN :int_from AND :int_to)
+    """,
+    "facets": """
+        SELECT property_id, list_value_id, count(DISTINCT product_id) FROM {table}
+        WHERE list_value_id IS NOT NULL GROUP BY property_id, list_value_id
+    """,
+    "sort": """
+        SELECT p.id FROM public.products p
+        ORDER BY (SELECT min(v.int_value) FROM {table} v
+                  WHERE v.product_id = p.id AND v.property_id = :int_property) NULLS LAST, p.uid
+        LIMIT 20
+    """,
+    "product": """
+        SELECT * FROM {table} WHERE product_id = ANY(:product_ids)
+    """,
+}
+
+
+def create_layout(connection, name: str, partition_key, partitions: int):
+    table = f"{SCHEMA}.ppv_{name}"
+    partition_clause = f" PARTITION BY HASH ({partition_key})" if partition_key else ""
+    connection.execute(text(
+        f"CREATE TABLE {table} (id integer NOT NULL, product_id integer NOT NULL, property_id smallint NOT NULL, "
+        f"int_value integer, list_value_id integer){partition_clause}"
+    ))
+    for remainder in range(partitions if partition_key else 0):
+        connection.execute(text(
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        ))
+    connection.execute(text(
+        f"INSERT INTO {table} SELECT id, product_id, property_id, int_value, list_value_id FROM public.product_property_values"
+    ))
+    connection.execute(text(f"CREATE INDEX ON {table} (product_id, property_id, int_value)"))
+    connection.execute(text(f"CREATE INDEX ON {table} (list_value_id)"))
+    connection.execute(text(f"CREATE INDEX ON {table} (property_id, int_value, product_id)"))
+    connection.execute(text(f"ANALYZE {table}"))
+    return table
+
+
+def query_parameters(connection) -> dict:
+    list_property, list_value = connection.execute(text(
+        "SELECT property_id, list_value_id FROM public.product_property_values WHERE list_value_id IS NOT NULL "
+        "GROUP BY 1, 2 ORDER BY count(*) DESC LIMIT 1"
+    )).one()
+    int_property, int_from, int_to = connection.execute(text(
+        "SELECT property_id, percentile_disc(0.25) WITHIN GROUP (ORDER BY int_value), "
+        "percentile_disc(0.5) WITHIN GROUP (ORDER BY int_value) "
+        "FROM public.product_property_values WHERE int_value IS NOT NULL GROUP BY 1 ORDER BY count(*) DESC LIMIT 1"
+    )).one()
+    product_ids = connection.execute(text("SELECT id FROM public.products ORDER BY random() LIMIT 20")).scalars().all()
+    return {
+        "list_property": list_property, "list_value": list_value,
+        "int_property": int_property, "int_from": int_from, "int_to": int_to,
+        "product_ids": list(product_ids),
+    }
+
+
+def scanned_relations(plan: dict) -> set:
+    relations = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        relations |= scanned_relations(child)
+    return relations
+
+
+def main(partitions: int, repeat: int, keep: bool):
+    engine = get_engine()
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        tables = {name: create_layout(connection, name, key, partitions) for name, key in LAYOUTS.items()}
+        parameters = query_parameters(connection)
+
+    print(f"partitionwise settings: {'on' if settings.DB_PARTITIONWISE else 'off'}, {partitions} partitions")
+    print(f"{'query':>8} " + " ".join(f"{name:>20}" for name in LAYOUTS) + "   (median ms / relations scanned)")
+    try:
+        with engine.connect() as connection:
+            for query_name, sql in QUERIES.items():
+                cells = []
+                for name, table in tables.items():
+                    statement = text(sql.format(table=table))
+                    plan = connection.execute(text("EXPLAIN (FORMAT JSON) " + sql.format(table=table)), parameters).scalar_one()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    relations = {relation for relation in scanned_relations(plan[0]["Plan"]) if relation.startswith("ppv_")}
+                    connection.execute(statement, parameters).all() # warm the cache
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        connection.execute(statement, parameters).all()
+                        timings.append((time.perf_counter() - started) * 1000)
+                    cells.append(f"{statistics.median(timings):>12.2f} / {len(relations):>4}")
+                print(f"{query_name:>8} " + " ".join(f"{cell:>20}" for cell in cells))
+    finally:
+        if not keep:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema for manual EXPLAINs.")
+    args = parser.parse_args()
+    main(args.partitions, args.repeat, args.keep)
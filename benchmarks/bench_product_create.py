@@ -0,0 +1,97 @@
+"""
+Compares product creation paths under concurrent writers: the ORM path
+(existence check, metadata selects, per-row flush, own commit), the
+single-statement fast path with its own commit, and the fast path through
+the group committer. Created products are deleted afterwards.
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m benchmarks.bench_product_create [--writers 32] [--products 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import select, delete
+from src.core.config import get_settings
+from src.db.base import SessionLocal
+from src.db.models import Product, Property, PropertyListValue
+from src.repositories import ProductRepository
+from src.schemas import ProductInputSchema, PropertyTypeEnum
+from src.services.group_commit import GroupCommitter
+
+
+def random_products(count: int, rnd: random.Random) -> list:
+    with SessionLocal() as session:
+        properties = session.execute(select(Property.uid, Property.type)).all()
+        list_values = {}
+        for value_uid, prop_uid in session.execute(select(PropertyListValue.value_uid, PropertyListValue.property_uid)).all():
+            list_values.setdefault(prop_uid, []).append(value_uid)
+    products = []
+    for i in range(count):
+        assigned = []
+        for prop_uid, prop_type in rnd.sample(properties, k=min(len(properties), 5)):
+            if prop_type == PropertyTypeEnum.INT:
+                assigned.append({"uid": prop_uid, "value": rnd.randint(0, 1000)})
+            elif list_values.get(prop_uid):
+                assigned.append({"uid": prop_uid, "value_uid": rnd.choice(list_values[prop_uid])})
+        products.append(ProductInputSchema(uid=uuid.uuid4(), name=f"bench product {i}", properties=assigned))
+    return products
+
+
+def create_own_transaction(product: ProductInputSchema):
+    with SessionLocal() as session:
+        ProductRepository(session).create_product(product)
+        session.commit()
+
+
+def run(mode: str, products: list, writers: int) -> list:
+    settings = get_settings()
+    settings.PRODUCT_FAST_CREATE_ENABLED = mode != "orm"
+    committer = GroupCommitter(settings.GROUP_COMMIT_MAX_BATCH, settings.GROUP_COMMIT_MAX_WAIT_MS / 1000) if mode == "group" else None
+
+    def create(product: ProductInputSchema) -> float:
+        started = time.perf_counter()
+        if committer:
+            committer.submit(lambda session: ProductRepository(session).create_product(product)).result()
+        else:
+            create_own_transaction(product)
+        return (time.perf_counter() - started) * 1000
+
+    try:
+        with ThreadPoolExecutor(writers) as executor:
+            return list(executor.map(create, products))
+    finally:
+        if committer:
+            committer.close()
+
+
+def main(writers: int, count: int, seed: int):
+    rnd = random.Random(seed)
+    print(f"{'mode':>6} {'creates/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ("orm", "fast", "group"):
+        products = random_products(count, rnd)
+        started = time.perf_counter()
+        latencies = sorted(run(mode, products, writers))
+        elapsed = time.perf_counter() - started
+        print(
+            f"{mode:>6} {count / elapsed:>10.0f} {statistics.median(latencies):>8.2f} "
+            f"{latencies[int(len(latencies) * 0.99) - 1]:>8.2f}"
+        )
+        with SessionLocal() as session:
+            session.execute(delete(Product).where(Product.uid.in_([product.uid for product in products])))
+            session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.writers, args.products, args.seed)
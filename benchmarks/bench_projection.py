@@ -0,0 +1,90 @@
+"""
+Compares /catalog/ pages without a projection against `fields=uid,name` and
+`properties=<two property uids>`: latency, property value rows fetched and
+response size.
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m benchmarks.bench_projection [--pages 100] [--page-size 20]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import select, func
+from starlette.requests import Request
+from starlette.responses import Response
+from src.api.deps import get_product_projection
+from src.api.endpoints.catalog import get_catalog
+from src.db.base import SessionLocal
+from src.db.models import Product, ProductPropertyValue, Property
+from src.schemas import SortOptions
+
+
+def request(query_string: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/catalog/", "headers": [], "query_string": query_string.encode()})
+
+
+def property_value_rows(session, product_uids: list, property_uids) -> int:
+    query = (
+        select(func.count())
+        .select_from(ProductPropertyValue)
+        .join(Product, ProductPropertyValue.product_id == Product.id)
+        .join(Property, ProductPropertyValue.property_id == Property.id)
+        .where(Product.uid.in_(product_uids))
+    )
+    if property_uids is not None:
+        query = query.where(Property.uid.in_(property_uids))
+    return session.execute(query).scalar_one()
+
+
+async def main(pages: int, page_size: int, seed: int):
+    rnd = random.Random(seed)
+    with SessionLocal() as session:
+        product_count = session.execute(select(func.count()).select_from(Product)).scalar_one()
+        property_uids = session.execute(select(Property.uid)).scalars().all()
+        if not product_count:
+            print("no products")
+            return
+        selected = rnd.sample(property_uids, k=min(2, len(property_uids)))
+        variants = [
+            ("full", {}, None),
+            ("uid,name", {"fields": "uid,name"}, None),
+            ("2 props", {"properties": ",".join(map(str, selected))}, selected),
+        ]
+        page_numbers = [rnd.randint(1, max(1, product_count // page_size)) for _ in range(pages)]
+
+        for label, params, property_subset in variants:
+            projection = get_product_projection(params.get("fields"), params.get("properties"))
+            query_string = "&".join(f"{key}={value}" for key, value in params.items())
+            samples, value_rows, response_bytes = [], 0, 0
+            for page in page_numbers:
+                session.expire_all() # every page loads its rows from the database
+                started = time.perf_counter()
+                output = await get_catalog(
+                    request(query_string), Response(), admission=None, session=session, page=page, page_size=page_size,
+                    name=None, sort=SortOptions.UID, projection=projection,
+                )
+                body = output.model_dump_json()
+                samples.append((time.perf_counter() - started) * 1000)
+                response_bytes += len(body)
+                if projection.properties:
+                    value_rows += property_value_rows(session, [product.uid for product in output.products], property_subset)
+            samples.sort()
+            print(
+                f"{label:<9} p50={statistics.median(samples):8.3f} ms  p95={samples[int(len(samples) * 0.95) - 1]:8.3f} ms"
+                f"  value rows/page={value_rows / pages:8.1f}  bytes/page={response_bytes / pages:9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.page_size, args.seed))
@@ -0,0 +1,81 @@
+"""
+Measures cold-start cost of a worker: import time of src.main, time until
+uvicorn accepts connections, and latency of the first and second requests,
+with and without the lifespan warmup.
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m benchmarks.bench_startup [--runs 3] [--port 8765]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+PATHS = ["/catalog/?page_size=10", "/catalog/filter/", "/product/00000000-0000-0000-0000-000000000000"]
+
+
+def import_time() -> float:
+    code = "import time; t = time.perf_counter(); import src.main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+
+def wait_for_port(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.005)
+    raise TimeoutError(f"uvicorn did not start listening on port {port}")
+
+
+def request_ms(port: int, path: str) -> float:
+    started = time.perf_counter()
+    try:
+        urllib.request.urlopen(f"http://127.0.0.1:{port}{path}").read()
+    except urllib.error.HTTPError as error:
+        error.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def cold_start(port: int, warmup: bool) -> dict:
+    env = dict(os.environ, WARMUP_ENABLED=str(warmup).lower())
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_for_port(port)
+        result = {"ready": (time.perf_counter() - started) * 1000}
+        for path in PATHS:
+            result[f"first {path}"] = request_ms(port, path)
+            result[f"second {path}"] = request_ms(port, path)
+        return result
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(runs: int, port: int):
+    imports = [import_time() for _ in range(runs)]
+    print(f"import src.main: median {statistics.median(imports):.1f} ms")
+    for warmup in (False, True):
+        results = [cold_start(port, warmup) for _ in range(runs)]
+        print(f"\nWARMUP_ENABLED={warmup}")
+        for key in results[0]:
+            print(f"  {key:<70} median {statistics.median(r[key] for r in results):8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    main(args.runs, args.port)
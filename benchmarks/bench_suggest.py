@@ -0,0 +1,63 @@
+"""
+Compares name autocomplete on the in-process prefix index with the SQL
+prefix query /catalog/suggest falls back to, for prefixes of 1-4 characters
+taken from real product names.
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m benchmarks.bench_suggest [--queries 2000] [--limit 5]
+"""
+import argparse
+import random
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.db.base import SessionLocal
+from src.services.name_index import ProductNameIndex, suggest_query
+
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    print(
+        f"{label:<6} p50={statistics.median(samples):8.3f} ms  p95={samples[int(len(samples) * 0.95) - 1]:8.3f} ms"
+        f"  p99={samples[int(len(samples) * 0.99) - 1]:8.3f} ms"
+    )
+
+
+def main(queries: int, limit: int, seed: int):
+    rnd = random.Random(seed)
+    index = ProductNameIndex(refresh_seconds=float("inf"))
+    with SessionLocal() as session:
+        started = time.perf_counter()
+        index.load(session)
+        print(f"index: {len(index._keys)} names loaded in {(time.perf_counter() - started) * 1000:.1f} ms")
+        names = list(index._names.values())
+        if not names:
+            print("no products")
+            return
+        prefixes = [name[:rnd.randint(1, 4)] for name in rnd.choices(names, k=queries)]
+        dialect_name = session.get_bind().dialect.name
+
+        index_samples, sql_samples = [], []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.suggest(prefix, limit)
+            index_samples.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            session.execute(suggest_query(prefix, limit, dialect_name)).all()
+            sql_samples.append((time.perf_counter() - started) * 1000)
+
+    report("index", index_samples)
+    report("sql", sql_samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.queries, args.limit, args.seed)
@@ -0,0 +1,165 @@
+"""
+Compares product_property_values keyed by UUIDs (the layout before
+b7e4c1d9f2a6) with the current integer surrogate keys.
+
+Copies the current rows into both layouts in a scratch schema, hash-partitioned
+by the property key like the live table, and reports per layout the table and
+index sizes and the median time of:
+- filter:  count of products matching a LIST and an INT filter (EXISTS, as build_filtered_product_query)
+- facets:  LIST value counts over the whole catalog (GROUP BY property, list value)
+- sort:    first page of products ordered by an INT property
+- product: property values of 20 products
+
+Usage (from repo root, DATABASE_URL in .env, PostgreSQL only):
+    python -m benchmarks.bench_surrogate_keys [--partitions 16] [--repeat 20] [--keep]
+"""
+import argparse
+import statistics
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text
+from src.db.base import get_engine
+
+SCHEMA = "bench_surrogate_keys"
+# layout: (product key, property key, list value key, column types, product key in products)
+LAYOUTS = {
+    "uuid": ("product_uid", "property_uid", "list_value_uid", ("uuid", "uuid", "uuid"), "uid"),
+    "id": ("product_id", "property_id", "list_value_id", ("integer", "smallint", "integer"), "id"),
+}
+COPY_SELECT = {
+    "uuid": """
+        SELECT v.id, p.uid, pr.uid, v.int_value, lv.value_uid
+        FROM public.product_property_values v
+        JOIN public.products p ON p.id = v.product_id
+        JOIN public.properties pr ON pr.id = v.property_id
+        LEFT JOIN public.property_list_values lv ON lv.id = v.list_value_id
+    """,
+    "id": "SELECT id, product_id, property_id, int_value, list_value_id FROM public.product_property_values",
+}
+QUERIES = {
+    "filter": """
+        SELECT count(*) FROM public.products p
+        WHERE EXISTS (SELECT 1 FROM {table} v WHERE v.{product} = p.{product_key}
+                      AND v.{property} = :list_property AND v.{list_value} = :list_value)
+          AND EXISTS (SELECT 1 FROM {table} v WHERE v.{product} = p.{product_key}
+                      AND v.{property} = :int_property AND v.int_value BETWEEN :int_from AND :int_to)
+    """,
+    "facets": """
+        SELECT {property}, {list_value}, count(DISTINCT {product}) FROM {table}
+        WHERE {list_value} IS NOT NULL GROUP BY {property}, {list_value}
+    """,
+    "sort": """
+        SELECT {product} FROM {table} WHERE {property} = :int_property
+        ORDER BY int_value, {product} LIMIT 20
+    """,
+    "product": """
+        SELECT * FROM {table} WHERE {product} = ANY(:products)
+    """,
+}
+
+
+def create_layout(connection, name: str, partitions: int) -> str:
+    product, prop, list_value, (product_type, property_type, list_value_type), _ = LAYOUTS[name]
+    table = f"{SCHEMA}.ppv_{name}"
+    connection.execute(text(
+        f"CREATE TABLE {table} (id integer NOT NULL, {product} {product_type} NOT NULL, "
+        f"{prop} {property_type} NOT NULL, int_value integer, {list_value} {list_value_type}, "
+        f"PRIMARY KEY (id, {prop})) PARTITION BY HASH ({prop})"
+    ))
+    for remainder in range(partitions):
+        connection.execute(text(
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        ))
+    connection.execute(text(f"INSERT INTO {table} {COPY_SELECT[name]}"))
+    connection.execute(text(f"CREATE INDEX ON {table} ({product})"))
+    connection.execute(text(f"CREATE INDEX ON {table} ({list_value})"))
+    connection.execute(text(f"CREATE INDEX ON {table} ({prop}, int_value, {product})"))
+    connection.execute(text(f"ANALYZE {table}"))
+    return table
+
+
+def layout_size(connection, table: str) -> tuple:
+    """Table and index bytes summed over the partitions."""
+    return connection.execute(text(
+        "SELECT sum(pg_table_size(i.inhrelid)), sum(pg_indexes_size(i.inhrelid)) "
+        "FROM pg_inherits i WHERE i.inhparent = CAST(:table AS regclass)"
+    ), {"table": table}).one()
+
+
+def query_parameters(connection) -> dict:
+    """The same filter values for both layouts, as UUIDs and as ids."""
+    list_property, list_value = connection.execute(text(
+        "SELECT property_id, list_value_id FROM public.product_property_values WHERE list_value_id IS NOT NULL "
+        "GROUP BY 1, 2 ORDER BY count(*) DESC LIMIT 1"
+    )).one()
+    int_property, int_from, int_to = connection.execute(text(
+        "SELECT property_id, percentile_disc(0.25) WITHIN GROUP (ORDER BY int_value), "
+        "percentile_disc(0.5) WITHIN GROUP (ORDER BY int_value) "
+        "FROM public.product_property_values WHERE int_value IS NOT NULL GROUP BY 1 ORDER BY count(*) DESC LIMIT 1"
+    )).one()
+    products = connection.execute(text("SELECT id, uid FROM public.products ORDER BY random() LIMIT 20")).all()
+
+    def uid_of(table: str, key: str, value: int):
+        return connection.execute(text(f"SELECT {key} FROM public.{table} WHERE id = :id"), {"id": value}).scalar_one()
+
+    ranges = {"int_from": int_from, "int_to": int_to}
+    return {
+        "id": {
+            "list_property": list_property, "list_value": list_value, "int_property": int_property,
+            "products": [row.id for row in products], **ranges,
+        },
+        "uuid": {
+            "list_property": uid_of("properties", "uid", list_property),
+            "list_value": uid_of("property_list_values", "value_uid", list_value),
+            "int_property": uid_of("properties", "uid", int_property),
+            "products": [row.uid for row in products], **ranges,
+        },
+    }
+
+
+def main(partitions: int, repeat: int, keep: bool):
+    engine = get_engine()
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        tables = {name: create_layout(connection, name, partitions) for name in LAYOUTS}
+        parameters = query_parameters(connection)
+
+    try:
+        with engine.connect() as connection:
+            print(f"{'':>8} " + " ".join(f"{name:>14}" for name in LAYOUTS))
+            sizes = {name: layout_size(connection, table) for name, table in tables.items()}
+            print(f"{'table MB':>8} " + " ".join(f"{sizes[name][0] / 2**20:>14.1f}" for name in LAYOUTS))
+            print(f"{'index MB':>8} " + " ".join(f"{sizes[name][1] / 2**20:>14.1f}" for name in LAYOUTS))
+            for query_name, sql in QUERIES.items():
+                cells = []
+                for name, table in tables.items():
+                    product, prop, list_value, _, product_key = LAYOUTS[name]
+                    statement = text(sql.format(
+                        table=table, product=product, property=prop, list_value=list_value, product_key=product_key,
+                    ))
+                    connection.execute(statement, parameters[name]).all() # warm the cache
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        connection.execute(statement, parameters[name]).all()
+                        timings.append((time.perf_counter() - started) * 1000)
+                    cells.append(f"{statistics.median(timings):>11.2f} ms")
+                print(f"{query_name:>8} " + " ".join(cells))
+    finally:
+        if not keep:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema for manual EXPLAINs.")
+    args = parser.parse_args()
+    main(args.partitions, args.repeat, args.keep)
@@ -1,7 +1,13 @@
-from fastapi import Depends
+import uuid
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
+from src.core.config import settings
 from src.db.base import get_session
 from src.repositories import PropertyRepository, ProductRepository
+from src.schemas import ProductProjection
+
+PRODUCT_FIELDS = ("uid", "name", "properties")
 
 def get_property_repository(session: Session = Depends(get_session)) -> PropertyRepository:
     """
@@ -13,4 +19,53 @@ def get_product_repository(session: Session = Depends(get_session)) -> ProductRe
     """
     Dependency to get a ProductRepository instance with a database session.
     """
-    return ProductRepository(session)
\ No newline at end of file
+    return ProductRepository(session)
+
+def require_database():
+    """
+    Dependency rejecting requests that need the primary database (writes, the change feed)
+    on nodes serving a read-only catalog snapshot.
+    """
+    if settings.READ_BACKEND == "snapshot":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="This node serves a read-only catalog snapshot.",
+        )
+
+def get_product_projection(
+    fields: Optional[str] = Query(None, description="Comma-separated product fields to return: 'uid', 'name', 'properties'. Defaults to all."),
+    properties: Optional[str] = Query(None, description="Comma-separated property UIDs; only these properties are returned."),
+) -> ProductProjection:
+    """
+    Dependency parsing the `fields=` / `properties=` projection of product reads.
+    `uid` is always returned; `properties=` implies the 'properties' field.
+    """
+    requested_fields = set(PRODUCT_FIELDS)
+    if fields is not None:
+        requested_fields = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested_fields - set(PRODUCT_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields {', '.join(sorted(unknown))}. Allowed fields are {', '.join(PRODUCT_FIELDS)}.",
+            )
+    property_uids = None
+    if properties is not None:
+        try:
+            property_uids = frozenset(uuid.UUID(value.strip()) for value in properties.split(",") if value.strip())
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid UUID format in 'properties'.",
+            )
+        if not property_uids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'properties' must list at least one property UID.",
+            )
+        requested_fields.add("properties")
+    return ProductProjection(
+        name="name" in requested_fields,
+        properties="properties" in requested_fields,
+        property_uids=property_uids,
+    )
@@ -1,3 +1,5 @@
 from .properties import property_router
 from .products import products_router
-from .catalog import catalog_router
\ No newline at end of file
+from .catalog import catalog_router
+from .changes import changes_router
+from .stats import stats_router
@@ -1,12 +1,30 @@
+import base64
+import hashlib
+import json
 import uuid
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from starlette.requests import QueryParams
-from sqlalchemy.orm import Session, aliased, selectinload, joinedload
-from sqlalchemy import select, func, and_
-from src.api.deps import get_session
-from src.schemas import SortOptions, CatalogOutputSchema, ProductOutputSchema, PropertyOutputSchema, PropertyTypeEnum
-from src.db.models import Product, ProductPropertyValue, Property
+from sqlalchemy.orm import Session, selectinload, joinedload
+import math
+from fractions import Fraction
+from sqlalchemy import select, func, cast, literal_column, bindparam, and_, or_, Float, String, Uuid
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from src.api.deps import get_session, get_product_projection
+from src.db.parallel import run_in_snapshot
+from src.db.sharding import all_shard_sessions, get_catalog_version, scatter, sharding_enabled
+from src.core.config import settings
+from src.core.http_cache import make_etag, canonical_query, etag_matches, set_cache_headers, not_modified
+from src.core.result_cache import cached_response
+from src.core.admission import Admission, admission_slot
+from src.core.singleflight import coalesce
+from src.repositories import ProductRepository
+from src.services.filter_planner import plan_filters, apply_filters
+from src.services.filter_expressions import FilterCompiler, check_search_limits
+from src.services.query_stats import record_query
+from src.services.query_guard import check_filter_limits, check_query_cost
+from src.schemas import SortOptions, PropertySort, HistogramOptions, CatalogOutputSchema, CatalogSearchInputSchema, CatalogSearchOutputSchema, CatalogSuggestOutputSchema, ProductSuggestionSchema, ProductOutputSchema, ProductProjection, PropertyOutputSchema, PropertyTypeEnum
+from src.db.models import Product, ProductPropertyValue, Property, PropertyListValue
 
 catalog_router = APIRouter(prefix="/catalog", tags=["Catalog"])
 
@@ -78,9 +96,10 @@ def build_filtered_product_query(
 
     if property_filters:
         property_uids_to_check = list(property_filters)
-        prop_types_stmt = select(Property.uid, Property.type).where(Property.uid.in_(property_uids_to_check))
+        prop_types_stmt = select(Property.uid, Property.id, Property.type).where(Property.uid.in_(property_uids_to_check))
         prop_type_results = session.execute(prop_types_stmt).all()
-        prop_type_map = {uid: p_type for uid, p_type in prop_type_results}
+        prop_type_map = {uid: p_type for uid, _, p_type in prop_type_results}
+        prop_id_map = {uid: prop_id for uid, prop_id, _ in prop_type_results}
 
         # Validate existence and filter types
         for prop_uid, filter_data in property_filters.items():
@@ -89,77 +108,320 @@ def build_filtered_product_query(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Property with UID {prop_uid} used in filter does not exist.",
                  )
-            prop_type = prop_type_map[prop_uid]
- 
-        # Apply filters using subqueries 
-        for prop_uid, filter_data in property_filters.items():
-            prop_type = prop_type_map.get(prop_uid)
-
-            ppv_alias = aliased(ProductPropertyValue)
-            subquery_conditions = [
-                ppv_alias.product_uid == Product.uid,
-                ppv_alias.property_uid == prop_uid
-            ]
-            if prop_type == PropertyTypeEnum.INT:
-                has_int_filter = False
-                if filter_data["int_from"] is not None:
-                    subquery_conditions.append(ppv_alias.int_value >= filter_data["int_from"])
-                    has_int_filter = True
-                if filter_data["int_to"] is not None:
-                    subquery_conditions.append(ppv_alias.int_value <= filter_data["int_to"])
-                    has_int_filter = True
-                if not has_int_filter: 
-                    continue # Skip if _from/_to keys present but no valid values parsed
-            elif prop_type == PropertyTypeEnum.LIST:
-                 if filter_data["list_values"]:
-                     subquery_conditions.append(ppv_alias.list_value_uid.in_(filter_data["list_values"]))
-                 else:
-                     continue # Skip if property_uid key present but no valid list values parsed
-
-            exists_subquery = select(1).select_from(ppv_alias).where(and_(*subquery_conditions)).exists()
-            base_query = base_query.where(exists_subquery)
+
+        # Apply filters most selective first, see src/services/filter_planner.py
+        planned_filters = plan_filters(property_filters, prop_type_map, prop_id_map)
+        base_query = apply_filters(base_query, planned_filters)
     return base_query
 
 
+def parse_sort(sort: str) -> SortOptions | PropertySort:
+    """
+    Parses the sort parameter: 'uid', 'name' or 'property_<uid>[:asc|:desc]'.
+    Raises HTTPException for anything else.
+    """
+    if sort in SortOptions._value2member_map_:
+        return SortOptions(sort)
+    if sort.startswith("property_"):
+        prop_uid_str, _, direction = sort[len("property_"):].partition(":")
+        if direction in ("", "asc", "desc"):
+            try:
+                return PropertySort(uuid.UUID(prop_uid_str), direction == "desc")
+            except ValueError:
+                pass
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Invalid sort '{sort}'. Allowed values are 'uid', 'name' and 'property_<uid>[:desc]'.",
+    )
+
+
+def apply_sort(session: Session, query: select, sort: SortOptions | PropertySort) -> select:
+    """
+    Adds the ORDER BY for the requested sort to a product query.
+    Property sorts order by the product's value of that property (INT by number,
+    LIST by value string); see sort_order for NULLs and ties.
+    """
+    return query.order_by(*sort_order(sort, sort_value_expression(session, sort)))
+
+
+def sort_order(sort: SortOptions | PropertySort, sort_value) -> list:
+    """
+    ORDER BY of a sort: the sort value with NULLs (products without a name or
+    without the property) last, then the product UID so ties and pages are
+    stable. The same order on every database and shard, see merge_sort_candidates.
+    """
+    if sort == SortOptions.UID:
+        return [Product.uid]
+    descending = isinstance(sort, PropertySort) and sort.descending
+    return [(sort_value.desc() if descending else sort_value.asc()).nulls_last(), Product.uid]
+
+
+def sort_value_expression(session: Session, sort: SortOptions | PropertySort):
+    """
+    The expression of a product's sort value in a product query (NULL for
+    products without the property).
+    """
+    if sort == SortOptions.NAME:
+        return Product.name
+    if not isinstance(sort, PropertySort):
+        return Product.uid
+
+    prop = session.execute(select(Property.id, Property.type).where(Property.uid == sort.property_uid)).one_or_none()
+    if prop is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Property with UID {sort.property_uid} used in sort does not exist.",
+        )
+    aggregate = func.max if sort.descending else func.min
+    # a correlated lookup of the product's own values, one ix_product_property_values_product_property_int
+    # probe per product the filters leave, instead of aggregating every value of the property
+    if prop.type == PropertyTypeEnum.INT:
+        sort_value = select(aggregate(ProductPropertyValue.int_value))
+    else:
+        sort_value = (
+            select(aggregate(PropertyListValue.value))
+            .select_from(ProductPropertyValue)
+            .join(PropertyListValue, ProductPropertyValue.list_value_id == PropertyListValue.id)
+        )
+    return (
+        sort_value
+        .where(ProductPropertyValue.product_id == Product.id, ProductPropertyValue.property_id == prop.id)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+
+
 @catalog_router.get("/", response_model=CatalogOutputSchema)
 async def get_catalog(
     request: Request,
+    response: Response,
+    admission: Optional[Admission] = Depends(admission_slot("catalog")),
     session: Session = Depends(get_session),
     page: int = Query(1, ge=1, description="Page number, starting from 1."),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page."),
     name: Optional[str] = Query(None, description="Substring search for product name (case-insensitive)."),
-    sort: SortOptions = Query(SortOptions.UID, description="Sort order for products."),
+    sort: str = Query(SortOptions.UID, description="Sort order for products: 'uid', 'name' or 'property_<uid>[:desc]'."),
+    projection: ProductProjection = Depends(get_product_projection),
 ):
     """
     Retrieves a paginated list of products with optional filtering and sorting.
+    `fields=` and `properties=` limit what is loaded and returned per product.
     """
-    allowed_keys = {"page", "page_size", "name", "sort"}
+    allowed_keys = {"page", "page_size", "name", "sort", "fields", "properties"}
     for key in request.query_params.keys():
         if not key.startswith("property_") and key not in allowed_keys:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid query parameter '{key}'. Allowed parameters are 'page', 'page_size', 'name', 'sort', and 'property_*' filters.",
+                detail=f"Invalid query parameter '{key}'. Allowed parameters are 'page', 'page_size', 'name', 'sort', 'fields', 'properties', and 'property_*' filters.",
             )
+    check_filter_limits(parse_property_filters(request.query_params))
+    sort = parse_sort(sort)
 
-    base_query = build_filtered_product_query(session, name, request.query_params)
+    record_query(request, "catalog")
+    catalog_version = get_catalog_version(session)
+    etag = make_etag("catalog", catalog_version, canonical_query(request.query_params))
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.CACHE_CONTROL_CATALOG)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_CATALOG)
 
-    count_query = select(func.count()).select_from(base_query)
-    total_count = session.execute(count_query).scalar_one()
+    offset = (page - 1) * page_size
+    # identical concurrent requests share one execution, admitted as 'catalog', see src/core/singleflight.py;
+    # rendered pages are shared between workers, see src/core/result_cache.py
+    return await cached_response(etag, response, lambda: coalesce(
+        etag,
+        lambda: query_catalog_page(session, request.query_params, name, sort, offset, page_size, projection, catalog_version),
+        session,
+        admission,
+    ))
 
 
-    offset = (page - 1) * page_size
+def query_catalog_page(
+    session: Session,
+    query_params: QueryParams,
+    name: Optional[str],
+    sort: SortOptions | PropertySort,
+    offset: int,
+    page_size: int,
+    projection: ProductProjection,
+    catalog_version: Optional[int] = None,
+) -> CatalogOutputSchema:
+    """
+    Runs the catalog count and page queries for validated parameters.
+    `catalog_version` is the version the response is cached and tagged under;
+    the catalog engine only answers from a snapshot of that version.
+    """
+    if sharding_enabled():
+        return query_sharded_catalog_page(session, query_params, name, sort, offset, page_size, projection)
+    if settings.CATALOG_ENGINE_ENABLED:
+        from src.services.catalog_engine import get_catalog_engine # numpy is only imported when enabled
+        engine_result = get_catalog_engine().query(catalog_version, name, parse_property_filters(query_params), sort, offset, page_size)
+        if engine_result is not None:
+            total_count, page_uids = engine_result
+            return CatalogOutputSchema(products=ProductRepository(session).get_products(page_uids, projection), count=total_count)
+
+    base_query = build_filtered_product_query(session, name, query_params)
+
+    count_query = select(func.count()).select_from(base_query.subquery())
+    check_query_cost(session, count_query)
+    page_query = apply_sort(session, base_query, sort).limit(page_size).offset(offset)
+
+    # independent queries, concurrent in one snapshot when enabled, see src/db/parallel.py
+    total_count, output_products = run_in_snapshot(session, [
+        lambda task_session: task_session.execute(count_query).scalar_one(),
+        lambda task_session: query_page_products(task_session, page_query, projection),
+    ])
+    return CatalogOutputSchema(products=output_products, count=total_count)
+
+
+def query_sharded_catalog_page(
+    session: Session,
+    query_params: QueryParams,
+    name: Optional[str],
+    sort: SortOptions | PropertySort,
+    offset: int,
+    page_size: int,
+    projection: ProductProjection,
+) -> CatalogOutputSchema:
+    """
+    query_catalog_page on a sharded catalog, see src/db/sharding.py: every shard
+    counts its matches and returns the sort values of its first offset + page_size,
+    the page is cut from their merge and its products are loaded from their shards.
+    Deep pages cost every shard the whole offset.
+    """
+    total_count, candidates = gather_candidates(
+        session, lambda shard_session: build_filtered_product_query(shard_session, name, query_params), sort, offset + page_size
+    )
+    page = candidates[offset:offset + page_size]
+    return CatalogOutputSchema(products=load_candidate_products(session, page, projection), count=total_count)
+
+
+def candidates_query(session: Session, base_query: select, sort: SortOptions | PropertySort, limit: int, after: Optional[tuple] = None) -> select:
+    """
+    The (uid, sort_value) rows of a product query in sort order, NULLs last and
+    UID breaking ties, optionally only those after a (sort value, uid) position.
+    """
+    query, sort_value = base_query, sort_value_expression(session, sort)
+    if after is not None:
+        query = query.where(after_position(sort, sort_value, *after))
+    return query.with_only_columns(Product.uid, sort_value.label("sort_value")).order_by(*sort_order(sort, sort_value)).limit(limit)
+
+
+def after_position(sort: SortOptions | PropertySort, sort_value, last_value: Any, last_uid: uuid.UUID):
+    """
+    Keyset condition for the rows ordered after (last_value, last_uid) by candidates_query.
+    """
+    if sort == SortOptions.UID:
+        return Product.uid > last_uid
+    if last_value is None:
+        return and_(sort_value.is_(None), Product.uid > last_uid)
+    descending = isinstance(sort, PropertySort) and sort.descending
+    beyond = sort_value < last_value if descending else sort_value > last_value
+    return or_(beyond, and_(sort_value == last_value, Product.uid > last_uid), sort_value.is_(None))
+
+
+def gather_candidates(
+    session: Session,
+    build_query: Callable[[Session], select],
+    sort: SortOptions | PropertySort,
+    limit: int,
+    after: Optional[tuple] = None,
+) -> Tuple[int, List[tuple]]:
+    """
+    Counts the products of a query on every shard and collects the first `limit`
+    (uid, sort value, shard) candidates of each, merged in sort order.
+    """
+    def shard_candidates(shard_session: Session):
+        base_query = build_query(shard_session)
+        count_query = select(func.count()).select_from(base_query.subquery())
+        check_query_cost(shard_session, count_query)
+        page_query = candidates_query(shard_session, base_query, sort, limit, after)
+        # independent queries, concurrent in one snapshot when enabled, see src/db/parallel.py
+        return run_in_snapshot(shard_session, [
+            lambda task_session: task_session.execute(count_query).scalar_one(),
+            lambda task_session: task_session.execute(page_query).all(),
+        ])
+
+    shard_results = scatter(session, shard_candidates)
+    candidates = [
+        (row.uid, row.sort_value, shard)
+        for shard, (_, rows) in enumerate(shard_results)
+        for row in rows
+    ]
+    if len(shard_results) > 1:
+        candidates = merge_sort_candidates(session, candidates, sort)
+    return sum(count for count, _ in shard_results), candidates
+
+
+def load_candidate_products(session: Session, candidates: List[tuple], projection: ProductProjection) -> List[ProductOutputSchema]:
+    """
+    Loads the products of (uid, sort value, shard) candidates from their shards, in candidate order.
+    """
+    shard_sessions = all_shard_sessions(session)
+    shard_uids: Dict[Session, List[uuid.UUID]] = {}
+    for uid, _, shard in candidates:
+        shard_uids.setdefault(shard_sessions[shard], []).append(uid)
+    products = {
+        product.uid: product
+        for shard_products in scatter(session, lambda shard_session: ProductRepository(shard_session).get_products(shard_uids.get(shard_session, []), projection))
+        for product in shard_products
+    }
+    return [products[uid] for uid, _, _ in candidates if uid in products]
+
+
+def merge_sort_candidates(session: Session, candidates: List[tuple], sort: SortOptions | PropertySort) -> List[tuple]:
+    """
+    Orders (uid, sort value, shard) candidates from all shards as one database would:
+    by sort value (NULLs last), then UID. PostgreSQL compares strings by collation,
+    so name and LIST values are ordered by the primary there.
+    """
+    descending = isinstance(sort, PropertySort) and sort.descending
+    if session.get_bind().dialect.name == "postgresql" and any(isinstance(value, str) for _, value, _ in candidates):
+        unnested = func.unnest(
+            bindparam("sort_values", [value for _, value, _ in candidates], type_=ARRAY(String)),
+            bindparam("uids", [uid for uid, _, _ in candidates], type_=ARRAY(Uuid)),
+        ).table_valued("sort_value", "uid", with_ordinality="position").render_derived()
+        order = unnested.c.sort_value.desc() if descending else unnested.c.sort_value.asc()
+        positions = session.execute(
+            select(unnested.c.position).order_by(order.nulls_last(), unnested.c.uid)
+        ).scalars().all()
+        return [candidates[position - 1] for position in positions]
+
+    by_uid = sorted(candidates, key=lambda candidate: candidate[0])
+    ordered = [candidate for candidate in by_uid if candidate[1] is not None]
+    ordered.sort(key=lambda candidate: candidate[1], reverse=descending) # stable, ties stay in UID order
+    return ordered + [candidate for candidate in by_uid if candidate[1] is None]
+
+
+def query_page_products(session: Session, base_query: select, projection: ProductProjection) -> List[ProductOutputSchema]:
+    """
+    Loads the products of a sorted and paginated product query, limited to the projection.
+    """
+    if not projection.properties:
+        rows = session.execute(base_query.with_only_columns(Product.uid, Product.name)).all()
+        return [projection.apply(ProductOutputSchema(uid=row.uid, name=row.name)) for row in rows]
+
+    if settings.PRODUCT_DOCUMENTS_ENABLED:
+        # one column per product, no joins; rows not backfilled yet go through the joined read
+        product_repo = ProductRepository(session)
+        rows = session.execute(base_query.with_only_columns(Product.uid, Product.document)).all()
+        products_map = product_repo.products_from_documents(rows, projection)
+        missing_uids = [row.uid for row in rows if row.uid not in products_map]
+        for product in product_repo.get_products(missing_uids, projection):
+            products_map[product.uid] = product
+        return [products_map[row.uid] for row in rows if row.uid in products_map]
+
+    property_values = Product.property_values
+    if projection.property_uids is not None:
+        # only the requested properties' rows are fetched
+        property_values = property_values.and_(ProductPropertyValue.property_id.in_(
+            select(Property.id).where(Property.uid.in_(projection.property_uids))
+        ))
     query = base_query.options(
-        selectinload(Product.property_values).options(
+        selectinload(property_values).options(
             joinedload(ProductPropertyValue.property),
             joinedload(ProductPropertyValue.list_value)
         )
     )
-    if sort == SortOptions.NAME:
-        query = query.order_by(Product.name)
-    else:
-        query = query.order_by(Product.uid)
-
-    query = query.limit(page_size).offset(offset)
     db_products = session.execute(query).scalars().unique().all()
 
     output_products = []
@@ -169,55 +431,234 @@ async def get_catalog(
             for prop_value_db in product_db.property_values:
                 product_properties_output.append(PropertyOutputSchema.from_db_models(property_db=prop_value_db.property, property_list_value_db=prop_value_db.list_value, product_property_value_db=prop_value_db))
 
-        output_products.append(
+        output_products.append(projection.apply(
             ProductOutputSchema(
                 uid=product_db.uid,
                 name=product_db.name,
                 properties=product_properties_output,
             )
+        ))
+
+    return output_products
+
+
+def int_histogram_stats(session: Session, filtered_product_ids_subquery, histogram: HistogramOptions, buckets: int) -> Dict[str, Any]:
+    """
+    INT property stats with a histogram, in one statement: min/max (and quantile
+    thresholds via percentile_cont) per property, then counts per width_bucket.
+    Buckets are inclusive integer ranges that can be passed back as _from/_to;
+    buckets with no possible integer value are left out.
+    """
+    values_cte = (
+        select(ProductPropertyValue.property_id, ProductPropertyValue.product_id, ProductPropertyValue.int_value)
+        .join(filtered_product_ids_subquery, ProductPropertyValue.product_id == filtered_product_ids_subquery.c.id)
+        .join(Property, ProductPropertyValue.property_id == Property.id)
+        .where(Property.type == PropertyTypeEnum.INT)
+        .where(ProductPropertyValue.int_value.is_not(None))
+        .cte("int_values")
+    )
+    bounds_columns = [
+        values_cte.c.property_id,
+        func.min(values_cte.c.int_value).label("min_value"),
+        func.max(values_cte.c.int_value).label("max_value"),
+    ]
+    if histogram == HistogramOptions.QUANTILE:
+        fractions = array([index / buckets for index in range(1, buckets)])
+        bounds_columns.append(
+            func.percentile_cont(fractions).within_group(cast(values_cte.c.int_value, Float)).label("thresholds")
         )
+    bounds = select(*bounds_columns).group_by(values_cte.c.property_id).cte("int_bounds")
+
+    if histogram == HistogramOptions.QUANTILE:
+        bucket = func.width_bucket(cast(values_cte.c.int_value, Float), bounds.c.thresholds)
+    elif session.get_bind().dialect.name == "postgresql":
+        bucket = func.width_bucket(values_cte.c.int_value, bounds.c.min_value, bounds.c.max_value + 1, buckets) - 1
+    else: # the same bucket as width_bucket, in integer arithmetic
+        bucket = (values_cte.c.int_value - bounds.c.min_value) * buckets // (bounds.c.max_value - bounds.c.min_value + 1)
+    group_columns = [bounds.c.property_id, bounds.c.min_value, bounds.c.max_value]
+    if histogram == HistogramOptions.QUANTILE:
+        group_columns.append(bounds.c.thresholds)
+    bucket = bucket.label("bucket")
+    histogram_query = (
+        select(*group_columns, bucket, func.count(func.distinct(values_cte.c.product_id)).label("value_count"))
+        .join_from(values_cte, bounds, values_cte.c.property_id == bounds.c.property_id)
+        .group_by(*group_columns, literal_column("bucket")) # the output column, so the expression's parameters are bound once
+        .subquery()
+    )
+    histogram_query = (
+        select(Property.uid.label("property_uid"), histogram_query)
+        .join(Property, histogram_query.c.property_id == Property.id)
+    )
 
-    return CatalogOutputSchema(products=output_products, count=total_count)
+    stats: Dict[str, Any] = {}
+    for row in session.execute(histogram_query).all():
+        prop_uid_str = f"property_{row.property_uid}"
+        if prop_uid_str not in stats:
+            if histogram == HistogramOptions.QUANTILE:
+                edges = [row.min_value, *row.thresholds, row.max_value + 1]
+            else:
+                width = row.max_value - row.min_value + 1
+                edges = [row.min_value + Fraction(index * width, buckets) for index in range(buckets + 1)]
+            stats[prop_uid_str] = {
+                "min_value": row.min_value,
+                "max_value": row.max_value,
+                "histogram": [
+                    {"from": math.ceil(low), "to": math.ceil(high) - 1, "count": 0}
+                    for low, high in zip(edges, edges[1:])
+                ],
+            }
+        stats[prop_uid_str]["histogram"][row.bucket]["count"] = row.value_count
+    for prop_stats in stats.values():
+        prop_stats["histogram"] = [bucket for bucket in prop_stats["histogram"] if bucket["from"] <= bucket["to"]]
+    return stats
 
 
 @catalog_router.get("/filter/", response_model=Dict[str, Any])
 async def get_catalog_filter(
     request: Request,
+    response: Response,
+    admission: Optional[Admission] = Depends(admission_slot("catalog_filter")),
     session: Session = Depends(get_session),
     name: Optional[str] = Query(None, description="Substring search for product name (case-insensitive)."),
+    histogram: Optional[HistogramOptions] = Query(None, description="Add a histogram to INT property stats: 'fixed' (equal-width) or 'quantile' (equal-count) buckets."),
+    buckets: int = Query(10, ge=2, le=100, description="Number of histogram buckets."),
 ):
     """
     Returns filter statistics for products matching the query parameters.
     Provides total count and counts/ranges for relevant properties.
     """
-    allowed_keys = {"name"}
+    allowed_keys = {"name", "histogram", "buckets"}
     for key in request.query_params.keys():
         if not key.startswith("property_") and key not in allowed_keys:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid query parameter '{key}' for filter endpoint. Allowed parameters are 'name' and 'property_*' filters.",
+                detail=f"Invalid query parameter '{key}' for filter endpoint. Allowed parameters are 'name', 'histogram', 'buckets' and 'property_*' filters.",
             )
+    check_filter_limits(parse_property_filters(request.query_params))
+    if histogram == HistogramOptions.QUANTILE and session.get_bind().dialect.name != "postgresql":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quantile histograms are not available on this node, use 'fixed'.",
+        )
+    if histogram is not None and sharding_enabled():
+        # bucket edges depend on bounds over all shards
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Histograms are not available on a sharded catalog.",
+        )
+
+    record_query(request, "catalog_filter")
+    etag = make_etag("catalog_filter", get_catalog_version(session), canonical_query(request.query_params))
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.CACHE_CONTROL_CATALOG_FILTER)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_CATALOG_FILTER)
+
+    return await cached_response(etag, response, lambda: coalesce(
+        etag,
+        lambda: query_catalog_filter(session, request.query_params, name, histogram, buckets),
+        session,
+        admission,
+    ))
+
+
+def query_catalog_filter(
+    session: Session,
+    query_params: QueryParams,
+    name: Optional[str],
+    histogram: Optional[HistogramOptions],
+    buckets: int,
+) -> Dict[str, Any]:
+    """
+    Runs the catalog filter statistics queries for validated parameters.
+    """
+    if sharding_enabled():
+        return merge_filter_stats(scatter(
+            session, lambda shard_session: query_shard_filter(shard_session, query_params, name, histogram, buckets)
+        ))
+    return query_shard_filter(session, query_params, name, histogram, buckets)
+
+
+def query_shard_filter(
+    session: Session,
+    query_params: QueryParams,
+    name: Optional[str],
+    histogram: Optional[HistogramOptions],
+    buckets: int,
+) -> Dict[str, Any]:
+    """
+    The filter statistics of the products in one database.
+    """
+    base_filtered_query = build_filtered_product_query(session, name, query_params)
+    filtered_product_ids_subquery = base_filtered_query.with_only_columns(Product.id).subquery()
+
+    count_query = select(func.count()).select_from(filtered_product_ids_subquery)
+    check_query_cost(session, count_query)
+
+    if histogram is not None:
+        int_stats_task = lambda task_session: int_histogram_stats(task_session, filtered_product_ids_subquery, histogram, buckets)
+    else:
+        int_stats_task = lambda task_session: int_bound_stats(task_session, filtered_product_ids_subquery)
+    # independent queries, concurrent in one snapshot when enabled, see src/db/parallel.py
+    total_count, list_stats, int_stats = run_in_snapshot(session, [
+        lambda task_session: task_session.execute(count_query).scalar_one(),
+        lambda task_session: list_value_stats(task_session, filtered_product_ids_subquery),
+        int_stats_task,
+    ])
+
+    response_data = {"count": total_count}
+    response_data.update(list_stats)
+    response_data.update(int_stats)
+
+    return response_data
+
 
-    base_filtered_query = build_filtered_product_query(session, name, request.query_params)
-    filtered_product_uids_subquery = base_filtered_query.with_only_columns(Product.uid).subquery()
+def merge_filter_stats(shard_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combines the filter statistics of all shards: counts are summed per list
+    value, INT bounds are the lowest minimum and the highest maximum.
+    """
+    total_count, list_stats, int_stats = 0, {}, {}
+    for stats in shard_stats:
+        for key, value in stats.items():
+            if key == "count":
+                total_count += value
+            elif "min_value" in value:
+                bounds = int_stats.setdefault(key, dict(value))
+                bounds["min_value"] = min(bounds["min_value"], value["min_value"])
+                bounds["max_value"] = max(bounds["max_value"], value["max_value"])
+            else:
+                value_counts = list_stats.setdefault(key, {})
+                for value_uid, count in value.items():
+                    value_counts[value_uid] = value_counts.get(value_uid, 0) + count
+
+    response_data = {"count": total_count}
+    response_data.update(list_stats)
+    response_data.update(int_stats)
+    return response_data
 
-    count_query = select(func.count()).select_from(filtered_product_uids_subquery)
-    total_count = session.execute(count_query).scalar_one()
 
+def list_value_stats(session: Session, filtered_product_ids_subquery) -> Dict[str, Any]:
+    """
+    Product counts per value of LIST properties, aggregated on the surrogate ids and mapped back to UIDs.
+    """
     filter_stats: Dict[str, Any] = {}
 
-    # Stats for LIST properties
-    list_stats_query = (
+    list_counts = (
         select(
-            ProductPropertyValue.property_uid,
-            ProductPropertyValue.list_value_uid,
-            func.count(func.distinct(ProductPropertyValue.product_uid)).label("value_count")
+            ProductPropertyValue.property_id,
+            ProductPropertyValue.list_value_id,
+            func.count(func.distinct(ProductPropertyValue.product_id)).label("value_count")
         )
-        .join(filtered_product_uids_subquery, ProductPropertyValue.product_uid == filtered_product_uids_subquery.c.uid)
-        .join(Property, ProductPropertyValue.property_uid == Property.uid)
+        .join(filtered_product_ids_subquery, ProductPropertyValue.product_id == filtered_product_ids_subquery.c.id)
+        .where(ProductPropertyValue.list_value_id.is_not(None))
+        .group_by(ProductPropertyValue.property_id, ProductPropertyValue.list_value_id)
+        .subquery()
+    )
+    list_stats_query = (
+        select(Property.uid.label("property_uid"), PropertyListValue.value_uid.label("list_value_uid"), list_counts.c.value_count)
+        .join(Property, list_counts.c.property_id == Property.id)
+        .join(PropertyListValue, list_counts.c.list_value_id == PropertyListValue.id)
         .where(Property.type == PropertyTypeEnum.LIST)
-        .where(ProductPropertyValue.list_value_uid.is_not(None))
-        .group_by(ProductPropertyValue.property_uid, ProductPropertyValue.list_value_uid)
     )
     list_stats_results = session.execute(list_stats_query).all()
 
@@ -227,18 +668,30 @@ async def get_catalog_filter(
             filter_stats[prop_uid_str] = {}
         filter_stats[prop_uid_str][str(row.list_value_uid)] = row.value_count
 
-    # Stats for INT properties
-    int_stats_query = (
+    return filter_stats
+
+
+def int_bound_stats(session: Session, filtered_product_ids_subquery) -> Dict[str, Any]:
+    """
+    Min and max value per INT property over the filtered products.
+    """
+    filter_stats: Dict[str, Any] = {}
+
+    int_bounds = (
         select(
-            ProductPropertyValue.property_uid,
+            ProductPropertyValue.property_id,
             func.min(ProductPropertyValue.int_value).label("min_value"),
             func.max(ProductPropertyValue.int_value).label("max_value")
         )
-        .join(filtered_product_uids_subquery, ProductPropertyValue.product_uid == filtered_product_uids_subquery.c.uid)
-        .join(Property, ProductPropertyValue.property_uid == Property.uid)
-        .where(Property.type == PropertyTypeEnum.INT)
+        .join(filtered_product_ids_subquery, ProductPropertyValue.product_id == filtered_product_ids_subquery.c.id)
         .where(ProductPropertyValue.int_value.is_not(None))
-        .group_by(ProductPropertyValue.property_uid)
+        .group_by(ProductPropertyValue.property_id)
+        .subquery()
+    )
+    int_stats_query = (
+        select(Property.uid.label("property_uid"), int_bounds.c.min_value, int_bounds.c.max_value)
+        .join(Property, int_bounds.c.property_id == Property.id)
+        .where(Property.type == PropertyTypeEnum.INT)
     )
     int_stats_results = session.execute(int_stats_query).all()
 
@@ -250,7 +703,126 @@ async def get_catalog_filter(
                 "max_value": row.max_value
             }
 
-    response_data = {"count": total_count}
-    response_data.update(filter_stats)
+    return filter_stats
+
+
+@catalog_router.post("/search", response_model=CatalogSearchOutputSchema)
+async def search_catalog(
+    search: CatalogSearchInputSchema,
+    admission: Optional[Admission] = Depends(admission_slot("catalog")),
+    session: Session = Depends(get_session),
+    projection: ProductProjection = Depends(get_product_projection),
+):
+    """
+    Retrieves products matching a boolean filter tree, a page at a time: pass the
+    returned `next_cursor` as `cursor` for the next page. For filters that need
+    OR / NOT or do not fit in a URL; see src/services/filter_expressions.py.
+    `fields=` and `properties=` query parameters limit what is returned per product.
+    """
+    if search.filter is not None:
+        check_search_limits(search.filter)
+    sort = parse_sort(search.sort)
+    after = decode_cursor(search) if search.cursor else None
+
+    # identical concurrent searches share one execution, admitted as 'catalog', see src/core/singleflight.py
+    return await coalesce(
+        ("catalog_search", get_catalog_version(session), search.model_dump_json(), projection),
+        lambda: query_catalog_search(session, search, sort, after, projection),
+        session,
+        admission,
+    )
+
+
+def search_fingerprint(search: CatalogSearchInputSchema) -> str:
+    """Identifies the filter and sort a cursor was issued for."""
+    key = json.dumps([search.filter.model_dump(mode="json", by_alias=True) if search.filter else None, search.sort], sort_keys=True)
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def encode_cursor(search: CatalogSearchInputSchema, sort_value: Any, uid: uuid.UUID) -> str:
+    payload = json.dumps([search_fingerprint(search), sort_value, str(uid)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
 
-    return response_data
\ No newline at end of file
+
+def decode_cursor(search: CatalogSearchInputSchema) -> Tuple[Any, uuid.UUID]:
+    """
+    The (sort value, uid) position of the search's cursor.
+    Raises HTTPException for malformed cursors and cursors of another search.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(search.cursor + "=" * (-len(search.cursor) % 4))
+        fingerprint, sort_value, uid = json.loads(payload)
+        position = (sort_value, uuid.UUID(uid))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    if fingerprint != search_fingerprint(search):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The cursor belongs to a search with a different filter or sort.",
+        )
+    return position
+
+
+def query_catalog_search(
+    session: Session,
+    search: CatalogSearchInputSchema,
+    sort: SortOptions | PropertySort,
+    after: Optional[Tuple[Any, uuid.UUID]],
+    projection: ProductProjection,
+) -> CatalogSearchOutputSchema:
+    """
+    Runs the count and the keyset page query of a validated search, on every shard.
+    """
+    def build_query(shard_session: Session) -> select:
+        query = select(Product)
+        if search.filter is not None:
+            query = FilterCompiler(shard_session, search.filter).apply(query)
+        return query
+
+    # one row more than the page tells whether there is a next page
+    total_count, candidates = gather_candidates(session, build_query, sort, search.page_size + 1, after)
+    page = candidates[:search.page_size]
+    next_cursor = None
+    if len(candidates) > search.page_size:
+        last_uid, last_value, _ = page[-1]
+        next_cursor = encode_cursor(search, None if sort == SortOptions.UID else last_value, last_uid)
+    return CatalogSearchOutputSchema(
+        products=load_candidate_products(session, page, projection),
+        count=total_count,
+        next_cursor=next_cursor,
+    )
+
+
+@catalog_router.get("/suggest", response_model=CatalogSuggestOutputSchema)
+async def get_catalog_suggestions(
+    prefix: str = Query(..., min_length=1, max_length=255, description="Start of the product name (case-insensitive)."),
+    limit: int = Query(5, ge=1, le=50, description="Maximum number of suggestions."),
+    admission: Optional[Admission] = Depends(admission_slot("catalog", acquire=False)),
+    session: Session = Depends(get_session),
+):
+    """
+    Autocomplete for product names: products whose name starts with the prefix.
+    Served from the in-process name index, see src/services/name_index.py.
+    """
+    from src.services.name_index import fold, get_product_name_index, suggest_query
+    if settings.SUGGEST_INDEX_ENABLED:
+        index = get_product_name_index()
+        if index.ready:
+            return CatalogSuggestOutputSchema(suggestions=[
+                ProductSuggestionSchema(uid=uid, name=name) for uid, name in index.suggest(prefix, limit)
+            ])
+
+    # the index is disabled or still loading; only this path needs a slot
+    query = suggest_query(prefix, limit, session.get_bind().dialect.name)
+    if admission is None:
+        shard_rows = scatter(session, lambda shard_session: shard_session.execute(query).all())
+    else:
+        async with admission.slot():
+            shard_rows = scatter(session, lambda shard_session: shard_session.execute(query).all())
+    rows = shard_rows[0]
+    if len(shard_rows) > 1:
+        rows = sorted((row for rows in shard_rows for row in rows), key=lambda row: (fold(row.name), row.uid))[:limit]
+    return CatalogSuggestOutputSchema(suggestions=[ProductSuggestionSchema(uid=row.uid, name=row.name) for row in rows])
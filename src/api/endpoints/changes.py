@@ -0,0 +1,72 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from src.api.deps import require_database
+from src.core.config import settings
+from src.db.base import get_session
+from src.db.deadline import set_deadline
+from src.db.sharding import sharding_enabled
+from src.repositories import ChangeRepository
+from src.schemas import CatalogChangesOutputSchema
+from src.services.change_notifier import get_change_notifier
+
+changes_router = APIRouter(prefix="/changes", tags=["Changes"], dependencies=[Depends(require_database)])
+
+
+@changes_router.get(
+    "/", response_model=CatalogChangesOutputSchema, status_code=status.HTTP_200_OK
+)
+async def get_changes(
+    session: Session = Depends(get_session),
+    since: int = Query(0, ge=0, description="Return changes with a sequence number greater than this; 0 starts at the horizon."),
+    limit: int = Query(100, ge=1, description="Maximum number of changes to return."),
+    wait: float = Query(0, ge=0, description="Seconds to wait for new changes when there are none (long poll)."),
+):
+    """
+    Get catalog changes after a sequence number.
+    Returns 410 if changes after `since` were already removed by retention;
+    the consumer then has to re-crawl /catalog/ and resume from `latest`.
+    A new consumer starts with since=0, which is never rejected: it gets the
+    retained changes. Replaying them rebuilds the catalog only while `horizon`
+    is 0; otherwise the consumer crawls /catalog/ and continues from the
+    `latest` of that first response.
+    """
+    if not settings.CHANGES_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The change feed is disabled.",
+        )
+    if sharding_enabled():
+        # every shard numbers its own changes, there is no single sequence to resume from
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="The change feed is not available on a sharded catalog.",
+        )
+    change_repo = ChangeRepository(session)
+    horizon = change_repo.get_horizon()
+    if 0 < since < horizon:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Changes after this sequence number are no longer retained, resync from /catalog/.",
+        )
+    limit = min(limit, settings.CHANGES_MAX_LIMIT)
+    deadline = time.monotonic() + min(wait, settings.CHANGES_MAX_WAIT_SECONDS)
+    if settings.REQUEST_DEADLINE_SECONDS:
+        # the long poll wait is not database work, the re-reads after it get a full budget
+        set_deadline(session, deadline + settings.REQUEST_DEADLINE_SECONDS)
+
+    changes = change_repo.get_changes(since, limit)
+    while not changes:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        session.rollback() # give the connection back to the pool while waiting
+        await get_change_notifier().wait(min(remaining, settings.CHANGES_POLL_SECONDS))
+        changes = change_repo.get_changes(since, limit)
+
+    return CatalogChangesOutputSchema(
+        changes=changes,
+        next_since=changes[-1].seq if changes else max(since, horizon),
+        latest=change_repo.get_latest_seq(),
+        horizon=horizon,
+    )
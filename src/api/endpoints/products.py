@@ -1,8 +1,28 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
 from uuid import UUID
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException, status
-from src.api.deps import get_product_repository, ProductRepository, get_session
-from src.schemas import ProductOutputSchema, ProductInputSchema
+from starlette.requests import QueryParams
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from src.api.deps import get_product_projection, ProductRepository, get_session, require_database
+from src.api.endpoints.catalog import build_filtered_product_query, parse_property_filters
+from src.core.config import settings
+from src.core.http_cache import make_etag, canonical_query, etag_matches, set_cache_headers, not_modified
+from src.core.result_cache import cached_response
+from src.core.admission import Admission, admission_slot
+from src.core.singleflight import coalesce
+from src.db.deadline import get_deadline
+from src.db.models import Product
+from src.db.sharding import all_shard_sessions, product_session, shard_index, shard_session, sharding_enabled
+from src.repositories import VersionRepository
+from src.schemas import ProductOutputSchema, ProductInputSchema, ProductProjection, ProductBulkDeleteInputSchema, ProductBulkDeleteOutputSchema
+from src.services.group_commit import get_group_committer
+from src.services.query_guard import check_filter_limits
+
+logger = logging.getLogger(__name__)
 
 products_router = APIRouter(prefix="/product", tags=["Products"])
 
@@ -12,12 +32,34 @@ products_router = APIRouter(prefix="/product", tags=["Products"])
 )
 async def get_product(
     uid: UUID,
-    product_repo: ProductRepository = Depends(get_product_repository),
+    request: Request,
+    response: Response,
+    admission: Optional[Admission] = Depends(admission_slot("product")),
+    session: Session = Depends(get_session),
+    projection: ProductProjection = Depends(get_product_projection),
 ):
     """
-    Get a product.
+    Get a product. `fields=` and `properties=` limit what is loaded and returned.
     """
-    product = product_repo.get_product(uid)
+    product_repo = ProductRepository(product_session(session, uid))
+    version = VersionRepository(product_repo.db).get_product_version(uid)
+    etag = None
+    if version is not None:
+        etag = make_etag("product", uid, version)
+        if not projection.is_full: # each projection is its own representation
+            etag = make_etag("product", uid, version, canonical_query(request.query_params))
+        if etag_matches(request, etag):
+            return not_modified(etag, settings.CACHE_CONTROL_PRODUCT)
+        set_cache_headers(response, etag, settings.CACHE_CONTROL_PRODUCT)
+
+    # identical concurrent requests share one read, see src/core/singleflight.py; versioned
+    # products are shared between workers, see src/core/result_cache.py
+    product = await cached_response(etag, response, lambda: coalesce(
+        ("product", uid, version, canonical_query(request.query_params)),
+        lambda: product_repo.get_product(uid, projection),
+        product_repo.db,
+        admission,
+    ))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -27,36 +69,169 @@ async def get_product(
 
 
 @products_router.post(
-    "/", response_model=ProductOutputSchema, status_code=status.HTTP_201_CREATED
+    "/bulk-delete", response_model=ProductBulkDeleteOutputSchema, status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_database)],
+)
+def bulk_delete_products(
+    request: Request,
+    products: Optional[ProductBulkDeleteInputSchema] = None,
+    name: Optional[str] = Query(None, description="Substring search for product name (case-insensitive), as on /catalog/."),
+    dry_run: bool = Query(False, description="Only count the products that would be deleted."),
+    session: Session = Depends(get_session),
+):
+    """
+    Delete many products: the ones listed in the body's `uids`, or, without a body,
+    the ones matching `name` and `property_*` filters as on /catalog/.
+    Products are deleted and committed in batches of PRODUCT_BULK_DELETE_BATCH_SIZE;
+    when the request deadline cuts a delete short, the committed batches stay
+    deleted and repeating the request deletes the rest.
+    A plain function, so FastAPI runs the batches in its threadpool instead of
+    blocking the event loop until the last one is committed.
+    """
+    allowed_keys = {"name", "dry_run"}
+    for key in request.query_params.keys():
+        if not key.startswith("property_") and key not in allowed_keys:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid query parameter '{key}'. Allowed parameters are 'name', 'dry_run', and 'property_*' filters.",
+            )
+    has_filters = bool(name) or bool(parse_property_filters(request.query_params))
+    if products is not None and has_filters:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass either 'uids' or filters, not both.",
+        )
+    if products is None and not has_filters:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass 'uids' or at least one filter; deleting the whole catalog is not supported.",
+        )
+    check_filter_limits(parse_property_filters(request.query_params))
+
+    batch_size = settings.PRODUCT_BULK_DELETE_BATCH_SIZE
+    sources = bulk_delete_sources(session, products.uids if products else None, name, request.query_params, batch_size)
+    return delete_in_batches(sources, batch_size, dry_run)
+
+
+def bulk_delete_sources(
+    session: Session,
+    uids: Optional[List[UUID]],
+    name: Optional[str],
+    query_params: QueryParams,
+    batch_size: int,
+) -> List[Tuple[Session, select]]:
+    """
+    The products to delete as (shard session, product query) pairs: the UIDs in
+    chunks of batch_size per shard, or the filtered products of every shard.
+    Raises HTTPException for filters on properties that do not exist.
+    """
+    if uids is None:
+        return [(shard, build_filtered_product_query(shard, name, query_params)) for shard in all_shard_sessions(session)]
+    shard_uids = {}
+    for uid in sorted(set(uids)):
+        shard_uids.setdefault(shard_index(uid), []).append(uid)
+    return [
+        (shard_session(session, index), select(Product).where(Product.uid.in_(chunk[start:start + batch_size])))
+        for index, chunk in sorted(shard_uids.items())
+        for start in range(0, len(chunk), batch_size)
+    ]
+
+
+def delete_in_batches(sources: List[Tuple[Session, select]], batch_size: int, dry_run: bool) -> ProductBulkDeleteOutputSchema:
+    """
+    Counts the products of each source, then, unless dry_run, deletes them in UID
+    order, one set-based DELETE and commit per batch, logging the progress.
+    """
+    matched = sum(
+        shard.execute(select(func.count()).select_from(query.subquery())).scalar_one()
+        for shard, query in sources
+    )
+    if dry_run:
+        return ProductBulkDeleteOutputSchema(matched=matched, deleted=0, batches=0, dry_run=True)
+
+    deleted = batches = 0
+    for shard, query in sources:
+        last_uid = None
+        while True:
+            batch_query = query.with_only_columns(Product.uid).order_by(Product.uid).limit(batch_size)
+            if last_uid is not None:
+                batch_query = batch_query.where(Product.uid > last_uid)
+            batch_uids = shard.execute(batch_query).scalars().all()
+            if not batch_uids:
+                break
+            deleted += len(ProductRepository(shard).delete_products(batch_uids))
+            shard.commit()
+            batches += 1
+            last_uid = batch_uids[-1]
+            logger.info("Bulk delete: %d of %d products deleted in %d batches", deleted, matched, batches)
+    return ProductBulkDeleteOutputSchema(matched=matched, deleted=deleted, batches=batches, dry_run=False)
+
+
+@products_router.post(
+    "/", response_model=ProductOutputSchema, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_database)],
 )
 async def create_product(
     product: ProductInputSchema,
-    product_repo: ProductRepository = Depends(get_product_repository),
     session: Session = Depends(get_session),
 ):
     """
     Create a new product.
     """
-    product_db = product_repo.create_product(product)
+    # the group committer writes to the primary database only; a failed batch is retried one by one
+    if settings.GROUP_COMMIT_ENABLED and not sharding_enabled():
+        return await asyncio.wrap_future(get_group_committer().submit(
+            lambda batch_session: ProductRepository(batch_session).create_product(product),
+            get_deadline(session),
+        ))
+
+    shard = product_session(session, product.uid)
+    try:
+        product_db = ProductRepository(shard).create_product(product)
+    except HTTPException as error:
+        if not isinstance(error.__cause__, IntegrityError):
+            raise
+        # property metadata cached by this worker was stale (src/services/property_metadata.py)
+        # and has been dropped; the retry validates against the database
+        shard.rollback()
+        product_db = ProductRepository(shard).create_product(product)
     if not product_db:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Product creation failed",
         )
-    session.commit()
+    shard.commit()
+    return product_db
+
+
+@products_router.put(
+    "/{uid}", response_model=ProductOutputSchema, status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_database)],
+)
+async def update_product(
+    uid: UUID,
+    product: ProductInputSchema,
+    session: Session = Depends(get_session),
+):
+    """
+    Replace a product's name and property values.
+    """
+    shard = product_session(session, uid)
+    product_db = ProductRepository(shard).update_product(uid, product)
+    shard.commit()
     return product_db
 
 @products_router.delete(
-    "/{uid}", status_code=status.HTTP_200_OK
+    "/{uid}", status_code=status.HTTP_200_OK, dependencies=[Depends(require_database)]
 )
 async def delete_product(
     uid: UUID,
-    product_repo: ProductRepository = Depends(get_product_repository),
     session: Session = Depends(get_session),
 ):
     """
     Delete a product.
     """
-    product_repo.delete_product(uid)
-    session.commit()
+    shard = product_session(session, uid)
+    ProductRepository(shard).delete_product(uid)
+    shard.commit()
     return {"detail": "Product deleted successfully"}
\ No newline at end of file
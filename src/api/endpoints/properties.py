@@ -1,14 +1,16 @@
 from uuid import UUID
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException, status
-from src.api.deps import PropertyRepository, get_property_repository, get_session
+from src.api.deps import PropertyRepository, get_property_repository, get_session, require_database
+from src.db.sharding import all_shard_sessions, commit_shards, rollback_shards
 from src.schemas import PropertyInputSchema, PropertyOutputSchema
 
 property_router = APIRouter(prefix="/properties", tags=["Properties"])
 
 
 @property_router.post(
-    "/", response_model=PropertyOutputSchema, status_code=status.HTTP_201_CREATED
+    "/", response_model=PropertyOutputSchema, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_database)],
 )
 async def create_property(
     property_data: PropertyInputSchema,
@@ -16,30 +18,39 @@ async def create_property(
     property_repo: PropertyRepository = Depends(get_property_repository),
 ):
     """
-    Create a new property.
+    Create a new property, on every catalog shard with the same ids.
     """
     try:
         db_property = property_repo.create_property(property_data)
-        session.commit()
+        shards = all_shard_sessions(session)
+        if len(shards) > 1:
+            session.flush() # assigns the ids the other shards reuse
+            for shard in shards[1:]:
+                PropertyRepository(shard).copy_property(db_property)
+        commit_shards(session)
         session.refresh(db_property)
         return db_property
     except ValueError:
-        session.rollback()
+        rollback_shards(session)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Property or Value UID already exists.",
         )
 
 
-@property_router.delete("/{property_uid}", status_code=status.HTTP_200_OK)
+@property_router.delete("/{property_uid}", status_code=status.HTTP_200_OK, dependencies=[Depends(require_database)])
 async def delete_property(
     property_uid: UUID,
     session: Session = Depends(get_session),
     property_repo: PropertyRepository = Depends(get_property_repository),
 ):
     """
-    Delete a property by its UID.
+    Delete a property by its UID, on every catalog shard.
     """
     property_repo.delete_property(property_uid)
-    session.commit()
+    for shard in all_shard_sessions(session)[1:]:
+        shard_repo = PropertyRepository(shard)
+        if shard_repo.get_property_by_uid(property_uid): # shards a failed write left behind are skipped
+            shard_repo.delete_property(property_uid)
+    commit_shards(session)
     return {"message": "Property deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,24 @@
+from typing import Any, Dict
+from fastapi import APIRouter
+from src.core.admission import get_admission_controller
+from src.core.result_cache import get_result_cache
+from src.core.singleflight import get_single_flight
+from src.services.cache_warmer import get_cache_warmer
+
+stats_router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@stats_router.get("/", response_model=Dict[str, Any])
+async def get_stats():
+    """
+    Counters of this worker process: request coalescing (collapse_ratio is requests per
+    execution), admission control per cost class, the shared result cache (null when disabled)
+    and the cache warmer.
+    """
+    result_cache = get_result_cache()
+    return {
+        "singleflight": get_single_flight().stats.as_dict(),
+        "admission": get_admission_controller().stats(),
+        "result_cache": result_cache.stats.as_dict() if result_cache is not None else None,
+        "cache_warmer": get_cache_warmer().stats,
+    }
@@ -0,0 +1,103 @@
+"""
+Startup warmup run from the FastAPI lifespan, so the first requests a worker
+serves do not pay for connection setup, mapper configuration, SQL compilation
+or cold caches.
+"""
+import logging
+import time
+import uuid
+from sqlalchemy import select
+from sqlalchemy.orm import configure_mappers
+from src.core.config import settings
+from src.core.inprocess import inprocess_get
+from src.db.base import SessionLocal, get_read_engine
+from src.db.models import Property
+from src.schemas import PropertyTypeEnum, SortOptions
+
+logger = logging.getLogger(__name__)
+
+
+def open_pool_connections():
+    """
+    Checks out pool_size connections at once and returns them to the pool idle.
+    """
+    engine = get_read_engine()
+    connections = []
+    try:
+        for _ in range(settings.DB_POOL_SIZE):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+async def warm_statements(app):
+    """
+    Runs the common catalog, filter and product requests once each through the
+    app, so the compiled forms of their statements land in the engine's compiled
+    cache. With a shared result cache, a response another worker already stored
+    is served from it instead.
+    """
+    with SessionLocal() as session:
+        properties = session.execute(select(Property.uid, Property.type)).all()
+    filters = [""]
+    int_property = next((row.uid for row in properties if row.type == PropertyTypeEnum.INT), None)
+    list_property = next((row.uid for row in properties if row.type == PropertyTypeEnum.LIST), None)
+    if int_property:
+        filters.append(f"property_{int_property}_from=0&property_{int_property}_to=0")
+    if list_property:
+        filters.append(f"property_{list_property}={uuid.UUID(int=0)}")
+
+    requests = []
+    for query_string in filters:
+        for sort in SortOptions:
+            requests.append(("/catalog/", "&".join(filter(None, [query_string, "page_size=1", f"sort={sort.value}"]))))
+        requests.append(("/catalog/filter/", query_string))
+    requests.append((f"/product/{uuid.UUID(int=0)}", ""))
+    for path, query_string in requests:
+        status = await inprocess_get(app, path, query_string)
+        if status is None or status >= 500:
+            logger.warning("Warmup request %s?%s returned %s", path, query_string, status)
+
+
+def prime_caches():
+    """
+    Loads in-process caches that would otherwise be built by the first request.
+    """
+    if settings.SUGGEST_INDEX_ENABLED:
+        from src.services.name_index import get_product_name_index
+        get_product_name_index() # starts loading in the background
+    if settings.FILTER_PLANNER != "off":
+        from src.services.filter_planner import get_filter_statistics
+        get_filter_statistics().refresh_if_stale() # starts loading in the background
+    if settings.CATALOG_ENGINE_ENABLED:
+        from src.services.catalog_engine import get_catalog_engine
+        engine = get_catalog_engine()
+        if settings.CATALOG_SNAPSHOT_DIR:
+            engine.current()
+        else:
+            engine.refresh()
+
+
+async def warmup(app):
+    """
+    Runs all warmup steps; failures are logged and do not prevent startup.
+    """
+    started = time.perf_counter()
+    steps = [
+        ("configure mappers", configure_mappers),
+        ("open pool connections", open_pool_connections),
+        ("warm statements", lambda: warm_statements(app)),
+        ("prime caches", prime_caches),
+    ]
+    for label, step in steps:
+        step_started = time.perf_counter()
+        try:
+            result = step()
+            if hasattr(result, "__await__"):
+                await result
+        except Exception:
+            logger.exception("Warmup step '%s' failed", label)
+            continue
+        logger.info("Warmup step '%s' took %.1f ms", label, (time.perf_counter() - step_started) * 1000)
+    logger.info("Warmup finished in %.1f ms", (time.perf_counter() - started) * 1000)
@@ -0,0 +1,238 @@
+"""
+Admission control in front of the database pool.
+
+Reads are admitted per cost class (catalog filter statistics > catalog pages >
+single product reads). Each class has a concurrency limit and a bounded wait
+queue; when both are full, or a request waited longer than the queue timeout,
+it is rejected right away with 503 and Retry-After instead of piling up on
+pool checkouts. The limits of the expensive classes adapt to the observed
+database statement latency (AIMD): while the latency average is above the
+target they shrink multiplicatively, otherwise they grow back by one. The
+cheap product class keeps a fixed limit, so product reads keep their latency
+when the expensive ones are throttled. The sum of the class limits should stay
+below DB_POOL_SIZE + DB_MAX_OVERFLOW.
+
+Endpoints take their slot with the admission_slot() dependency, declared ahead
+of get_session, so a rejected request never checks out a pool connection, not
+even for the ETag version lookup. The slot is handed to coalesce(), which
+gives it back as soon as the request turns out to be a single-flight follower.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.core.config import settings
+
+# weight of the newest statement in the latency average
+LATENCY_EWMA_ALPHA = 0.1
+DECREASE_FACTOR = 0.75
+
+
+@dataclass
+class CostClass:
+    name: str
+    max_limit: int
+    min_limit: int
+    limit: int = 0
+    in_flight: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+    admitted: int = 0
+    rejected: int = 0
+
+    def __post_init__(self):
+        self.limit = self.max_limit
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    """
+    Per-process admission state. Slots are taken and released on the event loop;
+    statement latencies are reported from any thread.
+    """
+
+    def __init__(
+        self,
+        classes: Dict[str, CostClass],
+        queue_size: int,
+        queue_timeout_seconds: float,
+        latency_target_seconds: float,
+        adjust_seconds: float,
+        retry_after_seconds: int,
+    ):
+        self.classes = classes
+        self.queue_size = queue_size
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.latency_target_seconds = latency_target_seconds
+        self.adjust_seconds = adjust_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.db_latency = 0.0
+        self._latency_lock = threading.Lock()
+        self._adjusted_at = 0.0
+
+    async def acquire(self, cost: CostClass):
+        if cost.in_flight < cost.limit and not cost.waiters:
+            cost.in_flight += 1
+            cost.admitted += 1
+            return
+        if len(cost.waiters) >= self.queue_size:
+            self._reject(cost)
+        waiter = asyncio.get_running_loop().create_future()
+        cost.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            if waiter.cancelled() or not waiter.done():
+                self._reject(cost)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(cost) # the slot was handed over as this request was cancelled
+            raise
+        finally:
+            if waiter in cost.waiters:
+                cost.waiters.remove(waiter)
+        cost.admitted += 1
+
+    def release(self, cost: CostClass):
+        cost.in_flight -= 1
+        self._adjust()
+        self._wake(cost)
+
+    def observe_db_latency(self, seconds: float):
+        with self._latency_lock:
+            self.db_latency += LATENCY_EWMA_ALPHA * (seconds - self.db_latency)
+
+    def _reject(self, cost: CostClass):
+        cost.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The server is at capacity, retry later.",
+            headers={"Retry-After": str(self.retry_after_seconds)},
+        )
+
+    def _wake(self, cost: CostClass):
+        # a woken waiter owns the slot from here on, even before it runs again
+        while cost.waiters and cost.in_flight < cost.limit:
+            waiter = cost.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                cost.in_flight += 1
+
+    def _adjust(self):
+        now = time.monotonic()
+        if now - self._adjusted_at < self.adjust_seconds:
+            return
+        self._adjusted_at = now
+        overloaded = self.db_latency > self.latency_target_seconds
+        for cost in self.classes.values():
+            if overloaded:
+                cost.limit = max(cost.min_limit, int(cost.limit * DECREASE_FACTOR))
+            elif cost.limit < cost.max_limit:
+                cost.limit += 1
+                self._wake(cost)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "db_latency_ms": round(self.db_latency * 1000, 3),
+            "classes": {name: cost.as_dict() for name, cost in self.classes.items()},
+        }
+
+
+class Admission:
+    """
+    A slot of a cost class held by one request. Released once, by whichever of the
+    request's steps finishes with it first; slot() takes it again after that.
+    """
+
+    def __init__(self, controller: AdmissionController, cost: CostClass):
+        self.controller = controller
+        self.cost = cost
+        self.held = False
+
+    async def acquire(self):
+        if not self.held:
+            await self.controller.acquire(self.cost)
+            self.held = True
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self.controller.release(self.cost)
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Holds the slot for the duration of the block, taking it again if it was released.
+        """
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        classes={
+            "catalog_filter": CostClass("catalog_filter", settings.ADMISSION_CATALOG_FILTER_LIMIT, 1),
+            "catalog": CostClass("catalog", settings.ADMISSION_CATALOG_LIMIT, 1),
+            "product": CostClass("product", settings.ADMISSION_PRODUCT_LIMIT, settings.ADMISSION_PRODUCT_LIMIT),
+        },
+        queue_size=settings.ADMISSION_QUEUE_SIZE,
+        queue_timeout_seconds=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        latency_target_seconds=settings.ADMISSION_DB_LATENCY_TARGET_MS / 1000,
+        adjust_seconds=settings.ADMISSION_ADJUST_SECONDS,
+        retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
+
+def admission_slot(cost_class: str, acquire: bool = True) -> Callable[[], AsyncIterator[Optional[Admission]]]:
+    """
+    Dependency taking a slot of the cost class in the process-wide controller
+    before the endpoint runs; yields None when admission control is disabled.
+    Raises HTTPException(503) when the class is saturated. With acquire=False the
+    ticket is yielded without a slot, for endpoints that only sometimes reach the
+    database and take it with slot() when they do.
+    """
+    async def dependency() -> AsyncIterator[Optional[Admission]]:
+        if not settings.ADMISSION_ENABLED:
+            yield None
+            return
+        controller = get_admission_controller()
+        admission = Admission(controller, controller.classes[cost_class])
+        if acquire:
+            await admission.acquire()
+        try:
+            yield admission
+        finally:
+            admission.release()
+
+    return dependency
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._admission_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_admission_started", None)
+    if started is not None and settings.ADMISSION_ENABLED:
+        get_admission_controller().observe_db_latency(time.perf_counter() - started)
@@ -0,0 +1,251 @@
+"""
+Content-negotiated response compression (zstd, brotli, gzip).
+
+Bodies below a size threshold are sent as is. Streaming responses are
+compressed chunk by chunk with a sync flush after each chunk, so consumers of
+exported streams still receive data as it is produced. Chunks above a size
+threshold are compressed in a worker thread to keep the event loop free.
+Every response carries Vary: Accept-Encoding, including 304s and responses sent
+as is (small, not compressible, or to clients that accept no encoding we offer),
+so caches never hand one client's representation to another. For the same
+reason a strong ETag is sent weak (W/"...") on every response to a client that
+negotiated an encoding, 304s and responses sent as is included: the validator
+then stays the same whether or not a body was compressed.
+brotli and zstandard are optional dependencies; encodings whose module is
+missing are simply not offered.
+"""
+import zlib
+from typing import Dict, List, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.core.config import settings
+
+try:
+    import brotli
+except ImportError: # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError: # optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "application/xml")
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31) # 31 = gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+COMPRESSORS = {
+    "zstd": ZstdCompressor if zstandard else None,
+    "br": BrotliCompressor if brotli else None,
+    "gzip": GzipCompressor,
+}
+
+
+def available_encodings(preference: List[str]) -> List[str]:
+    return [encoding for encoding in preference if COMPRESSORS.get(encoding)]
+
+
+def negotiate_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """
+    Picks the encoding with the highest q-value from Accept-Encoding; ties go to
+    the server preference order in `supported`. Returns None for identity.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best: Tuple[float, int, Optional[str]] = (0.0, 0, None)
+    for rank, encoding in enumerate(supported):
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0 and (q, -rank) > best[:2]:
+            best = (q, -rank, encoding)
+    return best[2]
+
+
+def _varying(send: Send) -> Send:
+    """
+    Wraps send to add Vary: Accept-Encoding to a response that is sent as is.
+    """
+    async def send_varying(message: Message):
+        if message["type"] == "http.response.start":
+            MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+        await send(message)
+    return send_varying
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing compressible responses larger than `minimum_size`.
+    Arguments left as None are read from the COMPRESSION_* settings when the
+    middleware stack is built.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        levels: Optional[Dict[str, int]] = None,
+        preference: Optional[List[str]] = None,
+        thread_threshold: Optional[int] = None,
+    ):
+        self.app = app
+        self.enabled = settings.COMPRESSION_ENABLED
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.levels = {
+            "gzip": settings.COMPRESSION_GZIP_LEVEL,
+            "br": settings.COMPRESSION_BROTLI_LEVEL,
+            "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+            **(levels or {}),
+        }
+        if preference is None:
+            preference = [encoding.strip() for encoding in settings.COMPRESSION_ENCODINGS.split(",")]
+        self.encodings = available_encodings(preference)
+        self.thread_threshold = settings.COMPRESSION_THREAD_THRESHOLD if thread_threshold is None else thread_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, _varying(send))
+            return
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+        self.buffer = bytearray()
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            start_headers = MutableHeaders(scope=message)
+            start_headers.add_vary_header("Accept-Encoding")
+            etag = start_headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                start_headers["ETag"] = f"W/{etag}" # the compressed bytes differ from the strong representation
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                self.passthrough = True
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self.passthrough:
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            self.buffer += body
+            if len(self.buffer) < self.middleware.minimum_size:
+                if more_body:
+                    return # keep buffering until we know whether the threshold is reached
+                await self._flush_start()
+                await self._send({"type": "http.response.body", "body": bytes(self.buffer), "more_body": False})
+                return
+            body, self.buffer = bytes(self.buffer), bytearray()
+            self.compressor = COMPRESSORS[self.encoding](self.middleware.levels[self.encoding])
+            await self._flush_start(compressed=True, streaming=more_body, body=body)
+            return
+
+        compressed = await self._compress(body, finish=not more_body)
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    async def _compress(self, body: bytes, finish: bool) -> bytes:
+        def run() -> bytes:
+            data = self.compressor.compress(body)
+            return data + (self.compressor.finish() if finish else self.compressor.flush())
+        if len(body) >= self.middleware.thread_threshold:
+            return await anyio.to_thread.run_sync(run)
+        return run()
+
+    async def _flush_start(self, compressed: bool = False, streaming: bool = False, body: bytes = b""):
+        if self.start_message is None:
+            return
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=start["headers"])
+        if not compressed:
+            await self._send(start)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        if streaming:
+            del headers["Content-Length"]
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": await self._compress(body, finish=False), "more_body": True})
+            return
+        compressed_body = await self._compress(body, finish=True)
+        headers["Content-Length"] = str(len(compressed_body))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": compressed_body, "more_body": False})
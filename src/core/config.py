@@ -1,4 +1,6 @@
 import os
+from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,6 +10,166 @@ class Settings(BaseSettings):
         extra='ignore'
     )
 
-    DATABASE_URL: str
+    DATABASE_URL: Optional[str] = None # not needed on READ_BACKEND=snapshot read nodes
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = False
+    # Enable partitionwise aggregation/joins for the partitioned product_property_values (PostgreSQL)
+    DB_PARTITIONWISE: bool = True
+    # Shard products and their property values by product UID across DATABASE_URL (shard 0) and these
+    # comma-separated database URLs (shards 1..N, src/db/sharding.py); properties and list values are
+    # replicated to every shard. Shard membership is fixed, run src.scripts.shard_catalog after changing it
+    CATALOG_SHARD_URLS: Optional[str] = None
+    CATALOG_SHARD_WORKERS: int = 16
 
-settings = Settings()
\ No newline at end of file
+    # 'database', or 'snapshot' to serve catalog and product reads from the SQLite file published
+    # by src.scripts.export_catalog_snapshot in READ_SNAPSHOT_DIR; writes then get 503
+    READ_BACKEND: str = "database"
+    READ_SNAPSHOT_DIR: Optional[str] = None
+    READ_SNAPSHOT_CHECK_SECONDS: float = 1.0
+
+    # Run src.api.warmup before the worker starts serving
+    WARMUP_ENABLED: bool = True
+
+    # Cache-Control header per route, sent with the ETag; empty disables the header
+    CACHE_CONTROL_CATALOG: str = "public, max-age=0, must-revalidate"
+    CACHE_CONTROL_CATALOG_FILTER: str = "public, max-age=0, must-revalidate"
+    CACHE_CONTROL_PRODUCT: str = "public, max-age=0, must-revalidate"
+
+    # Negotiated response compression; encodings in server preference order,
+    # br and zstd are only offered when brotli / zstandard are installed
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_THREAD_THRESHOLD: int = 256 * 1024
+
+    # Catalog filter planning: 'auto', 'off' (query-string order, EXISTS) or a forced
+    # strategy 'exists' / 'driving' / 'intersect'; statistics from 'facets' or 'pg_stats'
+    FILTER_PLANNER: str = "auto"
+    FILTER_PLANNER_DRIVING_FRACTION: float = 0.01
+    FILTER_STATS_SOURCE: str = "facets"
+    FILTER_STATS_TTL_SECONDS: float = 300.0
+
+    # Guardrails: time budget for a request's database work (applied as statement_timeout on
+    # PostgreSQL, 504 when exceeded; empty disables), filter counts per catalog request, and an
+    # optional planner cost ceiling for catalog queries (EXPLAIN before running, PostgreSQL);
+    # /catalog/search counts every predicate of its filter tree as a filter and limits the nesting
+    REQUEST_DEADLINE_SECONDS: Optional[float] = 10.0
+    CATALOG_MAX_FILTERS: int = 20
+    CATALOG_MAX_LIST_VALUES: int = 100
+    CATALOG_SEARCH_MAX_DEPTH: int = 8
+    CATALOG_MAX_QUERY_COST: Optional[float] = None
+
+    # Run the independent queries of a catalog request (count and page, count and facet statistics)
+    # concurrently on separate connections sharing one exported snapshot (PostgreSQL, src/db/parallel.py);
+    # each request then holds one connection per query
+    CATALOG_PARALLEL_QUERIES: bool = False
+    CATALOG_PARALLEL_WORKERS: int = 16
+
+    # Coalesce identical concurrent /catalog/, /catalog/filter/ and /product/{uid} reads into one
+    # execution; requests join a running execution for at most SINGLEFLIGHT_TIMEOUT_SECONDS
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_TIMEOUT_SECONDS: float = 5.0
+
+    # Shared response cache for /catalog/, /catalog/filter/ and /product/{uid} across worker
+    # processes (src/core/result_cache.py): 'none', 'redis' (RESULT_CACHE_URL, any Redis-protocol
+    # server, e.g. src.scripts.cache_server locally) or 'disk' (RESULT_CACHE_DIR, a directory under
+    # /dev/shm by default). Keys carry the data version, entries just expire; bodies from
+    # RESULT_CACHE_COMPRESS_MIN_SIZE bytes are stored deflated. A miss is filled by one request
+    # across all workers (holding a lock for at most RESULT_CACHE_LOCK_SECONDS), the others wait
+    # up to RESULT_CACHE_WAIT_SECONDS for it; bump RESULT_CACHE_KEY_PREFIX when responses change shape
+    RESULT_CACHE_BACKEND: str = "none"
+    RESULT_CACHE_URL: str = "redis://localhost:6379/0"
+    RESULT_CACHE_DIR: Optional[str] = None
+    RESULT_CACHE_TTL_SECONDS: float = 300.0
+    RESULT_CACHE_KEY_PREFIX: str = "catalog:v1:"
+    RESULT_CACHE_COMPRESS_MIN_SIZE: int = 4096
+    RESULT_CACHE_TIMEOUT_SECONDS: float = 0.1
+    RESULT_CACHE_LOCK_SECONDS: float = 10.0
+    RESULT_CACHE_WAIT_SECONDS: float = 2.0
+
+    # Popular catalog queries (src/services/query_stats.py): /catalog/ and /catalog/filter/ query
+    # signatures are counted per worker in a count-min sketch whose top QUERY_STATS_TOP_K are added
+    # to catalog_query_stats every QUERY_STATS_FLUSH_SECONDS; signatures not seen for
+    # QUERY_STATS_RETENTION_HOURS are dropped
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_STATS_TOP_K: int = 100
+    QUERY_STATS_SKETCH_WIDTH: int = 4096
+    QUERY_STATS_SKETCH_DEPTH: int = 4
+    QUERY_STATS_FLUSH_SECONDS: float = 60.0
+    QUERY_STATS_RETENTION_HOURS: float = 24.0
+
+    # Re-run the CACHE_WARMER_TOP_K most popular catalog queries in the background after startup and,
+    # with a result cache, after writes once they paused for CACHE_WARMER_DEBOUNCE_SECONDS; one query
+    # at a time, CACHE_WARMER_PAUSE_MS apart and only while the pool and admission classes have room
+    CACHE_WARMER_ENABLED: bool = True
+    CACHE_WARMER_TOP_K: int = 50
+    CACHE_WARMER_DEBOUNCE_SECONDS: float = 2.0
+    CACHE_WARMER_PAUSE_MS: float = 50.0
+
+    # Admission control for reads (src/core/admission.py): concurrency limit per cost class, wait
+    # queue per class, and the statement latency above which the catalog limits shrink; the sum
+    # of the limits should stay below DB_POOL_SIZE + DB_MAX_OVERFLOW. Off by default: enabled, it caps
+    # the concurrent reads of every worker at these limits, so size them for the deployment first
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_CATALOG_FILTER_LIMIT: int = 2
+    ADMISSION_CATALOG_LIMIT: int = 4
+    ADMISSION_PRODUCT_LIMIT: int = 6
+    ADMISSION_QUEUE_SIZE: int = 64
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_DB_LATENCY_TARGET_MS: float = 50.0
+    ADMISSION_ADJUST_SECONDS: float = 1.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Create products with one statement validated against cached property metadata (PostgreSQL only)
+    PRODUCT_FAST_CREATE_ENABLED: bool = True
+    # Batch concurrent product creates into one transaction; a batch is committed once it has
+    # GROUP_COMMIT_MAX_BATCH creates or its first create waited GROUP_COMMIT_MAX_WAIT_MS
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_MAX_BATCH: int = 64
+    GROUP_COMMIT_MAX_WAIT_MS: float = 2.0
+    # Products deleted and committed per DELETE statement by /product/bulk-delete
+    PRODUCT_BULK_DELETE_BATCH_SIZE: int = 1000
+
+    # Change feed (/changes): whether catalog writes append to it, batch size cap, longest long-poll,
+    # how often a waiting request re-checks for changes committed by other processes, and retention
+    # used by src.scripts.compact_catalog_changes
+    CHANGES_ENABLED: bool = True
+    CHANGES_MAX_LIMIT: int = 1000
+    CHANGES_MAX_WAIT_SECONDS: float = 30.0
+    CHANGES_POLL_SECONDS: float = 1.0
+    CHANGES_RETENTION_DAYS: float = 7.0
+
+    # /catalog/suggest: serve from an in-process prefix index over product names (SQL otherwise),
+    # rebuilt every SUGGEST_INDEX_REFRESH_SECONDS to include writes made by other processes
+    SUGGEST_INDEX_ENABLED: bool = True
+    SUGGEST_INDEX_REFRESH_SECONDS: float = 60.0
+
+    # Serve product reads from the denormalized products.document column; writes keep the column
+    # current whether or not this is on, products without a document are read with joins
+    PRODUCT_DOCUMENTS_ENABLED: bool = False
+
+    # Evaluate catalog filters/sorting on an in-process NumPy snapshot (requires numpy)
+    CATALOG_ENGINE_ENABLED: bool = False
+    CATALOG_ENGINE_REFRESH_SECONDS: float = 30.0
+    # Map the shared snapshot written by src.scripts.build_catalog_snapshot instead of building one per worker
+    CATALOG_SNAPSHOT_DIR: Optional[str] = None
+    CATALOG_SNAPSHOT_CHECK_SECONDS: float = 1.0
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+class LazySettings:
+    """
+    Reads the environment on first attribute access instead of at import time.
+    """
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+
+settings = LazySettings()
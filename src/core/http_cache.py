@@ -0,0 +1,47 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+from starlette.datastructures import QueryParams
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a strong ETag from the data version(s) and whatever else selects the response.
+    """
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def canonical_query(query_params: QueryParams) -> str:
+    """
+    Query string with parameters sorted, so equivalent requests share an ETag.
+    """
+    return "&".join(f"{key}={value}" for key, value in sorted(query_params.multi_items()))
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Evaluates If-None-Match against the ETag (weak comparison, as RFC 9110 requires for GET).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: Optional[str]):
+    response.headers["ETag"] = etag
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: Optional[str]) -> Response:
+    """
+    Empty 304 response carrying the validators the client already has.
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, cache_control)
+    return response
@@ -0,0 +1,400 @@
+"""
+Response cache shared by all worker processes.
+
+Each uvicorn worker has its own memory, so an in-process cache is cold in
+every worker and its hit rate drops as workers are added. Rendered
+/catalog/, /catalog/filter/ and /product/{uid} responses are therefore kept
+in a shared backend instead:
+- 'redis': any server speaking the Redis protocol (RESP), through the small
+  client below; src.scripts.cache_server is a stand-in for local runs.
+- 'disk': one file per entry in a directory all workers on the host share,
+  /dev/shm (memory) by default, no external service needed.
+
+Entries are keyed by the response's ETag, which carries the catalog or
+product version; ProductRepository and PropertyRepository writes bump those
+versions in their transaction, so a write moves readers to new keys and the
+old entries simply expire after RESULT_CACHE_TTL_SECONDS. A product deleted
+and created again never repeats a version of the deleted one (see
+VersionRepository), so its entries are never served for the new product.
+
+Stampede protection: concurrent misses of one key in a process share one
+fill through SingleFlight; across processes the filling request holds a lock
+entry (set-if-absent with a TTL) and the others poll for the value for up to
+RESULT_CACHE_WAIT_SECONDS before computing it themselves.
+
+Cache failures are logged and counted, never raised: the request then runs
+as if the cache were disabled.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+import anyio
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from src.core.config import settings
+from src.core.singleflight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+# how often a request waiting for another process's fill looks for the value
+POLL_SECONDS = 0.01
+# first byte of a stored payload
+RAW, DEFLATED = b"r", b"z"
+
+
+class CacheError(Exception):
+    """A backend could not be reached or rejected a command."""
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    fills: int = 0 # responses computed and stored by this process
+    waits: int = 0 # misses served by another process's fill
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fills": self.fills,
+            "waits": self.waits,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class _RespConnection:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    def execute(self, *args) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheError("connection closed by the cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise CacheError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise CacheError("connection closed by the cache server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise CacheError(f"unexpected reply {line!r}")
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RedisCache:
+    """
+    Minimal RESP client for GET / SET PX [NX] / DEL with a pool of idle
+    connections, safe to use from worker threads.
+    URL format: redis://[:password@]host[:port][/db]
+    """
+    blocking = True # network round trips run in a worker thread
+
+    def __init__(self, url: str, timeout: float, max_idle: int = 8):
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"RESULT_CACHE_URL must be a redis:// URL, got '{url}'")
+        self.address = (parts.hostname or "localhost", parts.port or 6379)
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip("/") or 0)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: List[_RespConnection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> _RespConnection:
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = _RespConnection(sock)
+        if self.password:
+            connection.execute(b"AUTH", self.password)
+        if self.db:
+            connection.execute(b"SELECT", self.db)
+        return connection
+
+    def command(self, *args) -> Any:
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        try:
+            if connection is None:
+                connection = self._connect()
+            reply = connection.execute(*args)
+        except (OSError, ValueError, CacheError) as error:
+            # the connection may hold half a reply, never reuse it
+            if connection is not None:
+                connection.close()
+            raise CacheError(str(error) or type(error).__name__) from error
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                connection = None
+        if connection is not None:
+            connection.close()
+        return reply
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.command(b"GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.command(b"SET", key, value, b"PX", max(1, int(ttl * 1000)))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Sets the key only if it does not exist; True if it was set."""
+        return self.command(b"SET", key, value, b"PX", max(1, int(ttl * 1000)), b"NX") is not None
+
+    def delete(self, key: str):
+        self.command(b"DEL", key)
+
+
+class DiskCache:
+    """
+    One file per key, named by the key's hash, holding the expiry time and the
+    value; writes go through a temporary file and a rename, so readers in other
+    processes never see partial values. Expired files are removed when read
+    and by a sweep that runs at most every `sweep_seconds`.
+    """
+    blocking = False # local file system calls are cheap enough for the event loop
+    _header = struct.Struct(">d")
+
+    def __init__(self, directory: str, sweep_seconds: float = 60.0):
+        self.directory = directory
+        self.sweep_seconds = sweep_seconds
+        self._swept_at = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < self._header.size or self._header.unpack_from(data)[0] < time.time():
+            self._remove(path)
+            return None
+        return data[self._header.size:]
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._read(self._path(key))
+
+    def set(self, key: str, value: bytes, ttl: float):
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(self._header.pack(time.time() + ttl) + value)
+            os.replace(temporary, path)
+        except OSError:
+            self._remove(temporary)
+            raise
+        if time.monotonic() - self._swept_at > self.sweep_seconds:
+            self._swept_at = time.monotonic()
+            self.sweep()
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Creates the key only if it does not exist (or has expired); True if it was created."""
+        path = self._path(key)
+        for _ in range(2):
+            try:
+                descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                if self._read(path) is not None:
+                    return False
+                continue # it expired and was removed, try once more
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(self._header.pack(time.time() + ttl) + value)
+            return True
+        return False
+
+    def delete(self, key: str):
+        self._remove(self._path(key))
+
+    def sweep(self):
+        """Removes expired entries and temporary files left behind by killed workers."""
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".tmp"):
+                    if entry.stat().st_mtime < now - self.sweep_seconds:
+                        self._remove(entry.path)
+                    continue
+                with open(entry.path, "rb") as file:
+                    header = file.read(self._header.size)
+                if len(header) == self._header.size and self._header.unpack(header)[0] < now:
+                    self._remove(entry.path)
+            except OSError:
+                continue
+
+
+class ResultCache:
+    """
+    Stores rendered JSON responses in a backend, compressed above a size
+    threshold, and serves them back as responses.
+    """
+
+    def __init__(self, backend, ttl_seconds: float, key_prefix: str, compress_min_size: int,
+                 lock_seconds: float, wait_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.compress_min_size = compress_min_size
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self.stats = ResultCacheStats()
+
+    async def _call(self, method: Callable, *args) -> Any:
+        try:
+            if self.backend.blocking:
+                return await anyio.to_thread.run_sync(method, *args)
+            return method(*args)
+        except (CacheError, OSError) as error:
+            self.stats.errors += 1
+            logger.warning("Result cache %s failed: %s", method.__name__, error)
+            return None
+
+    def serialize(self, result: Any) -> bytes:
+        """The response body FastAPI would render for the result, with a compression marker."""
+        if isinstance(result, BaseModel):
+            body = result.model_dump_json(by_alias=True).encode()
+        else:
+            body = json.dumps(
+                jsonable_encoder(result), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+            ).encode()
+        if len(body) >= self.compress_min_size:
+            return DEFLATED + zlib.compress(body, 1)
+        return RAW + body
+
+    @staticmethod
+    def deserialize(payload: bytes) -> bytes:
+        marker, data = payload[:1], payload[1:]
+        return zlib.decompress(data) if marker == DEFLATED else data
+
+    async def lookup(self, key: str) -> Optional[bytes]:
+        """Raw payload stored under the key, None when missing or on errors."""
+        return await self._call(self.backend.get, self.key_prefix + key)
+
+    async def store(self, key: str, payload: bytes, ttl: float):
+        await self._call(self.backend.set, self.key_prefix + key, payload, ttl)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Optional[bytes]:
+        """
+        Rendered body for the key, computed by `compute` on a miss; None when
+        compute returns None (nothing is cached then).
+        """
+        key = self.key_prefix + key
+        payload = await self._call(self.backend.get, key)
+        if payload is not None:
+            self.stats.hits += 1
+            return self.deserialize(payload)
+        self.stats.misses += 1
+        return await get_single_flight().do(
+            ("result_cache", key), lambda: self._fill(key, compute), self.lock_seconds,
+        )
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Optional[bytes]:
+        lock_key = key + ":lock"
+        locked = await self._call(self.backend.add, lock_key, b"1", self.lock_seconds)
+        if locked is False:
+            # another process is filling the key; its value is usually there long before the wait ends
+            deadline = time.monotonic() + self.wait_seconds
+            while time.monotonic() < deadline:
+                await anyio.sleep(POLL_SECONDS)
+                payload = await self._call(self.backend.get, key)
+                if payload is not None:
+                    self.stats.waits += 1
+                    return self.deserialize(payload)
+        try:
+            result = await compute()
+            if result is None:
+                return None
+            payload = self.serialize(result)
+            await self._call(self.backend.set, key, payload, self.ttl_seconds)
+            self.stats.fills += 1
+            return self.deserialize(payload)
+        finally:
+            if locked:
+                await self._call(self.backend.delete, lock_key)
+
+
+@lru_cache
+def get_result_cache() -> Optional[ResultCache]:
+    if settings.RESULT_CACHE_BACKEND == "none":
+        return None
+    if settings.RESULT_CACHE_BACKEND == "redis":
+        backend = RedisCache(settings.RESULT_CACHE_URL, settings.RESULT_CACHE_TIMEOUT_SECONDS)
+    elif settings.RESULT_CACHE_BACKEND == "disk":
+        shared_memory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        backend = DiskCache(settings.RESULT_CACHE_DIR or os.path.join(shared_memory, "catalog-result-cache"))
+    else:
+        raise ValueError(f"Unknown RESULT_CACHE_BACKEND '{settings.RESULT_CACHE_BACKEND}', use 'none', 'redis' or 'disk'")
+    return ResultCache(
+        backend,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+        key_prefix=settings.RESULT_CACHE_KEY_PREFIX,
+        compress_min_size=settings.RESULT_CACHE_COMPRESS_MIN_SIZE,
+        lock_seconds=settings.RESULT_CACHE_LOCK_SECONDS,
+        wait_seconds=settings.RESULT_CACHE_WAIT_SECONDS,
+    )
+
+
+async def cached_response(etag: Optional[str], response: Response, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Serves the response for the ETag from the shared cache, filling it with
+    `compute` on a miss. Returns compute's result as is when the cache is
+    disabled or there is no ETag to key it by, and None when compute returns
+    None. Headers already set on `response` are carried over.
+    """
+    cache = get_result_cache()
+    if cache is None or etag is None:
+        return await compute()
+    body = await cache.get_or_compute(etag.strip('"'), compute)
+    if body is None:
+        return None
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
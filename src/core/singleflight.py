@@ -0,0 +1,151 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+During spikes many identical requests arrive within milliseconds. Keyed by
+their ETag (data version + canonical query), only the first one (the leader)
+runs the queries, in a worker thread so the event loop keeps accepting the
+others; every request with the same key that arrives while it runs (a
+follower) awaits the leader's result, or its exception. Nothing is kept once
+the leader finishes, so a newer data version always starts a new flight.
+
+A flight can be joined for `timeout` seconds after it started. Followers wait
+at most until then and run the query themselves if the leader is slower, so a
+stuck query never holds up more than one key's worth of requests for longer.
+"""
+import asyncio
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+import anyio
+from sqlalchemy.orm import Session
+from src.core.admission import Admission
+from src.core.config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    leaders: int = 0 # executions started for a new key
+    followers: int = 0 # requests served by another request's execution
+    timeouts: int = 0 # requests that gave up waiting for a flight and ran the query themselves
+    errors: int = 0 # leader executions that raised, the exception is shared with their followers
+
+    @property
+    def collapse_ratio(self) -> float:
+        """Requests per execution; 1.0 means nothing was coalesced."""
+        executions = self.leaders + self.timeouts
+        return (executions + self.followers) / executions if executions else 1.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "collapse_ratio": round(self.collapse_ratio, 3),
+        }
+
+
+@dataclass
+class _Flight:
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    deadline: float
+
+
+class SingleFlight:
+    """
+    Per-process registry of in-flight executions. Used from the event loop only.
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def joinable(self, key: Hashable) -> bool:
+        """
+        Whether do() for the key would join a running execution right now.
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        return flight is not None and flight.loop is loop and loop.time() < flight.deadline
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """
+        Returns the result of awaiting fn() for the key, unless an execution
+        for the same key is already in flight.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        flight = self._flights.get(key)
+        if self.joinable(key):
+            try:
+                result = await asyncio.wait_for(asyncio.shield(flight.future), flight.deadline - now)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                if not flight.future.cancelled():
+                    raise # this request was cancelled, not the leader
+            except BaseException:
+                self.stats.followers += 1
+                raise
+            else:
+                self.stats.followers += 1
+                return result
+            self.stats.timeouts += 1
+            return await fn()
+
+        flight = _Flight(loop, loop.create_future(), now + timeout)
+        # followers that time out never read the outcome; retrieve it so asyncio does not log it
+        flight.future.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self._flights[key] = flight
+        self.stats.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.future.cancel()
+            raise
+        except BaseException as error:
+            self.stats.errors += 1
+            flight.future.set_exception(error)
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+
+@lru_cache
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
+
+
+async def coalesce(key: Hashable, fn: Callable[[], T], session: Optional[Session] = None, admission: Optional[Admission] = None) -> T:
+    """
+    Runs a read in a worker thread, shared through the process-wide SingleFlight.
+    `admission` is the request's slot from the admission_slot() dependency
+    (src/core/admission.py): followers give it back before they wait, so only
+    executions hold one. Runs fn inline when both are disabled.
+    `session` is the request's session: its transaction is ended first, so requests
+    waiting for a flight or a slot do not hold on to pool connections (fn starts a new one).
+    """
+    if not settings.SINGLEFLIGHT_ENABLED and admission is None:
+        return fn()
+    if session is not None:
+        session.rollback()
+
+    async def execute() -> T:
+        if admission is None:
+            return await anyio.to_thread.run_sync(fn)
+        async with admission.slot():
+            return await anyio.to_thread.run_sync(fn)
+
+    if not settings.SINGLEFLIGHT_ENABLED:
+        return await execute()
+    flights = get_single_flight()
+    if admission is not None and flights.joinable(key):
+        admission.release()
+    return await flights.do(key, execute, settings.SINGLEFLIGHT_TIMEOUT_SECONDS)
@@ -1,16 +1,98 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, registry, sessionmaker
+import time
+from functools import lru_cache
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base, registry, sessionmaker
 from src.core.config import settings
+from src.db.deadline import set_deadline
 from typing import Generator
 
 Base: registry = declarative_base()
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+# Session.info key of the sessions a request session opened on the other shards
+SHARD_SESSIONS_KEY = "shard_sessions"
+
+
+def create_database_engine(url: str) -> Engine:
+    """
+    Engine with the pool and session settings every catalog database gets.
+    """
+    connect_args = {}
+    backend = make_url(url).get_backend_name()
+    if settings.DB_PARTITIONWISE and backend == "postgresql":
+        # lets facet GROUP BYs on property_id aggregate partition by partition
+        connect_args["options"] = "-c enable_partitionwise_aggregate=on -c enable_partitionwise_join=on"
+    engine = create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+    if backend == "sqlite":
+        event.listen(engine, "connect", _enable_foreign_keys)
+    return engine
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys unless asked per connection; without the ON DELETE CASCADEs the
+    # values of a deleted product would stay behind and pass to the next product reusing its id
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """
+    Creates the engine on first use rather than at import time.
+    """
+    if not settings.DATABASE_URL:
+        raise RuntimeError("DATABASE_URL is not set.")
+    return create_database_engine(settings.DATABASE_URL)
+
+
+def get_read_engine() -> Engine:
+    """
+    Engine that serves reads: the primary database, or the current snapshot
+    file when READ_BACKEND is 'snapshot'.
+    """
+    if settings.READ_BACKEND == "snapshot":
+        from src.db.read_snapshot import get_snapshot_engines
+        return get_snapshot_engines().current()
+    return get_engine()
+
+
+class LazySessionmaker(sessionmaker):
+    """
+    sessionmaker that binds to get_engine() when the first session is created.
+    In snapshot mode every session is bound to the engine of the current snapshot.
+    """
+    def __call__(self, **local_kw):
+        if settings.READ_BACKEND == "snapshot":
+            local_kw.setdefault("bind", get_read_engine())
+        elif self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker()
+
+
+def close_shard_sessions(session: Session):
+    """
+    Closes the sessions a session opened on the other catalog shards, see src/db/sharding.py.
+    """
+    for shard_session in session.info.pop(SHARD_SESSIONS_KEY, {}).values():
+        shard_session.close()
+
 
 def get_session() -> Generator:
     db = SessionLocal()
+    if settings.REQUEST_DEADLINE_SECONDS:
+        set_deadline(db, time.monotonic() + settings.REQUEST_DEADLINE_SECONDS)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        close_shard_sessions(db)
+        db.close()
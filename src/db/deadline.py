@@ -0,0 +1,60 @@
+"""
+End-to-end request deadlines for database work.
+
+get_session gives each request session a deadline. Whenever the session
+begins a transaction (sessions may begin several, e.g. after waiting for a
+coalesced read or an admission slot), the time left is applied on PostgreSQL
+as a transaction-scoped `SET LOCAL statement_timeout`. A statement running
+past the deadline is cancelled by the server, and a transaction begun after
+the deadline fails right away; both surface as DeadlineExceeded (504).
+"""
+import time
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+_DEADLINE_KEY = "deadline"
+# SQLSTATE query_canceled, raised when statement_timeout fires
+QUERY_CANCELED = "57014"
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time for database work."""
+
+
+def set_deadline(session: Session, deadline: Optional[float]):
+    """
+    Sets the session's deadline as a time.monotonic() value, or removes it with None.
+    Applies from the next transaction the session begins.
+    """
+    if deadline is None:
+        session.info.pop(_DEADLINE_KEY, None)
+    else:
+        session.info[_DEADLINE_KEY] = deadline
+
+
+def get_deadline(session: Session) -> Optional[float]:
+    return session.info.get(_DEADLINE_KEY)
+
+
+def is_deadline_error(error: BaseException) -> bool:
+    """
+    True for DeadlineExceeded and for statements cancelled by statement_timeout.
+    """
+    if isinstance(error, DeadlineExceeded):
+        return True
+    return isinstance(error, DBAPIError) and getattr(error.orig, "pgcode", None) == QUERY_CANCELED
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, transaction, connection):
+    deadline = session.info.get(_DEADLINE_KEY)
+    if deadline is None:
+        return
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        raise DeadlineExceeded("Request deadline exceeded before the query started.")
+    if connection.dialect.name == "postgresql":
+        # SET LOCAL ends with the transaction, pooled connections keep the server default
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
@@ -0,0 +1,103 @@
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, List, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_SESSION_KEY = "catalog_changes"
+
+
+@dataclass
+class CatalogChanges:
+    """Catalog entities written by one committed transaction."""
+    products: Set[uuid.UUID] = field(default_factory=set)
+    deleted_products: Set[uuid.UUID] = field(default_factory=set)
+    properties: Set[uuid.UUID] = field(default_factory=set)
+    deleted_properties: Set[uuid.UUID] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.products or self.deleted_products or self.properties or self.deleted_properties)
+
+
+CatalogChangeListener = Callable[[CatalogChanges], None]
+CatalogCommitHook = Callable[[Session, CatalogChanges], None]
+_listeners: List[CatalogChangeListener] = []
+_before_commit_hooks: List[CatalogCommitHook] = []
+
+
+def on_catalog_commit(listener: CatalogChangeListener) -> CatalogChangeListener:
+    """
+    Registers a listener called after a transaction that changed catalog data commits.
+    Can be used as a decorator.
+    """
+    _listeners.append(listener)
+    return listener
+
+
+def before_catalog_commit(hook: CatalogCommitHook) -> CatalogCommitHook:
+    """
+    Registers a hook called with the session and its changes right before a
+    transaction that changed catalog data commits, to write derived data in
+    the same transaction. Exceptions abort the commit. Can be used as a decorator.
+    """
+    _before_commit_hooks.append(hook)
+    return hook
+
+
+def _changes(session: Session) -> CatalogChanges:
+    return session.info.setdefault(_SESSION_KEY, CatalogChanges())
+
+
+def record_product_change(session: Session, product_uid: uuid.UUID, deleted: bool = False):
+    """
+    Marks a product as created/updated (or deleted) in the session's current transaction.
+    """
+    changes = _changes(session)
+    if deleted:
+        changes.products.discard(product_uid)
+        changes.deleted_products.add(product_uid)
+    else:
+        changes.deleted_products.discard(product_uid)
+        changes.products.add(product_uid)
+
+
+def record_property_change(session: Session, property_uid: uuid.UUID, deleted: bool = False):
+    """
+    Marks a property (and its list values) as created (or deleted) in the session's current transaction.
+    """
+    changes = _changes(session)
+    if deleted:
+        changes.properties.discard(property_uid)
+        changes.deleted_properties.add(property_uid)
+    else:
+        changes.deleted_properties.discard(property_uid)
+        changes.properties.add(property_uid)
+
+
+@event.listens_for(Session, "before_commit")
+def _run_before_commit_hooks(session: Session):
+    changes = session.info.get(_SESSION_KEY)
+    if not changes:
+        return
+    for hook in _before_commit_hooks:
+        hook(session, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_catalog_changes(session: Session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes is None:
+        return
+    for listener in _listeners:
+        try:
+            listener(changes)
+        except Exception:
+            logger.exception("Catalog change listener %r failed", listener)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_changes(session: Session):
+    session.info.pop(_SESSION_KEY, None)
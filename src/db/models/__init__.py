@@ -1,4 +1,8 @@
 from .product import Product
 from .properties import Property
 from .properties_list_values import PropertyListValue
-from .product_property_values import ProductPropertyValue
\ No newline at end of file
+from .product_property_values import ProductPropertyValue
+from .catalog_version import CatalogVersion
+from .catalog_change import CatalogChange, CatalogChangeHorizon
+from .catalog_query_stat import CatalogQueryStat
+from . import surrogate_keys # registers the id listener for databases without sequences
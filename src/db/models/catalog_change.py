@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, BigInteger, Integer, SmallInteger, UUID, DateTime, Index, CheckConstraint, func
+from src.db.base import Base
+
+class CatalogChange(Base):
+    __tablename__ = 'catalog_changes'
+    __table_args__ = (
+        # compaction looks for later entries of the same entity
+        Index('ix_catalog_changes_entity_uid_seq', 'entity', 'uid', 'seq'),
+        # SQLite would otherwise reuse the seq of deleted entries once retention emptied the table
+        {'sqlite_autoincrement': True},
+    )
+
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True) # assigned in commit order, see ChangeRepository.append
+    entity = Column(String(16), nullable=False) # 'product' or 'property'
+    uid = Column(UUID, nullable=False)
+    op = Column(String(16), nullable=False) # 'upsert' or 'delete'
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class CatalogChangeHorizon(Base):
+    __tablename__ = 'catalog_change_horizon'
+    __table_args__ = (
+        CheckConstraint('id = 1', name='catalog_change_horizon_single_row'),
+    )
+
+    id = Column(SmallInteger, primary_key=True, default=1) # a single row
+    seq = Column(BigInteger, nullable=False) # highest seq removed by retention, see ChangeRepository.apply_retention
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Text, BigInteger, DateTime, Index
+from src.db.base import Base
+
+class CatalogQueryStat(Base):
+    __tablename__ = 'catalog_query_stats'
+    __table_args__ = (
+        # retention deletes by age, the cache warmer reads recent rows
+        Index('ix_catalog_query_stats_last_seen_at', 'last_seen_at'),
+    )
+
+    signature = Column(String(40), primary_key=True) # sha1 of endpoint and query, queries can be too long for a btree key
+    endpoint = Column(String(16), nullable=False) # 'catalog' or 'catalog_filter'
+    query = Column(Text, nullable=False) # URL-encoded query string with parameters sorted
+    hits = Column(BigInteger, nullable=False)
+    last_seen_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, String, BigInteger
+from src.db.base import Base
+
+class CatalogVersion(Base):
+    __tablename__ = 'catalog_versions'
+
+    name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1, server_default="1")
@@ -1,5 +1,6 @@
 import uuid
-from sqlalchemy import Column, String, UUID
+from sqlalchemy import Column, String, UUID, Integer, JSON, Sequence
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from src.db.base import Base
 
@@ -7,5 +8,8 @@ class Product(Base):
     __tablename__ = 'products'
 
     uid = Column(UUID, primary_key=True, default=uuid.uuid4)
+    id = Column(Integer, Sequence('products_id_seq'), unique=True, nullable=False) # internal surrogate key referenced by product_property_values
     name = Column(String(255), nullable=True, index=True)
-    property_values  = relationship("ProductPropertyValue", back_populates="product", cascade="all, delete-orphan", passive_deletes=True)
\ No newline at end of file
+    version = Column(Integer, nullable=False, default=1, server_default="1") # starts at the catalog version, bumped on every change, used for ETags; see VersionRepository
+    document = Column(JSONB().with_variant(JSON(), "sqlite"), nullable=True) # rendered ProductOutputSchema, see ProductRepository.refresh_documents
+    property_values  = relationship("ProductPropertyValue", back_populates="product", cascade="all, delete-orphan", passive_deletes=True)
@@ -1,15 +1,40 @@
-from sqlalchemy import Column, Integer, ForeignKey, UUID
+from sqlalchemy import Column, Integer, SmallInteger, ForeignKey, Index, Sequence, event, text
 from sqlalchemy.orm import relationship
 from src.db.base import Base
 
+# Hash partitions of product_property_values on PostgreSQL; changing it needs a new migration
+PRODUCT_PROPERTY_VALUES_PARTITIONS = 16
+
+# Products, properties and list values are referenced by their internal integer ids rather than
+# their UUIDs (4 + 2 + 4 instead of 3 x 16 bytes per row and index entry); the API only speaks UUIDs
 class ProductPropertyValue(Base):
     __tablename__ = 'product_property_values'
+    __table_args__ = (
+        # access path for sorting by an INT property: ordered values per property, covering product_id;
+        # also serves lookups by property_id alone
+        Index('ix_product_property_values_property_int_product', 'property_id', 'int_value', 'product_id'),
+        # one product's values of a property, e.g. its sort value; also serves lookups by product_id alone
+        Index('ix_product_property_values_product_property_int', 'product_id', 'property_id', 'int_value'),
+        # catalog filters, facets and sorting all constrain property_id, so they are pruned to one partition
+        {'postgresql_partition_by': 'HASH (property_id)'},
+    )
 
-    id = Column(Integer, primary_key=True)
-    product_uid = Column(UUID, ForeignKey('products.uid', ondelete="CASCADE"), nullable=False, index=True)
-    property_uid = Column(UUID, ForeignKey('properties.uid', ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Integer, Sequence('product_property_values_id_seq'), primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete="CASCADE"), nullable=False)
+    property_id = Column(SmallInteger, ForeignKey('properties.id', ondelete="CASCADE"), primary_key=True, nullable=False) # the partition key has to be part of the primary key
     int_value = Column(Integer)
-    list_value_uid = Column(UUID, ForeignKey('property_list_values.value_uid', ondelete="CASCADE"), index=True)
+    list_value_id = Column(Integer, ForeignKey('property_list_values.id', ondelete="CASCADE"), index=True)
     product = relationship("Product", back_populates="property_values")
     list_value = relationship("PropertyListValue", back_populates="product_assignments")
-    property = relationship("Property", back_populates="product_assignments")
\ No newline at end of file
+    property = relationship("Property", back_populates="product_assignments")
+
+
+@event.listens_for(ProductPropertyValue.__table__, "after_create")
+def _create_partitions(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+    for remainder in range(PRODUCT_PROPERTY_VALUES_PARTITIONS):
+        connection.execute(text(
+            f"CREATE TABLE {target.name}_p{remainder} PARTITION OF {target.name} "
+            f"FOR VALUES WITH (MODULUS {PRODUCT_PROPERTY_VALUES_PARTITIONS}, REMAINDER {remainder})"
+        ))
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, UUID, Enum
+from sqlalchemy import Column, String, UUID, Enum, SmallInteger, Sequence
 from sqlalchemy.orm import relationship
 from src.db.base import Base
 
@@ -7,7 +7,8 @@ class Property(Base):
     __tablename__ = 'properties'
 
     uid = Column(UUID, primary_key=True, default=uuid.uuid4)
+    id = Column(SmallInteger, Sequence('properties_id_seq', data_type=SmallInteger), unique=True, nullable=False) # internal surrogate key referenced by product_property_values, never reused: see surrogate_keys.PROPERTY_ID_MAX
     name = Column(String(255), nullable=True)
     type = Column(Enum('int', 'list', name='property_type_enum'), nullable=False)
     values = relationship("PropertyListValue", back_populates="property", cascade="all, delete-orphan")
-    product_assignments = relationship("ProductPropertyValue", back_populates="property")
\ No newline at end of file
+    product_assignments = relationship("ProductPropertyValue", back_populates="property", passive_deletes=True) # removed by the ON DELETE CASCADE
\ No newline at end of file
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, UUID, ForeignKey
+from sqlalchemy import Column, String, UUID, ForeignKey, Integer, Sequence
 from sqlalchemy.orm import relationship
 from src.db.base import Base
 
@@ -7,7 +7,8 @@ class PropertyListValue(Base):
     __tablename__ = 'property_list_values'
 
     value_uid = Column(UUID, primary_key=True, default=uuid.uuid4)
+    id = Column(Integer, Sequence('property_list_values_id_seq'), unique=True, nullable=False) # internal surrogate key referenced by product_property_values
     value = Column(String(255), nullable=False)
     property_uid = Column(UUID, ForeignKey('properties.uid', ondelete="CASCADE"), nullable=False)
     property = relationship("Property", back_populates="values")
-    product_assignments = relationship("ProductPropertyValue", back_populates="list_value")
\ No newline at end of file
+    product_assignments = relationship("ProductPropertyValue", back_populates="list_value", passive_deletes=True) # removed by the ON DELETE CASCADE
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Internal integer ids of products, properties, list values and property values.
+
+On PostgreSQL they come from the sequences declared on the models, rendered as
+nextval() into the INSERT, and are never reused. Databases without sequences
+(SQLite in development) get them from the before_insert listener below: one
+more than the table's highest id, so there an id can be reused once the row
+holding the highest one was deleted. That is safe because create_database_engine
+turns on SQLite's foreign keys, so the rows referencing a deleted id are gone
+with it. Writers are serialized by SQLite anyway.
+
+Property ids are SMALLINT to keep product_property_values narrow; since ids are
+never reused, at most PROPERTY_ID_MAX properties can ever be created in a
+database. next_property_id() turns running out into a clear error.
+"""
+from fastapi import HTTPException, status
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from .product import Product
+from .product_property_values import ProductPropertyValue
+from .properties import Property
+from .properties_list_values import PropertyListValue
+
+PROPERTY_ID_MAX = 32767
+# SQLSTATE sequence_generator_limit_exceeded, raised by nextval() on an exhausted sequence
+SEQUENCE_LIMIT_EXCEEDED = "2200H"
+# Connection.info key of the next ids handed out per table during a flush
+_NEXT_IDS_KEY = "next_surrogate_ids"
+
+
+def _assign_surrogate_id(mapper, connection, target):
+    if target.id is not None or connection.dialect.supports_sequences:
+        return
+    table = mapper.local_table
+    # objects of one flush are inserted together, so the ids handed out are counted here
+    next_ids = connection.info.setdefault(_NEXT_IDS_KEY, {})
+    if table.name not in next_ids:
+        next_ids[table.name] = connection.execute(select(func.coalesce(func.max(table.c.id), 0) + 1)).scalar_one()
+    target.id = next_ids[table.name]
+    next_ids[table.name] += 1
+
+
+for _model in (Product, Property, PropertyListValue, ProductPropertyValue):
+    event.listen(_model, "before_insert", _assign_surrogate_id)
+
+
+@event.listens_for(Session, "before_flush")
+def _forget_next_ids(session: Session, flush_context, instances):
+    # every flush counts from the table again, also after a failed one on this pooled connection
+    session.connection().info.pop(_NEXT_IDS_KEY, None)
+
+
+def next_property_id(session: Session) -> int:
+    """
+    Allocates the id of a new property.
+    Raises HTTPException(507) once all PROPERTY_ID_MAX ids have been used.
+    """
+    if session.get_bind().dialect.supports_sequences:
+        try:
+            with session.begin_nested():
+                property_id = session.execute(select(Property.__table__.c.id.default.next_value())).scalar_one()
+        except DBAPIError as error:
+            if getattr(error.orig, "pgcode", None) != SEQUENCE_LIMIT_EXCEEDED:
+                raise
+            property_id = PROPERTY_ID_MAX + 1
+    else:
+        property_id = session.execute(select(func.coalesce(func.max(Property.id), 0) + 1)).scalar_one()
+    if property_id > PROPERTY_ID_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail=f"No property ids left: at most {PROPERTY_ID_MAX} properties can ever be created in this catalog.",
+        )
+    return property_id
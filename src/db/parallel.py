@@ -0,0 +1,81 @@
+"""
+Concurrent execution of independent read queries in one consistent snapshot.
+
+A catalog request runs several queries that do not depend on each other
+(count and page, count and facet statistics). With CATALOG_PARALLEL_QUERIES
+on PostgreSQL they run at the same time on separate pooled connections, so
+the request takes about as long as its slowest query instead of their sum:
+- the request's session starts a REPEATABLE READ transaction and exports its
+  snapshot with pg_export_snapshot(), then runs the first query;
+- every other query runs in a worker thread on a session of its own, whose
+  REPEATABLE READ transaction imports that snapshot (SET TRANSACTION SNAPSHOT)
+  before its first statement.
+All queries therefore see exactly the same data, as they did on one session.
+The exporting transaction stays open until every worker is done, since a
+snapshot can only be imported while its exporter is alive. Worker sessions
+inherit the request deadline.
+
+A request holds one connection per query while they run, so keep
+DB_POOL_SIZE + DB_MAX_OVERFLOW above the admission limits times the queries
+per request. Elsewhere (disabled, SQLite, snapshot read nodes) the queries
+run one after another on the request's session.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, List, Sequence, TypeVar
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.db.deadline import get_deadline, set_deadline
+
+T = TypeVar("T")
+
+SNAPSHOT_ID = re.compile(r"^[0-9A-F-]+$")
+
+
+@lru_cache
+def get_query_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.CATALOG_PARALLEL_WORKERS, thread_name_prefix="catalog-query")
+
+
+def _run_imported(session: Session, snapshot_id: str, task: Callable[[Session], T]) -> T:
+    with session:
+        session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        session.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+        return task(session)
+
+
+def run_in_snapshot(session: Session, tasks: Sequence[Callable[[Session], T]]) -> List[T]:
+    """
+    Runs each task with a session and returns their results in order; see the
+    module docstring for when they run concurrently. The request session's
+    transaction is ended first.
+    """
+    bind = session.get_bind()
+    if not settings.CATALOG_PARALLEL_QUERIES or len(tasks) < 2 or bind.dialect.name != "postgresql":
+        return [task(session) for task in tasks]
+
+    session.rollback()
+    session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    try:
+        snapshot_id = session.execute(text("SELECT pg_export_snapshot()")).scalar_one()
+        if not SNAPSHOT_ID.match(snapshot_id):
+            raise ValueError(f"Unexpected snapshot id {snapshot_id!r}")
+        worker_sessions = []
+        for _ in tasks[1:]:
+            worker_session = Session(bind=bind)
+            set_deadline(worker_session, get_deadline(session))
+            worker_sessions.append(worker_session)
+        futures = [
+            get_query_executor().submit(_run_imported, worker_session, snapshot_id, task)
+            for worker_session, task in zip(worker_sessions, tasks[1:])
+        ]
+        try:
+            first = tasks[0](session)
+        finally:
+            # the workers must import the snapshot before this transaction ends
+            wait(futures)
+        return [first, *(future.result() for future in futures)]
+    finally:
+        session.rollback()
@@ -0,0 +1,110 @@
+"""
+Read-only SQLite catalog snapshots for edge read nodes.
+
+src.scripts.export_catalog_snapshot copies the catalog tables from the primary
+database into `<directory>/catalog-<generation>.sqlite` and atomically repoints
+the `<directory>/current` symlink. With READ_BACKEND=snapshot, sessions are
+bound to an engine on the current file, so the catalog and product read paths
+run their usual queries (and filter semantics) against the local file.
+A newly published generation is picked up for sessions created after it;
+sessions already running finish on the file they started with.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CURRENT_LINK = "current"
+FILE_PATTERN = re.compile(r"^catalog-(\d+)\.sqlite$")
+
+
+def snapshot_path(directory: str, generation: int) -> str:
+    return os.path.join(directory, f"catalog-{generation}.sqlite")
+
+
+def current_generation(directory: str) -> int:
+    """
+    Generation the `current` link points to, or 0 if there is none yet.
+    """
+    try:
+        target = os.readlink(os.path.join(directory, CURRENT_LINK))
+    except OSError:
+        return 0
+    match = FILE_PATTERN.match(os.path.basename(target))
+    return int(match.group(1)) if match else 0
+
+
+def publish_snapshot(directory: str, path: str, keep: int = 2):
+    """
+    Atomically makes a complete snapshot file current and unlinks generations beyond `keep`.
+    Readers that still have an older file open keep reading it until they switch.
+    """
+    link_tmp = os.path.join(directory, f".{CURRENT_LINK}.{os.getpid()}")
+    if os.path.lexists(link_tmp):
+        os.unlink(link_tmp)
+    os.symlink(os.path.basename(path), link_tmp)
+    os.replace(link_tmp, os.path.join(directory, CURRENT_LINK))
+
+    generations = sorted(
+        int(match.group(1)) for match in map(FILE_PATTERN.match, os.listdir(directory)) if match
+    )
+    for old in generations[:-keep] if keep > 0 else []:
+        os.unlink(snapshot_path(directory, old))
+
+
+def create_snapshot_engine(path: str) -> Engine:
+    # immutable: published files never change, so SQLite skips locking and change detection
+    return create_engine(
+        f"sqlite:///file:{path}?mode=ro&immutable=1&uri=true",
+        connect_args={"check_same_thread": False},
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+
+
+class SnapshotEngines:
+    """
+    Follows the `current` link of a snapshot directory and hands out an engine
+    on the current file, switching when a new generation is published.
+    Checks at most every `check_seconds`.
+    """
+
+    def __init__(self, directory: str, check_seconds: float):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self.generation = 0
+        self._engine: Optional[Engine] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Engine:
+        now = time.monotonic()
+        if self._engine is not None and now - self._checked_at < self.check_seconds:
+            return self._engine
+        with self._lock:
+            self._checked_at = now
+            generation = current_generation(self.directory)
+            if generation and generation != self.generation:
+                previous, self._engine = self._engine, create_snapshot_engine(snapshot_path(self.directory, generation))
+                self.generation = generation
+                logger.info("Serving reads from catalog snapshot generation %d", generation)
+                if previous is not None:
+                    previous.dispose() # closes idle connections; ones in use finish on the old file
+        if self._engine is None:
+            raise RuntimeError(f"No catalog snapshot published in {self.directory} yet.")
+        return self._engine
+
+
+@lru_cache
+def get_snapshot_engines() -> SnapshotEngines:
+    if not settings.READ_SNAPSHOT_DIR:
+        raise RuntimeError("READ_BACKEND=snapshot requires READ_SNAPSHOT_DIR.")
+    return SnapshotEngines(settings.READ_SNAPSHOT_DIR, settings.READ_SNAPSHOT_CHECK_SECONDS)
@@ -0,0 +1,137 @@
+"""
+Horizontal sharding of the catalog across several databases.
+
+With CATALOG_SHARD_URLS set, DATABASE_URL is shard 0 and every URL listed is
+one more shard. Each shard has the full schema (run the migrations on each):
+- products and their property values live on exactly one shard, chosen by a
+  hash of the product UID, so a UID is unique across shards by construction
+  and a product read or write touches one database;
+- properties and property list values are replicated to every shard with the
+  same surrogate ids, so filters, sorts and stats resolve them locally;
+- catalog_versions, the change log and the other bookkeeping tables exist per
+  shard and count that shard's writes.
+
+The request session (get_session) is bound to shard 0. Sessions on the other
+shards are opened on first use through shard_session() and closed together
+with the request session; they inherit its deadline. Catalog reads run on
+every shard concurrently through scatter() and are merged by the caller.
+
+There is no distributed transaction: commit_shards() commits the other shards
+first and shard 0 last, so a failure on shard 0 can leave a replicated
+property write applied to only some shards. src.scripts.shard_catalog repairs
+that, and moves products after the shard list changed.
+"""
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Dict, List, TypeVar
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.db.base import SHARD_SESSIONS_KEY, create_database_engine, get_engine
+from src.db.deadline import get_deadline, set_deadline
+from src.repositories import VersionRepository
+
+T = TypeVar("T")
+
+
+def sharding_enabled() -> bool:
+    """True when the catalog is spread over several databases; snapshot read nodes are never sharded."""
+    return bool(settings.CATALOG_SHARD_URLS) and settings.READ_BACKEND == "database"
+
+
+def shard_urls() -> List[str]:
+    extra = [url.strip() for url in (settings.CATALOG_SHARD_URLS or "").split(",") if url.strip()]
+    return [settings.DATABASE_URL, *extra]
+
+
+@lru_cache
+def get_shard_engines() -> List[Engine]:
+    """Engines of all shards, shard 0 being the primary engine."""
+    return [get_engine(), *(create_database_engine(url) for url in shard_urls()[1:])]
+
+
+@lru_cache
+def get_shard_executor() -> ThreadPoolExecutor:
+    # separate from src.db.parallel's executor, whose tasks a shard task may wait for
+    return ThreadPoolExecutor(max_workers=settings.CATALOG_SHARD_WORKERS, thread_name_prefix="catalog-shard")
+
+
+def shard_count() -> int:
+    return len(get_shard_engines()) if sharding_enabled() else 1
+
+
+def shard_index(product_uid: uuid.UUID) -> int:
+    """The shard a product lives on; stable across processes and releases."""
+    count = shard_count()
+    if count == 1:
+        return 0
+    digest = hashlib.blake2b(product_uid.bytes, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def shard_session(session: Session, index: int) -> Session:
+    """
+    The request's session on a shard: the request session itself for shard 0,
+    otherwise a session opened on first use and kept in the request session's info.
+    """
+    if index == 0:
+        return session
+    sessions: Dict[int, Session] = session.info.setdefault(SHARD_SESSIONS_KEY, {})
+    if index not in sessions:
+        sessions[index] = Session(bind=get_shard_engines()[index])
+        set_deadline(sessions[index], get_deadline(session))
+    return sessions[index]
+
+
+def product_session(session: Session, product_uid: uuid.UUID) -> Session:
+    """The request's session on the shard holding the product."""
+    return shard_session(session, shard_index(product_uid))
+
+
+def all_shard_sessions(session: Session) -> List[Session]:
+    return [shard_session(session, index) for index in range(shard_count())]
+
+
+def commit_shards(session: Session):
+    """Commits the request's open shard sessions, shard 0 last; see the module docstring."""
+    for _, opened in sorted(session.info.get(SHARD_SESSIONS_KEY, {}).items()):
+        opened.commit()
+    session.commit()
+
+
+def rollback_shards(session: Session):
+    for opened in session.info.get(SHARD_SESSIONS_KEY, {}).values():
+        opened.rollback()
+    session.rollback()
+
+
+def scatter(session: Session, task: Callable[[Session], T]) -> List[T]:
+    """
+    Runs the task with the request's session on every shard, concurrently, and
+    returns the results in shard order. Without sharding it just runs on the session.
+    """
+    sessions = all_shard_sessions(session)
+    if len(sessions) == 1:
+        return [task(session)]
+    futures = [get_shard_executor().submit(task, opened) for opened in sessions[1:]]
+    try:
+        first = task(session)
+    finally:
+        # the shard sessions must not be used by the request again before their tasks ended
+        wait(futures)
+    return [first, *(future.result() for future in futures)]
+
+
+def get_catalog_version(session: Session) -> int:
+    """
+    The catalog version across shards: the sum of the shard versions, which
+    grows with every write on any shard just like a single database's version.
+    """
+    if shard_count() == 1:
+        return VersionRepository(session).get_catalog_version()
+    versions = scatter(session, lambda opened: VersionRepository(opened).get_catalog_version())
+    for opened in session.info[SHARD_SESSIONS_KEY].values():
+        opened.rollback() # give the shard connections back while the request waits or renders
+    return sum(versions)
@@ -1,14 +1,55 @@
 import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
-from fastapi import FastAPI
-from src.api.endpoints import property_router, products_router, catalog_router
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
+from src.api.endpoints import property_router, products_router, catalog_router, changes_router, stats_router
+from src.core.compression import CompressionMiddleware
+from src.core.config import settings
+from src.db.deadline import DeadlineExceeded, is_deadline_error
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.CATALOG_ENGINE_ENABLED:
+        # its write listener has to be registered before the first write, not by the first catalog read
+        import src.services.catalog_engine # noqa: F401
+    if settings.WARMUP_ENABLED:
+        from src.api.warmup import warmup
+        await warmup(app)
+    if settings.QUERY_STATS_ENABLED or settings.CACHE_WARMER_ENABLED:
+        from src.services.cache_warmer import get_cache_warmer
+        get_cache_warmer().start(app) # runs in the background, see src/services/cache_warmer.py
+    yield
+    if settings.QUERY_STATS_ENABLED or settings.CACHE_WARMER_ENABLED:
+        await get_cache_warmer().stop()
+    if settings.GROUP_COMMIT_ENABLED:
+        from src.services.group_commit import get_group_committer
+        get_group_committer().close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+
+
+@app.exception_handler(DeadlineExceeded)
+@app.exception_handler(DBAPIError)
+async def deadline_exceeded_handler(request: Request, error: Exception):
+    if not is_deadline_error(error):
+        raise error
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "The request did not finish within its deadline."},
+    )
 
-app = FastAPI()
 
 app.include_router(property_router)
 app.include_router(products_router)
 app.include_router(catalog_router)
+app.include_router(changes_router)
+app.include_router(stats_router)
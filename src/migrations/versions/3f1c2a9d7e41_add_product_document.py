@@ -0,0 +1,31 @@
+"""Add denormalized document column to products
+
+Revision ID: 3f1c2a9d7e41
+Revises: 18ac5d5be3b3
+Create Date: 2026-10-19 10:12:04.118311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7e41'
+down_revision: Union[str, None] = '18ac5d5be3b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable so the column can be added without rewriting the table;
+    # fill it with `python -m src.scripts.backfill_product_documents`
+    op.add_column('products', sa.Column('document', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'document')
@@ -0,0 +1,35 @@
+"""Add catalog data versions for ETags
+
+Revision ID: 7b2e5c0d9a13
+Revises: 3f1c2a9d7e41
+Create Date: 2026-10-19 12:40:51.502447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e5c0d9a13'
+down_revision: Union[str, None] = '3f1c2a9d7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    catalog_versions_table = op.create_table('catalog_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='1', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(catalog_versions_table, [{"name": "catalog", "version": 1}])
+    op.add_column('products', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'version')
+    op.drop_table('catalog_versions')
@@ -0,0 +1,155 @@
+"""Hash-partition product_property_values by property_uid
+
+Revision ID: a8f3d6e2b9c5
+Revises: e5a9b3c7d1f0
+Create Date: 2026-10-19 17:22:48.904316
+
+PostgreSQL cannot turn an existing table into a partitioned one, so the rows
+are copied into a new partitioned table which then replaces the old one.
+
+The upgrade runs online: the new table and its indexes are created empty, a
+trigger mirrors writes to the old table into it while the existing rows are
+copied over in batches of BATCH_SIZE, and only the final swap takes a short
+exclusive lock. The downgrade copies the rows back in one
+statement while writes are blocked, so plan a write pause for it on large
+catalogs.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8f3d6e2b9c5'
+down_revision: Union[str, None] = 'e5a9b3c7d1f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16 # frozen copy of PRODUCT_PROPERTY_VALUES_PARTITIONS
+BATCH_SIZE = 10000
+COLUMNS = "id, product_uid, property_uid, int_value, list_value_uid"
+INDEXES = [
+    ('ix_product_property_values_list_value_uid', ['list_value_uid']),
+    ('ix_product_property_values_product_property_int', ['product_uid', 'property_uid', 'int_value']),
+    ('ix_product_property_values_property_int_product', ['property_uid', 'int_value', 'product_uid']),
+]
+
+
+def _create_indexes(table: str) -> None:
+    for index_name, columns in INDEXES:
+        op.create_index(index_name.replace('product_property_values', table), table, columns, unique=False)
+
+
+def _swap_tables(new_table: str) -> None:
+    """
+    Moves the id sequence to the new table, drops the old one and gives the new
+    table, its constraints and indexes their final names.
+    """
+    op.execute(f"ALTER SEQUENCE product_property_values_id_seq OWNED BY {new_table}.id")
+    op.execute(f"ALTER TABLE {new_table} ALTER COLUMN id SET DEFAULT nextval('product_property_values_id_seq')")
+    op.drop_table('product_property_values')
+    op.rename_table(new_table, 'product_property_values')
+    op.execute(f"ALTER TABLE product_property_values RENAME CONSTRAINT {new_table}_pkey TO product_property_values_pkey")
+    for column in ("product_uid", "property_uid", "list_value_uid"):
+        op.execute(
+            f"ALTER TABLE product_property_values "
+            f"RENAME CONSTRAINT {new_table}_{column}_fkey TO product_property_values_{column}_fkey"
+        )
+    for index_name, _ in INDEXES:
+        op.execute(f"ALTER INDEX {index_name.replace('product_property_values', new_table)} RENAME TO {index_name}")
+
+
+def _columns() -> list:
+    return [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_uid', sa.UUID(), nullable=False),
+        sa.Column('property_uid', sa.UUID(), nullable=False),
+        sa.Column('int_value', sa.Integer(), nullable=True),
+        sa.Column('list_value_uid', sa.UUID(), nullable=True),
+    ]
+
+
+def _foreign_keys(table: str) -> list:
+    return [
+        sa.ForeignKeyConstraint(['list_value_uid'], ['property_list_values.value_uid'], name=f'{table}_list_value_uid_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_uid'], ['products.uid'], name=f'{table}_product_uid_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['property_uid'], ['properties.uid'], name=f'{table}_property_uid_fkey', ondelete='CASCADE'),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    new_table = 'product_property_values_partitioned'
+    op.create_table(new_table,
+    *_columns(),
+    *_foreign_keys(new_table),
+    sa.PrimaryKeyConstraint('id', 'property_uid', name=f'{new_table}_pkey'),
+    postgresql_partition_by='HASH (property_uid)'
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE product_property_values_p{remainder} PARTITION OF {new_table} "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    # indexes are built while the table is still empty, so the copy below never blocks writes;
+    # the (property_uid, int_value, product_uid) index covers lookups by property_uid,
+    # so the single-column property_uid index is not recreated
+    _create_indexes(new_table)
+
+    # writes to the old table are mirrored until the swap
+    op.execute(f"""
+        CREATE FUNCTION {new_table}_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {new_table} WHERE id = OLD.id AND property_uid = OLD.property_uid;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {new_table} ({COLUMNS})
+                VALUES (NEW.id, NEW.product_uid, NEW.property_uid, NEW.int_value, NEW.list_value_uid)
+                ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END $$
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {new_table}_sync AFTER INSERT OR UPDATE OR DELETE ON product_property_values
+        FOR EACH ROW EXECUTE FUNCTION {new_table}_sync()
+    """)
+
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        low, high = connection.exec_driver_sql("SELECT min(id), max(id) FROM product_property_values").one()
+        for start in range(low or 0, (high or -1) + 1, BATCH_SIZE):
+            # FOR SHARE: a row deleted meanwhile is either skipped here or deleted by the trigger after this batch
+            connection.execute(sa.text(f"""
+                INSERT INTO {new_table} ({COLUMNS})
+                SELECT {COLUMNS} FROM product_property_values
+                WHERE id >= :start AND id < :stop
+                FOR SHARE
+                ON CONFLICT DO NOTHING
+            """), {"start": start, "stop": start + BATCH_SIZE})
+        connection.exec_driver_sql(f"ANALYZE {new_table}")
+
+    op.execute("LOCK TABLE product_property_values IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"DROP TRIGGER {new_table}_sync ON product_property_values")
+    op.execute(f"DROP FUNCTION {new_table}_sync()")
+    _swap_tables(new_table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    new_table = 'product_property_values_plain'
+    op.execute("LOCK TABLE product_property_values IN SHARE MODE")
+    op.create_table(new_table,
+    *_columns(),
+    *_foreign_keys(new_table),
+    sa.PrimaryKeyConstraint('id', name=f'{new_table}_pkey')
+    )
+    op.execute(f"INSERT INTO {new_table} ({COLUMNS}) SELECT {COLUMNS} FROM product_property_values")
+    # the new table's indexes get their names only after the old table (and its indexes) is gone
+    _create_indexes(new_table)
+    _swap_tables(new_table) # dropping the partitioned table drops its partitions
+    op.create_index('ix_product_property_values_property_uid', 'product_property_values', ['property_uid'], unique=False)
+    op.execute("ANALYZE product_property_values")
@@ -0,0 +1,237 @@
+"""Integer surrogate keys for product_property_values
+
+Revision ID: b7e4c1d9f2a6
+Revises: a8f3d6e2b9c5
+Create Date: 2026-10-19 20:41:12.518274
+
+products, properties and property_list_values get an internal `id` (integer,
+smallint for properties) and product_property_values is rebuilt to reference
+those instead of the UUIDs, still hash-partitioned, now by property_id.
+
+The upgrade runs online: ids are backfilled in batches while new rows get
+theirs from the column default, the new value table is kept in sync with the
+old one by a trigger while existing rows are copied over in batches, and only
+the final swap takes a short exclusive lock. The application reads the new
+columns, so deploy the new version right after the swap. The downgrade copies
+the rows back while writes are blocked, like a8f3d6e2b9c5.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c1d9f2a6'
+down_revision: Union[str, None] = 'a8f3d6e2b9c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16 # frozen copy of PRODUCT_PROPERTY_VALUES_PARTITIONS
+BATCH_SIZE = 10000
+# table, key column, surrogate key type
+PARENTS = [
+    ('products', 'uid', 'integer'),
+    ('properties', 'uid', 'smallint'),
+    ('property_list_values', 'value_uid', 'integer'),
+]
+NEW_TABLE = 'product_property_values_ids'
+OLD_TABLE = 'product_property_values_uuids'
+
+
+def _add_surrogate_key(table: str, key: str, type_: str) -> None:
+    """Adds table.id filled from a sequence without rewriting or locking the table for long."""
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN id {type_}")
+        connection.exec_driver_sql(f"CREATE SEQUENCE {table}_id_seq AS {type_} OWNED BY {table}.id")
+        # rows inserted from now on get their id right away
+        connection.exec_driver_sql(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+        last = None
+        while True:
+            after = f"WHERE {key} > :last" if last is not None else ""
+            keys = connection.execute(
+                sa.text(f"SELECT {key} FROM {table} {after} ORDER BY {key} LIMIT :limit"),
+                {"last": last, "limit": BATCH_SIZE},
+            ).scalars().all()
+            if not keys:
+                break
+            connection.execute(
+                sa.text(f"UPDATE {table} SET id = nextval('{table}_id_seq') WHERE {key} = ANY(:keys) AND id IS NULL"),
+                {"keys": keys},
+            )
+            last = keys[-1]
+        connection.exec_driver_sql(f"CREATE UNIQUE INDEX CONCURRENTLY {table}_id_key ON {table} (id)")
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD CONSTRAINT {table}_id_key UNIQUE USING INDEX {table}_id_key")
+        # a validated CHECK lets SET NOT NULL skip its full scan under the exclusive lock
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD CONSTRAINT {table}_id_not_null CHECK (id IS NOT NULL) NOT VALID")
+        connection.exec_driver_sql(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_id_not_null")
+        connection.exec_driver_sql(f"ALTER TABLE {table} ALTER COLUMN id SET NOT NULL")
+        connection.exec_driver_sql(f"ALTER TABLE {table} DROP CONSTRAINT {table}_id_not_null")
+
+
+def _create_value_table(table: str, columns: list, foreign_keys: list) -> None:
+    op.create_table(table,
+    sa.Column('id', sa.Integer(), nullable=False),
+    *columns,
+    sa.Column('int_value', sa.Integer(), nullable=True),
+    *foreign_keys,
+    sa.PrimaryKeyConstraint('id', columns[1].name, name=f'{table}_pkey'),
+    postgresql_partition_by=f'HASH ({columns[1].name})'
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+
+
+def _id_columns() -> list:
+    return [
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.SmallInteger(), nullable=False),
+        sa.Column('list_value_id', sa.Integer(), nullable=True),
+    ]
+
+
+def _id_foreign_keys(table: str) -> list:
+    return [
+        sa.ForeignKeyConstraint(['list_value_id'], ['property_list_values.id'], name=f'{table}_list_value_id_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], name=f'{table}_product_id_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id'], name=f'{table}_property_id_fkey', ondelete='CASCADE'),
+    ]
+
+
+def _uuid_columns() -> list:
+    return [
+        sa.Column('product_uid', sa.UUID(), nullable=False),
+        sa.Column('property_uid', sa.UUID(), nullable=False),
+        sa.Column('list_value_uid', sa.UUID(), nullable=True),
+    ]
+
+
+def _uuid_foreign_keys(table: str) -> list:
+    return [
+        sa.ForeignKeyConstraint(['list_value_uid'], ['property_list_values.value_uid'], name=f'{table}_list_value_uid_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_uid'], ['products.uid'], name=f'{table}_product_uid_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['property_uid'], ['properties.uid'], name=f'{table}_property_uid_fkey', ondelete='CASCADE'),
+    ]
+
+
+def _swap_tables(new_table: str, columns: list, index_names: list) -> None:
+    """
+    Moves the id sequence to the new table, drops the old one and gives the new
+    table, its partitions, constraints and indexes their final names.
+    """
+    op.execute(f"ALTER SEQUENCE product_property_values_id_seq OWNED BY {new_table}.id")
+    op.execute(f"ALTER TABLE {new_table} ALTER COLUMN id SET DEFAULT nextval('product_property_values_id_seq')")
+    op.drop_table('product_property_values') # drops its partitions
+    op.rename_table(new_table, 'product_property_values')
+    for remainder in range(PARTITIONS):
+        op.execute(f"ALTER TABLE {new_table}_p{remainder} RENAME TO product_property_values_p{remainder}")
+    op.execute(f"ALTER TABLE product_property_values RENAME CONSTRAINT {new_table}_pkey TO product_property_values_pkey")
+    for column in columns:
+        op.execute(
+            f"ALTER TABLE product_property_values "
+            f"RENAME CONSTRAINT {new_table}_{column}_fkey TO product_property_values_{column}_fkey"
+        )
+    for index_name in index_names:
+        op.execute(f"ALTER INDEX {index_name.replace('product_property_values', new_table)} RENAME TO {index_name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, key, type_ in PARENTS:
+        _add_surrogate_key(table, key, type_)
+
+    _create_value_table(NEW_TABLE, _id_columns(), _id_foreign_keys(NEW_TABLE))
+    # indexes are built while the table is still empty, so the copy below never blocks writes
+    op.create_index(f'ix_{NEW_TABLE}_product_property_int', NEW_TABLE, ['product_id', 'property_id', 'int_value'], unique=False)
+    op.create_index(f'ix_{NEW_TABLE}_list_value_id', NEW_TABLE, ['list_value_id'], unique=False)
+    op.create_index(f'ix_{NEW_TABLE}_property_int_product', NEW_TABLE, ['property_id', 'int_value', 'product_id'], unique=False)
+
+    # writes to the old table are mirrored until the swap
+    op.execute(f"""
+        CREATE FUNCTION {NEW_TABLE}_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {NEW_TABLE} WHERE id = OLD.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {NEW_TABLE} (id, product_id, property_id, int_value, list_value_id)
+                SELECT NEW.id, p.id, pr.id, NEW.int_value, lv.id
+                FROM products p
+                JOIN properties pr ON pr.uid = NEW.property_uid
+                LEFT JOIN property_list_values lv ON lv.value_uid = NEW.list_value_uid
+                WHERE p.uid = NEW.product_uid
+                ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END $$
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {NEW_TABLE}_sync AFTER INSERT OR UPDATE OR DELETE ON product_property_values
+        FOR EACH ROW EXECUTE FUNCTION {NEW_TABLE}_sync()
+    """)
+
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        low, high = connection.exec_driver_sql("SELECT min(id), max(id) FROM product_property_values").one()
+        for start in range(low or 0, (high or -1) + 1, BATCH_SIZE):
+            # FOR SHARE: a row deleted meanwhile is either skipped here or deleted by the trigger after this batch
+            connection.execute(sa.text(f"""
+                INSERT INTO {NEW_TABLE} (id, product_id, property_id, int_value, list_value_id)
+                SELECT v.id, p.id, pr.id, v.int_value, lv.id
+                FROM product_property_values v
+                JOIN products p ON p.uid = v.product_uid
+                JOIN properties pr ON pr.uid = v.property_uid
+                LEFT JOIN property_list_values lv ON lv.value_uid = v.list_value_uid
+                WHERE v.id >= :start AND v.id < :stop
+                FOR SHARE OF v
+                ON CONFLICT DO NOTHING
+            """), {"start": start, "stop": start + BATCH_SIZE})
+        connection.exec_driver_sql(f"ANALYZE {NEW_TABLE}")
+
+    op.execute("LOCK TABLE product_property_values IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"DROP TRIGGER {NEW_TABLE}_sync ON product_property_values")
+    op.execute(f"DROP FUNCTION {NEW_TABLE}_sync()")
+    _swap_tables(
+        NEW_TABLE,
+        ['product_id', 'property_id', 'list_value_id'],
+        [
+            'ix_product_property_values_product_property_int',
+            'ix_product_property_values_list_value_id',
+            'ix_product_property_values_property_int_product',
+        ],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("LOCK TABLE product_property_values IN SHARE MODE")
+    _create_value_table(OLD_TABLE, _uuid_columns(), _uuid_foreign_keys(OLD_TABLE))
+    op.execute(f"""
+        INSERT INTO {OLD_TABLE} (id, product_uid, property_uid, int_value, list_value_uid)
+        SELECT v.id, p.uid, pr.uid, v.int_value, lv.value_uid
+        FROM product_property_values v
+        JOIN products p ON p.id = v.product_id
+        JOIN properties pr ON pr.id = v.property_id
+        LEFT JOIN property_list_values lv ON lv.id = v.list_value_id
+    """)
+    # the new table's indexes get their names only after the old table (and its indexes) is gone
+    op.create_index(f'ix_{OLD_TABLE}_product_property_int', OLD_TABLE, ['product_uid', 'property_uid', 'int_value'], unique=False)
+    op.create_index(f'ix_{OLD_TABLE}_list_value_uid', OLD_TABLE, ['list_value_uid'], unique=False)
+    op.create_index(f'ix_{OLD_TABLE}_property_int_product', OLD_TABLE, ['property_uid', 'int_value', 'product_uid'], unique=False)
+    _swap_tables(
+        OLD_TABLE,
+        ['product_uid', 'property_uid', 'list_value_uid'],
+        [
+            'ix_product_property_values_product_property_int',
+            'ix_product_property_values_list_value_uid',
+            'ix_product_property_values_property_int_product',
+        ],
+    )
+    op.execute("ANALYZE product_property_values")
+    for table, _, _ in reversed(PARENTS):
+        op.drop_column(table, 'id') # drops the unique constraint and the owned sequence
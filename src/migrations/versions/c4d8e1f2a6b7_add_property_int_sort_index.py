@@ -0,0 +1,67 @@
+"""Add (property_uid, int_value, product_uid) and (product_uid, property_uid, int_value) indexes for sorting by property
+
+Revision ID: c4d8e1f2a6b7
+Revises: 7b2e5c0d9a13
+Create Date: 2026-10-19 14:05:37.290114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e1f2a6b7'
+down_revision: Union[str, None] = '7b2e5c0d9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_product_property_values_property_int_product',
+            'product_property_values',
+            ['property_uid', 'int_value', 'product_uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # per-product lookups of one property's values (the correlated sort value of the catalog) stop
+        # at the right rows; the product_uid prefix still serves the ON DELETE CASCADE from products
+        op.create_index(
+            'ix_product_property_values_product_property_int',
+            'product_property_values',
+            ['product_uid', 'property_uid', 'int_value'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_product_property_values_product_uid',
+            table_name='product_property_values',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_product_property_values_product_uid',
+            'product_property_values',
+            ['product_uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_product_property_values_product_property_int',
+            table_name='product_property_values',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_product_property_values_property_int_product',
+            table_name='product_property_values',
+            postgresql_concurrently=True,
+        )
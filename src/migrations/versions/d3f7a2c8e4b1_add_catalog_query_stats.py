@@ -0,0 +1,37 @@
+"""Add catalog query popularity stats
+
+Revision ID: d3f7a2c8e4b1
+Revises: b7e4c1d9f2a6
+Create Date: 2026-10-19 22:14:37.905126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7a2c8e4b1'
+down_revision: Union[str, None] = 'b7e4c1d9f2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('catalog_query_stats',
+    sa.Column('signature', sa.String(length=40), nullable=False),
+    sa.Column('endpoint', sa.String(length=16), nullable=False),
+    sa.Column('query', sa.Text(), nullable=False),
+    sa.Column('hits', sa.BigInteger(), nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('signature')
+    )
+    op.create_index('ix_catalog_query_stats_last_seen_at', 'catalog_query_stats', ['last_seen_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_catalog_query_stats_last_seen_at', table_name='catalog_query_stats')
+    op.drop_table('catalog_query_stats')
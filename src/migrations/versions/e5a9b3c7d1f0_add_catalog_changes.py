@@ -0,0 +1,44 @@
+"""Add catalog change feed
+
+Revision ID: e5a9b3c7d1f0
+Revises: c4d8e1f2a6b7
+Create Date: 2026-10-19 16:05:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9b3c7d1f0'
+down_revision: Union[str, None] = 'c4d8e1f2a6b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('catalog_changes',
+    sa.Column('seq', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('entity', sa.String(length=16), nullable=False),
+    sa.Column('uid', sa.UUID(), nullable=False),
+    sa.Column('op', sa.String(length=16), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index('ix_catalog_changes_entity_uid_seq', 'catalog_changes', ['entity', 'uid', 'seq'], unique=False)
+    op.create_table('catalog_change_horizon',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.CheckConstraint('id = 1', name='catalog_change_horizon_single_row'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('catalog_change_horizon')
+    op.drop_index('ix_catalog_changes_entity_uid_seq', table_name='catalog_changes')
+    op.drop_table('catalog_changes')
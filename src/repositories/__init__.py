@@ -1,2 +1,5 @@
 from .property_repository import PropertyRepository
-from .product_repository import ProductRepository
\ No newline at end of file
+from .product_repository import ProductRepository
+from .version_repository import VersionRepository
+from .change_repository import ChangeRepository
+from .query_stats_repository import QueryStatsRepository
@@ -0,0 +1,140 @@
+import datetime
+from typing import List, Tuple
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, insert, delete, exists, func, values, column, true, String, UUID
+from src.db.events import CatalogChanges, before_catalog_commit
+from src.core.config import settings
+from src.db.models import CatalogChange, CatalogChangeHorizon
+
+# pg_advisory_xact_lock key serializing appends, so sequence numbers are assigned in commit order
+CHANGE_LOG_LOCK_KEY = 0x63686e67
+
+
+class ChangeRepository:
+    """
+    Repository for the append-only catalog change feed.
+
+    Every transaction that changes catalog data appends one entry per changed
+    entity right before it commits (unless CHANGES_ENABLED is off). Appends take
+    a transaction-scoped advisory lock first, so a higher sequence number is
+    never visible before a lower one and consumers can safely resume from the
+    last sequence number they saw. The lock is held until the commit, so
+    catalog writes on PostgreSQL commit one at a time, one WAL flush each. Every
+    catalog write already holds the catalog version row until its commit, so
+    they queue there in any case. The lock adds a round trip but no queueing
+    of its own. Turning the feed off saves the inserts, not the queueing. Group
+    commit (src/services/group_commit.py) pays for both once per batch.
+    Entries up to the horizon may have been removed by retention.
+    """
+
+    def __init__(self, session: Session):
+        self.db = session
+
+    def append(self, changes: CatalogChanges):
+        """
+        Appends entries for the changes of the current transaction.
+        """
+        rows = (
+            [("product", uid, "upsert") for uid in changes.products]
+            + [("product", uid, "delete") for uid in changes.deleted_products]
+            + [("property", uid, "upsert") for uid in changes.properties]
+            + [("property", uid, "delete") for uid in changes.deleted_properties]
+        )
+        if not rows:
+            return
+        if self.db.get_bind().dialect.name != "postgresql":
+            # other databases serialize writers on the catalog version row anyway
+            self.db.execute(insert(CatalogChange).values([
+                {"entity": entity, "uid": uid, "op": op} for entity, uid, op in rows
+            ]))
+            return
+        new_changes = values(
+            column("entity", String), column("uid", UUID), column("op", String), name="new_changes"
+        ).data(rows)
+        # one round trip: the lock is taken before the first row gets its sequence number
+        lock = select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK_KEY)).subquery("change_log_lock")
+        self.db.execute(insert(CatalogChange).from_select(
+            ["entity", "uid", "op"],
+            select(new_changes.c.entity, new_changes.c.uid, new_changes.c.op).select_from(lock.join(new_changes, true())),
+        ))
+
+    def get_changes(self, since: int, limit: int) -> List[CatalogChange]:
+        """
+        Returns up to `limit` entries with a sequence number greater than `since`, oldest first.
+        """
+        return self.db.execute(
+            select(CatalogChange).where(CatalogChange.seq > since).order_by(CatalogChange.seq).limit(limit)
+        ).scalars().all()
+
+    def get_latest_seq(self) -> int:
+        """
+        Returns the highest sequence number in the feed, or the horizon if it is empty.
+        """
+        latest = self.db.execute(select(func.max(CatalogChange.seq))).scalar_one_or_none()
+        return latest if latest is not None else self.get_horizon()
+
+    def get_horizon(self) -> int:
+        """
+        Returns the highest sequence number removed by retention; resuming below it misses changes.
+        """
+        horizon = self.db.execute(select(CatalogChangeHorizon.seq)).scalar_one_or_none()
+        return horizon or 0
+
+    def apply_retention(self, older_than: datetime.datetime, batch_size: int) -> Tuple[int, int]:
+        """
+        Deletes up to `batch_size` of the oldest entries created before `older_than`
+        and moves the horizon past them. Returns (deleted entries, new horizon).
+        """
+        expired = (
+            select(CatalogChange.seq)
+            .where(CatalogChange.created_at < older_than)
+            .order_by(CatalogChange.seq)
+            .limit(batch_size)
+            .subquery()
+        )
+        deleted_seqs = self.db.execute(
+            delete(CatalogChange)
+            .where(CatalogChange.seq.in_(select(expired.c.seq)))
+            .returning(CatalogChange.seq)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        horizon = self.get_horizon()
+        if deleted_seqs:
+            horizon = max(horizon, max(deleted_seqs))
+            self.db.merge(CatalogChangeHorizon(id=1, seq=horizon))
+        return len(deleted_seqs), horizon
+
+    def compact(self, after_seq: int, batch_size: int) -> Tuple[int, int]:
+        """
+        Deletes entries superseded by a later entry for the same entity, scanning
+        up to `batch_size` entries after `after_seq`. Consumers still see the final
+        operation for every entity, so compaction never moves the horizon.
+        Returns (deleted entries, last scanned seq); the scan is complete when the
+        last scanned seq equals `after_seq`.
+        """
+        scanned = self.db.execute(
+            select(CatalogChange.seq).where(CatalogChange.seq > after_seq).order_by(CatalogChange.seq).limit(batch_size)
+        ).scalars().all()
+        if not scanned:
+            return 0, after_seq
+        later = aliased(CatalogChange)
+        deleted = self.db.execute(
+            delete(CatalogChange)
+            .where(
+                CatalogChange.seq > after_seq,
+                CatalogChange.seq <= scanned[-1],
+                exists().where(
+                    later.entity == CatalogChange.entity,
+                    later.uid == CatalogChange.uid,
+                    later.seq > CatalogChange.seq,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        return deleted, scanned[-1]
+
+
+@before_catalog_commit
+def _append_catalog_changes(session: Session, changes: CatalogChanges):
+    if settings.CHANGES_ENABLED:
+        ChangeRepository(session).append(changes)
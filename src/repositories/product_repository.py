@@ -1,14 +1,21 @@
 import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import select, exists
+from sqlalchemy import select, exists, insert, delete, update, func, case, or_, literal, cast, values, column, true, Integer, SmallInteger
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from src.core.config import settings
+from src.db.events import record_product_change
 from src.db.models import (
     Product,
     ProductPropertyValue,
     Property,
     PropertyListValue
 )
-from src.schemas import PropertyTypeEnum, PropertyOutputSchema, ProductOutputSchema, ProductInputSchema
+from src.schemas import PropertyTypeEnum, PropertyOutputSchema, ProductOutputSchema, ProductInputSchema, ProductProjection
+from src.services.property_metadata import PropertyMetadataCache, get_property_metadata_cache
+from .version_repository import VersionRepository
 
 
 class ProductRepository:
@@ -19,56 +26,355 @@ class ProductRepository:
     def __init__(self, session: Session):
         self.db = session
 
-    def get_product(self, product_uid: uuid.UUID) -> ProductOutputSchema | None:
+    def get_product(self, product_uid: uuid.UUID, projection: ProductProjection = ProductProjection()) -> ProductOutputSchema | None:
         """
-        Retrieves a product by its UID.
+        Retrieves a product by its UID, loading only what the projection asks for.
         """
+        if not projection.properties:
+            row = self.db.execute(select(Product.uid, Product.name).where(Product.uid == product_uid)).one_or_none()
+            return projection.apply(ProductOutputSchema(uid=row.uid, name=row.name)) if row else None
+
+        if settings.PRODUCT_DOCUMENTS_ENABLED:
+            row = self.db.execute(
+                select(Product.uid, Product.document).where(Product.uid == product_uid)
+            ).one_or_none()
+            if not row:
+                return None
+            if row.document is not None:
+                return projection.apply(ProductOutputSchema.model_validate(row.document))
+
         stmt = (
             select(Product)
             .where(Product.uid == product_uid)
-            .options(
-                selectinload(Product.property_values).options(
-                    selectinload(ProductPropertyValue.list_value),
-                    selectinload(ProductPropertyValue.property),
-                )
-            )
+            .options(self._property_values_loader(projection))
         )
         product_db = self.db.execute(stmt).scalar_one_or_none()
         if not product_db:
             return None
-        product_properties_output = []
-        for prop_value_db in product_db.property_values:
-            product_properties_output.append(PropertyOutputSchema.from_db_models(property_db=prop_value_db.property, property_list_value_db=prop_value_db.list_value, product_property_value_db=prop_value_db))
-        return ProductOutputSchema(
-            uid=product_db.uid,
-            name=product_db.name,
-            properties=product_properties_output,
-        )
+        return projection.apply(self._to_output(product_db))
+
+    def get_products(self, product_uids: List[uuid.UUID], projection: ProductProjection = ProductProjection()) -> List[ProductOutputSchema]:
+        """
+        Retrieves several products by their UIDs, preserving the given order.
+        UIDs that do not exist are skipped.
+        """
+        if not product_uids:
+            return []
+        products_map: Dict[uuid.UUID, ProductOutputSchema] = {}
+        if not projection.properties:
+            for row in self.db.execute(select(Product.uid, Product.name).where(Product.uid.in_(product_uids))).all():
+                products_map[row.uid] = projection.apply(ProductOutputSchema(uid=row.uid, name=row.name))
+            return [products_map[uid] for uid in product_uids if uid in products_map]
+
+        if settings.PRODUCT_DOCUMENTS_ENABLED:
+            rows = self.db.execute(
+                select(Product.uid, Product.document).where(Product.uid.in_(product_uids))
+            ).all()
+            products_map.update(self.products_from_documents(rows, projection))
+        missing_uids = [uid for uid in product_uids if uid not in products_map]
+        if missing_uids:
+            stmt = (
+                select(Product)
+                .where(Product.uid.in_(missing_uids))
+                .options(self._property_values_loader(projection))
+            )
+            for product_db in self.db.execute(stmt).scalars().all():
+                products_map[product_db.uid] = projection.apply(self._to_output(product_db))
+        return [products_map[uid] for uid in product_uids if uid in products_map]
+
+    def products_from_documents(
+        self,
+        rows: Iterable[Tuple[uuid.UUID, Optional[dict]]],
+        projection: ProductProjection = ProductProjection(),
+    ) -> Dict[uuid.UUID, ProductOutputSchema]:
+        """
+        Validates (uid, document) rows into output schemas.
+        Rows without a document yet are left out so the caller can fall back to the joined read.
+        """
+        return {
+            uid: projection.apply(ProductOutputSchema.model_validate(document))
+            for uid, document in rows
+            if document is not None
+        }
 
     def create_product(self, product_data: ProductInputSchema) -> ProductOutputSchema:
         """
         Creates a new product with specified properties after validation.
         Raises HTTPException if validation fails or UID conflict occurs.
         """
+        if settings.PRODUCT_FAST_CREATE_ENABLED and self.db.get_bind().dialect.name == "postgresql":
+            return self._create_product_fast(product_data)
+
         if self.db.execute(select(exists().where(Product.uid == product_data.uid))).scalar():
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Product with UID {product_data.uid} already exists.",
             )
-        
+
+        validated_property_values, output = self._validate_properties(product_data)
+
+        # create product, starting at the new catalog version, see VersionRepository
+        db_product = Product(
+            uid=product_data.uid,
+            name=product_data.name,
+            version=VersionRepository(self.db).bump_catalog_version() or 1
+        )
+        db_product.document = output.model_dump(mode="json")
+        self.db.add(db_product)
+
+        # create property values
+        for validated_value in validated_property_values:
+            prop_value_db = ProductPropertyValue(
+                product=db_product, # product_id is filled in once the product row is inserted
+                property_id=validated_value["property_id"],
+                int_value=validated_value.get("int_value"),
+                list_value_id=validated_value.get("list_value_id")
+            )
+            self.db.add(prop_value_db)
+
+        record_product_change(self.db, db_product.uid)
+        return output
+
+    def _create_product_fast(self, product_data: ProductInputSchema) -> ProductOutputSchema:
+        """
+        create_product in a single statement: properties are validated against the
+        in-process metadata cache, then one INSERT ... ON CONFLICT DO NOTHING RETURNING
+        for the product, a multi-row INSERT of its property values and the catalog
+        version bump run as data-modifying CTEs in one round trip.
+        """
+        metadata_cache = get_property_metadata_cache()
+        try:
+            validated_property_values, output = self._validate_properties(product_data, metadata_cache)
+        except HTTPException:
+            # the cached entries may predate a change made by another process, e.g. a property
+            # re-created with another type; the input is rejected only if fresh entries agree
+            metadata_cache.forget(
+                [prop.uid for prop in product_data.properties],
+                [prop.value_uid for prop in product_data.properties if prop.value_uid],
+            )
+            validated_property_values, output = self._validate_properties(product_data, metadata_cache)
+
+        # starts at the catalog version the bump below sets, see VersionRepository
+        product_values = {"uid": product_data.uid, "name": product_data.name, "version": VersionRepository.next_catalog_version()}
+        product_values["document"] = output.model_dump(mode="json")
+        inserted_product = (
+            pg_insert(Product)
+            .values(**product_values)
+            .on_conflict_do_nothing(index_elements=[Product.uid])
+            .returning(Product.uid, Product.id)
+            .cte("inserted_product")
+        )
+        ctes = [
+            VersionRepository.catalog_version_bump()
+            .where(exists(select(inserted_product.c.uid)))
+            .cte("bumped_version")
+        ]
+        if validated_property_values:
+            new_values = values(
+                column("property_id", SmallInteger),
+                column("int_value", Integer),
+                column("list_value_id", Integer),
+                name="new_values",
+            ).data([
+                (value["property_id"], value.get("int_value"), value.get("list_value_id"))
+                for value in validated_property_values
+            ])
+            ctes.append(
+                insert(ProductPropertyValue)
+                .from_select(
+                    ["product_id", "property_id", "int_value", "list_value_id"],
+                    select(
+                        inserted_product.c.id,
+                        cast(new_values.c.property_id, SmallInteger),
+                        # a VALUES column holding only NULLs is typed text
+                        cast(new_values.c.int_value, Integer),
+                        cast(new_values.c.list_value_id, Integer),
+                    )
+                    .select_from(inserted_product.join(new_values, true())),
+                )
+                .cte("inserted_values")
+            )
+
+        try:
+            inserted_uid = self.db.execute(select(inserted_product.c.uid).add_cte(*ctes)).scalar_one_or_none()
+        except IntegrityError as error:
+            # the cache still knew a property or list value that was deleted (or re-created) meanwhile;
+            # callers retry in a new transaction, which validates against freshly loaded entries
+            metadata_cache.invalidate()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="One or more properties or list values no longer exist.",
+            ) from error
+        if inserted_uid is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Product with UID {product_data.uid} already exists.",
+            )
+        record_product_change(self.db, product_data.uid)
+        return output
+
+    def update_product(self, product_uid: uuid.UUID, product_data: ProductInputSchema) -> ProductOutputSchema:
+        """
+        Replaces the name and property values of an existing product.
+        Raises HTTPException if the product does not exist or validation fails.
+        """
+        if product_data.uid != product_uid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product UID in body ({product_data.uid}) does not match UID in path ({product_uid}).",
+            )
+        product_db = self.db.execute(select(Product).where(Product.uid == product_uid)).scalar_one_or_none()
+        if not product_db:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found",
+            )
+
+        validated_property_values, output = self._validate_properties(product_data)
+
+        product_db.name = product_data.name
+        product_db.version = Product.version + 1
+        product_db.document = output.model_dump(mode="json")
+        self.db.execute(delete(ProductPropertyValue).where(ProductPropertyValue.product_id == product_db.id))
+        for validated_value in validated_property_values:
+            self.db.add(ProductPropertyValue(
+                product_id=product_db.id,
+                property_id=validated_value["property_id"],
+                int_value=validated_value.get("int_value"),
+                list_value_id=validated_value.get("list_value_id")
+            ))
+        VersionRepository(self.db).bump_catalog_version()
+        record_product_change(self.db, product_uid)
+        return output
+
+    def delete_product(self, product_uid: uuid.UUID):
+        """
+        Deletes a product by its UID.
+        """
+        stmt = select(Product).where(Product.uid == product_uid)
+        product_db = self.db.execute(stmt).scalar_one_or_none()
+        if not product_db:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found",
+            )
+        self.db.delete(product_db)
+        VersionRepository(self.db).bump_catalog_version()
+        record_product_change(self.db, product_uid, deleted=True)
+
+    def delete_products(self, product_uids: List[uuid.UUID]) -> List[uuid.UUID]:
+        """
+        Deletes several products by their UIDs in a single set-based DELETE; their
+        property values go through the ON DELETE CASCADE foreign key.
+        UIDs that do not exist are skipped. Returns the UIDs of the deleted products.
+        """
+        if not product_uids:
+            return []
+        deleted_uids = self.db.execute(
+            delete(Product)
+            .where(Product.uid.in_(product_uids))
+            .returning(Product.uid)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if deleted_uids:
+            VersionRepository(self.db).bump_catalog_version()
+        for product_uid in deleted_uids:
+            record_product_change(self.db, product_uid, deleted=True)
+        return deleted_uids
+
+    def refresh_documents(self, product_uids: Optional[List[uuid.UUID]] = None) -> int:
+        """
+        Re-renders products.document of the given products, or of all products,
+        in a single set-based UPDATE. Returns the number of updated rows.
+        The UPDATE uses PostgreSQL JSON functions; on other databases (SQLite in
+        development) the products are loaded and rendered like a joined read.
+        """
+        if product_uids is not None and not product_uids:
+            return 0
+        if self.db.get_bind().dialect.name != "postgresql":
+            stmt = select(Product).options(
+                selectinload(Product.property_values).options(
+                    selectinload(ProductPropertyValue.list_value),
+                    selectinload(ProductPropertyValue.property),
+                )
+            )
+            if product_uids is not None:
+                stmt = stmt.where(Product.uid.in_(product_uids))
+            products = self.db.execute(stmt).scalars().all()
+            for product_db in products:
+                product_db.document = self._to_output(product_db).model_dump(mode="json")
+            return len(products)
+        stmt = update(Product).values(document=self._document_expression())
+        if product_uids is not None:
+            stmt = stmt.where(Product.uid.in_(product_uids))
+        return self.db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+    def _document_expression(self):
+        """
+        SQL expression rendering a product row the same way as ProductOutputSchema.
+        List values without a matching PropertyListValue are skipped, as in PropertyOutputSchema.from_db_models.
+        """
+        property_json = case(
+            (
+                Property.type == PropertyTypeEnum.LIST,
+                func.jsonb_build_object(
+                    "uid", Property.uid,
+                    "name", Property.name,
+                    "value_uid", PropertyListValue.value_uid,
+                    "value", PropertyListValue.value,
+                ),
+            ),
+            else_=func.jsonb_build_object(
+                "uid", Property.uid,
+                "name", Property.name,
+                "value", ProductPropertyValue.int_value,
+            ),
+        )
+        properties_subquery = (
+            select(func.jsonb_agg(aggregate_order_by(property_json, ProductPropertyValue.id)))
+            .select_from(ProductPropertyValue)
+            .join(Property, ProductPropertyValue.property_id == Property.id)
+            .outerjoin(PropertyListValue, ProductPropertyValue.list_value_id == PropertyListValue.id)
+            .where(ProductPropertyValue.product_id == Product.id)
+            .where(or_(Property.type == PropertyTypeEnum.INT, PropertyListValue.value_uid.is_not(None)))
+            .correlate(Product)
+            .scalar_subquery()
+        )
+        return func.jsonb_build_object(
+            "uid", Product.uid,
+            "name", Product.name,
+            "properties", func.coalesce(properties_subquery, cast(literal("[]"), JSONB)),
+        )
+
+    def _validate_properties(
+        self,
+        product_data: ProductInputSchema,
+        metadata_cache: Optional[PropertyMetadataCache] = None,
+    ) -> Tuple[List[Dict[str, Any]], ProductOutputSchema]:
+        """
+        Validates the input property values against existing properties and list values,
+        read from the database or, if given, from the metadata cache.
+        Returns the rows to insert and the rendered output schema.
+        Raises HTTPException if validation fails.
+        """
         # create maps for existing properties and list values
         property_uids_input = {prop.uid for prop in product_data.properties}
         list_value_uids_input = {prop.value_uid for prop in product_data.properties if prop.value_uid}
 
-        existing_properties_db = self.db.execute(
-            select(Property).where(Property.uid.in_(property_uids_input))
-        ).scalars().all()
-        existing_properties_map = {prop.uid: prop for prop in existing_properties_db}
+        if metadata_cache is not None:
+            existing_properties_map, existing_list_values_map = metadata_cache.lookup(
+                self.db, property_uids_input, list_value_uids_input
+            )
+        else:
+            existing_properties_db = self.db.execute(
+                select(Property).where(Property.uid.in_(property_uids_input))
+            ).scalars().all()
+            existing_properties_map = {prop.uid: prop for prop in existing_properties_db}
 
-        existing_list_values_db = self.db.execute(
-            select(PropertyListValue).where(PropertyListValue.value_uid.in_(list_value_uids_input))
-        ).scalars().all()
-        existing_list_values_map = {val.value_uid: val for val in existing_list_values_db}
+            existing_list_values_db = self.db.execute(
+                select(PropertyListValue).where(PropertyListValue.value_uid.in_(list_value_uids_input))
+            ).scalars().all()
+            existing_list_values_map = {val.value_uid: val for val in existing_list_values_db}
 
         # validate properties
         validated_property_values = []
@@ -87,6 +393,7 @@ class ProductRepository:
                     )
                 validated_property_values.append({
                     "property_uid": prop_input.uid,
+                    "property_id": property_db.id,
                     "int_value": prop_input.value
                 })
 
@@ -110,58 +417,49 @@ class ProductRepository:
                     )
                 validated_property_values.append({
                     "property_uid": prop_input.uid,
-                    "list_value_uid": prop_input.value_uid
+                    "property_id": property_db.id,
+                    "list_value_uid": prop_input.value_uid,
+                    "list_value_id": list_value_db.id
                 })
-    
-        # create product
-        db_product = Product(
-            uid=product_data.uid,
-            name=product_data.name
-        )
-        self.db.add(db_product)
-
-        # create property values
-        for validated_value in validated_property_values:
-            prop_value_db = ProductPropertyValue(
-                product_uid=db_product.uid,
-                property_uid=validated_value["property_uid"],
-                int_value=validated_value.get("int_value"),
-                list_value_uid=validated_value.get("list_value_uid")
-            )
-            self.db.add(prop_value_db)
 
         output_properties = []
-        for prop_input in product_data.properties:
-            property_db = existing_properties_map[prop_input.uid]
-            prop_out_data = {
-                "uid": property_db.uid,
-                "name": property_db.name,
-                "value_uid": None,
-                "value": None
-            }
-            if property_db.type == PropertyTypeEnum.INT:
-                prop_out_data["value"] = prop_input.value
-            elif property_db.type == PropertyTypeEnum.LIST:
-                list_value_db = existing_list_values_map[prop_input.value_uid]
-                prop_out_data["value_uid"] = prop_input.value_uid
-                prop_out_data["value"] = list_value_db.value
-            output_properties.append(PropertyOutputSchema.from_db_models(property_db=existing_properties_map[prop_input.uid], property_list_value_db=existing_list_values_map.get(prop_input.value_uid), product_property_value_db=prop_value_db))
+        for validated_value in validated_property_values:
+            output_properties.append(PropertyOutputSchema.from_db_models(
+                property_db=existing_properties_map[validated_value["property_uid"]],
+                property_list_value_db=existing_list_values_map.get(validated_value.get("list_value_uid")),
+                product_property_value_db=ProductPropertyValue(int_value=validated_value.get("int_value")),
+            ))
 
-        return ProductOutputSchema(
+        output = ProductOutputSchema(
             uid=product_data.uid,
             name=product_data.name,
             properties=output_properties
         )
-    
-    def delete_product(self, product_uid: uuid.UUID):
+        return validated_property_values, output
+
+    def _property_values_loader(self, projection: ProductProjection):
         """
-        Deletes a product by its UID.
+        Loader option for product property values; with a property subset only those rows are fetched.
         """
-        stmt = select(Product).where(Product.uid == product_uid)
-        product_db = self.db.execute(stmt).scalar_one_or_none()
-        if not product_db:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Product not found",
-            )
-        self.db.delete(product_db)
\ No newline at end of file
+        property_values = Product.property_values
+        if projection.property_uids is not None:
+            property_values = property_values.and_(ProductPropertyValue.property_id.in_(
+                select(Property.id).where(Property.uid.in_(projection.property_uids))
+            ))
+        return selectinload(property_values).options(
+            selectinload(ProductPropertyValue.list_value),
+            selectinload(ProductPropertyValue.property),
+        )
+
+    def _to_output(self, product_db: Product) -> ProductOutputSchema:
+        """
+        Builds the output schema from a product with loaded property values.
+        """
+        product_properties_output = []
+        for prop_value_db in product_db.property_values:
+            product_properties_output.append(PropertyOutputSchema.from_db_models(property_db=prop_value_db.property, property_list_value_db=prop_value_db.list_value, product_property_value_db=prop_value_db))
+        return ProductOutputSchema(
+            uid=product_db.uid,
+            name=product_db.name,
+            properties=product_properties_output,
+        )
@@ -2,8 +2,12 @@ import uuid
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import select
+from src.db.events import record_product_change, record_property_change
 from src.db.models import Property, PropertyListValue
+from src.db.models.surrogate_keys import next_property_id
 from src.schemas import PropertyTypeEnum, PropertyInputSchema
+from .product_repository import ProductRepository
+from .version_repository import VersionRepository
 
 class PropertyRepository:
     """
@@ -36,6 +40,7 @@ class PropertyRepository:
                 raise ValueError(f"One or more values already exist: {existing_value_uids}")
 
         db_property = Property(
+            id=next_property_id(self.db),
             uid=property_data.uid,
             name=property_data.name,
             type=property_data.type
@@ -49,12 +54,31 @@ class PropertyRepository:
                 )
                 db_property.values.append(db_value)
         self.db.add(db_property)
+        VersionRepository(self.db).bump_catalog_version()
+        record_property_change(self.db, db_property.uid)
+        return db_property
+
+    def copy_property(self, source: Property) -> Property:
+        """
+        Adds a property created in another database, keeping its surrogate ids and
+        those of its list values; used to replicate properties to catalog shards.
+        """
+        db_property = Property(id=source.id, uid=source.uid, name=source.name, type=source.type)
+        for source_value in source.values:
+            db_property.values.append(PropertyListValue(
+                id=source_value.id,
+                value_uid=source_value.value_uid,
+                value=source_value.value
+            ))
+        self.db.add(db_property)
+        VersionRepository(self.db).bump_catalog_version()
+        record_property_change(self.db, db_property.uid)
         return db_property
 
     def delete_property(self, property_uid: uuid.UUID):
         """
         Deletes a property, its associated list values, and any references
-        in ProductPropertyValue.
+        in ProductPropertyValue. Product documents that embed it are re-rendered.
         """
         db_property = self.get_property_by_uid(property_uid)
         if not db_property:
@@ -62,4 +86,12 @@ class PropertyRepository:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Property not found",
             )
-        self.db.delete(db_property)
\ No newline at end of file
+        version_repo = VersionRepository(self.db)
+        product_uids = version_repo.bump_product_versions_for_property(property_uid)
+        for product_uid in product_uids:
+            record_product_change(self.db, product_uid)
+        version_repo.bump_catalog_version()
+        self.db.delete(db_property)
+        record_property_change(self.db, property_uid, deleted=True)
+        self.db.flush()
+        ProductRepository(self.db).refresh_documents(product_uids=product_uids)
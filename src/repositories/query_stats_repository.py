@@ -0,0 +1,58 @@
+import datetime
+import hashlib
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.db.models import CatalogQueryStat
+
+
+class QueryStatsRepository:
+    """
+    Repository for the popularity of catalog query signatures, accumulated
+    from the query sketches of all worker processes.
+    """
+
+    def __init__(self, session: Session):
+        self.db = session
+
+    def add_hits(self, hits: Dict[Tuple[str, str], int], retention: datetime.timedelta):
+        """
+        Adds hit counts per (endpoint, sorted query string) and removes signatures
+        not seen within the retention period.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if hits:
+            insert = pg_insert if self.db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            statement = insert(CatalogQueryStat).values([
+                {
+                    "signature": hashlib.sha1(f"{endpoint}?{query}".encode()).hexdigest(),
+                    "endpoint": endpoint,
+                    "query": query,
+                    "hits": count,
+                    "last_seen_at": now,
+                }
+                for (endpoint, query), count in hits.items()
+            ])
+            self.db.execute(statement.on_conflict_do_update(
+                index_elements=[CatalogQueryStat.signature],
+                set_={
+                    "hits": CatalogQueryStat.hits + statement.excluded.hits,
+                    "last_seen_at": statement.excluded.last_seen_at,
+                },
+            ))
+        self.db.execute(delete(CatalogQueryStat).where(CatalogQueryStat.last_seen_at < now - retention))
+
+    def most_popular(self, limit: int, retention: datetime.timedelta) -> List[Tuple[str, str]]:
+        """
+        Returns the (endpoint, sorted query string) pairs with the most hits among those seen within the retention period.
+        """
+        since = datetime.datetime.now(datetime.timezone.utc) - retention
+        rows = self.db.execute(
+            select(CatalogQueryStat.endpoint, CatalogQueryStat.query)
+            .where(CatalogQueryStat.last_seen_at >= since)
+            .order_by(CatalogQueryStat.hits.desc(), CatalogQueryStat.signature)
+            .limit(limit)
+        ).all()
+        return [(row.endpoint, row.query) for row in rows]
@@ -0,0 +1,92 @@
+import uuid
+from typing import List
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, case, func
+from src.db.models import CatalogVersion, Product, ProductPropertyValue, Property
+
+CATALOG_VERSION = "catalog"
+
+
+class VersionRepository:
+    """
+    Repository for the data versions that back ETags: one global catalog version
+    and a version per product. Bumps are transactional, so a version is only
+    visible together with the data it describes.
+
+    A product starts at the catalog version of the transaction creating it and
+    every later write adds 1 while bumping the catalog version too, so product
+    versions never exceed the catalog version. A product deleted and created
+    again with the same UID therefore never repeats a version, nor an ETag, of
+    the deleted one.
+    """
+
+    def __init__(self, session: Session):
+        self.db = session
+
+    def get_catalog_version(self) -> int:
+        """
+        Returns the global catalog version.
+        """
+        version = self.db.execute(
+            select(CatalogVersion.version).where(CatalogVersion.name == CATALOG_VERSION)
+        ).scalar_one_or_none()
+        return version or 0
+
+    def get_product_version(self, product_uid: uuid.UUID) -> int | None:
+        """
+        Returns the version of a product, or None if it does not exist.
+        """
+        return self.db.execute(select(Product.version).where(Product.uid == product_uid)).scalar_one_or_none()
+
+    def bump_catalog_version(self, at_least: int = 0) -> int | None:
+        """
+        Increments the global catalog version in the current transaction, or raises
+        it to at_least if that is higher. Returns the new version.
+        """
+        stmt = self.catalog_version_bump()
+        if at_least:
+            stmt = stmt.values(version=case(
+                (CatalogVersion.version + 1 < at_least, at_least),
+                else_=CatalogVersion.version + 1,
+            ))
+        return self.db.execute(stmt.returning(CatalogVersion.version)).scalar_one_or_none()
+
+    @staticmethod
+    def catalog_version_bump():
+        """
+        The UPDATE statement behind bump_catalog_version, for embedding in larger statements.
+        """
+        return (
+            update(CatalogVersion)
+            .where(CatalogVersion.name == CATALOG_VERSION)
+            .values(version=CatalogVersion.version + 1)
+        )
+
+    @staticmethod
+    def next_catalog_version():
+        """
+        The catalog version after the current transaction's next bump, as a scalar
+        subquery; the version of a product created in a larger statement.
+        """
+        return (
+            select(func.coalesce(func.max(CatalogVersion.version), 0) + 1)
+            .where(CatalogVersion.name == CATALOG_VERSION)
+            .scalar_subquery()
+        )
+
+    def bump_product_versions_for_property(self, property_uid: uuid.UUID) -> List[uuid.UUID]:
+        """
+        Increments the version of every product that has a value for the property.
+        Returns the UIDs of the bumped products.
+        """
+        return self.db.execute(
+            update(Product)
+            .where(Product.id.in_(
+                select(ProductPropertyValue.product_id)
+                .join(Property, ProductPropertyValue.property_id == Property.id)
+                .where(Property.uid == property_uid)
+            ))
+            .values(version=Product.version + 1)
+            .returning(Product.uid)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
@@ -1,3 +1,5 @@
-from .product import CatalogOutputSchema, ProductOutputSchema, ProductInputSchema, PropertyValueInputSchema
+from .product import CatalogOutputSchema, ProductOutputSchema, ProductProjection, ProductInputSchema, PropertyValueInputSchema, ProductBulkDeleteInputSchema, ProductBulkDeleteOutputSchema
 from .properties import PropertyInputSchema, PropertyListValueInputSchema, PropertyTypeEnum, PropertyOutputSchema
-from .catalog import CatalogOutputSchema, SortOptions
\ No newline at end of file
+from .catalog import CatalogOutputSchema, SortOptions, PropertySort, HistogramOptions, ProductSuggestionSchema, CatalogSuggestOutputSchema
+from .catalog import CatalogSearchInputSchema, CatalogSearchOutputSchema, FilterExpression, AndFilterSchema, OrFilterSchema, NotFilterSchema, ListFilterSchema, RangeFilterSchema, NameFilterSchema
+from .changes import CatalogChangeSchema, CatalogChangesOutputSchema
@@ -1,6 +1,7 @@
-from typing import List, Optional
+import uuid
+from typing import List, NamedTuple, Optional, Union
 from enum import StrEnum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from .product import ProductOutputSchema
 
 
@@ -11,6 +12,20 @@ class SortOptions(StrEnum):
     NAME = "name"
 
 
+class HistogramOptions(StrEnum):
+    """Bucketing of INT property histograms in the catalog filter statistics."""
+
+    FIXED = "fixed"
+    QUANTILE = "quantile"
+
+
+class PropertySort(NamedTuple):
+    """Catalog sort by a property value, requested as `sort=property_<uid>[:desc]`."""
+
+    property_uid: uuid.UUID
+    descending: bool = False
+
+
 class CatalogOutputSchema(BaseModel):
     """Response schema for the catalog endpoint, containing products and total count."""
 
@@ -22,3 +37,99 @@ class CatalogOutputSchema(BaseModel):
         description="Total number of products matching the query criteria (across all pages).",
         example=20,
     )
+
+
+class ListFilterSchema(BaseModel):
+    """Products having any of the values of a LIST property."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    property: uuid.UUID = Field(..., description="UID of a LIST property.", example="f47ac10b-58cc-4372-a567-0e02b2c3d479")
+    values: List[uuid.UUID] = Field(..., min_length=1, description="Value UIDs, any of which matches.")
+
+
+class RangeFilterSchema(BaseModel):
+    """Products having a value of an INT property in an inclusive range."""
+
+    model_config = ConfigDict(extra="forbid", populate_by_name=True)
+
+    property: uuid.UUID = Field(..., description="UID of an INT property.", example="e2a5c4d1-3b6f-4e8a-9c7d-1f0e2d3c4b5a")
+    int_from: Optional[int] = Field(None, alias="from", description="Lowest matching value.", example=64)
+    int_to: Optional[int] = Field(None, alias="to", description="Highest matching value.", example=512)
+
+
+class NameFilterSchema(BaseModel):
+    """Products whose name contains a substring (case-insensitive)."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    name: str = Field(..., min_length=1, max_length=255, example="phone")
+
+
+class AndFilterSchema(BaseModel):
+    """Products matching every condition."""
+
+    model_config = ConfigDict(extra="forbid", populate_by_name=True)
+
+    conditions: List["FilterExpression"] = Field(..., alias="and", min_length=1)
+
+
+class OrFilterSchema(BaseModel):
+    """Products matching at least one condition."""
+
+    model_config = ConfigDict(extra="forbid", populate_by_name=True)
+
+    conditions: List["FilterExpression"] = Field(..., alias="or", min_length=1)
+
+
+class NotFilterSchema(BaseModel):
+    """Products not matching the condition."""
+
+    model_config = ConfigDict(extra="forbid", populate_by_name=True)
+
+    condition: "FilterExpression" = Field(..., alias="not")
+
+
+FilterExpression = Union[AndFilterSchema, OrFilterSchema, NotFilterSchema, ListFilterSchema, RangeFilterSchema, NameFilterSchema]
+for _schema in (AndFilterSchema, OrFilterSchema, NotFilterSchema):
+    _schema.model_rebuild()
+
+
+class CatalogSearchInputSchema(BaseModel):
+    """Request body of POST /catalog/search."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    filter: Optional[FilterExpression] = Field(
+        None,
+        description="Filter tree: {'and': [...]}, {'or': [...]}, {'not': {...}} over "
+                    "{'property': uid, 'values': [value uids]}, {'property': uid, 'from': x, 'to': y} and {'name': substring}.",
+        example={"and": [
+            {"property": "f47ac10b-58cc-4372-a567-0e02b2c3d479", "values": ["a1b2c3d4-e5f6-7890-1234-567890abcdef"]},
+            {"not": {"property": "e2a5c4d1-3b6f-4e8a-9c7d-1f0e2d3c4b5a", "from": 1000}},
+        ]},
+    )
+    sort: str = Field(SortOptions.UID, description="'uid', 'name' or 'property_<uid>[:desc]'.")
+    page_size: int = Field(10, ge=1, le=100, description="Number of items per page.")
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page; omit for the first page.")
+
+
+class CatalogSearchOutputSchema(CatalogOutputSchema):
+    """Catalog page of a search, with the cursor of the next page."""
+
+    next_cursor: Optional[str] = Field(None, description="Pass as 'cursor' to get the next page; null on the last page.")
+
+
+class ProductSuggestionSchema(BaseModel):
+    """A product name matching a /catalog/suggest prefix."""
+
+    uid: uuid.UUID = Field(..., description="Unique identifier of the product.", example="c4a1b2d3-e4f5-6789-0123-456789abcdef")
+    name: str = Field(..., description="Name of the product.", example="Smartphone Model X")
+
+
+class CatalogSuggestOutputSchema(BaseModel):
+    """Response schema for the name autocomplete endpoint."""
+
+    suggestions: List[ProductSuggestionSchema] = Field(
+        description="Products whose name starts with the prefix, ordered by name (case-insensitive), then uid."
+    )
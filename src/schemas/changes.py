@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class CatalogChangeSchema(BaseModel):
+    """A single entry of the catalog change feed."""
+
+    seq: int = Field(..., description="Sequence number, increasing in commit order.", example=1042)
+    entity: str = Field(..., description="Changed entity: 'product' or 'property'.", example="product")
+    uid: uuid.UUID = Field(..., description="UID of the changed entity.", example="c4a1b2d3-e4f5-6789-0123-456789abcdef")
+    op: str = Field(..., description="'upsert' (created or updated) or 'delete'.", example="upsert")
+    created_at: datetime = Field(..., description="Commit time of the change.")
+
+    class Config:
+        from_attributes = True
+
+
+class CatalogChangesOutputSchema(BaseModel):
+    """Response schema for the change feed: a batch of changes after `since`."""
+
+    changes: List[CatalogChangeSchema] = Field(..., description="Changes with seq greater than `since`, oldest first.")
+    next_since: int = Field(..., description="Value to pass as `since` in the next request.", example=1042)
+    latest: int = Field(..., description="Highest sequence number currently in the feed.", example=1100)
+    horizon: int = Field(..., description="Highest sequence number removed by retention; 0 if the feed is complete.", example=0)
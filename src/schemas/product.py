@@ -1,6 +1,6 @@
 import uuid
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, PrivateAttr, model_serializer
+from typing import FrozenSet, List, NamedTuple, Optional
 from .properties import PropertyOutputSchema
 
 class ProductOutputSchema(BaseModel):
@@ -8,10 +8,42 @@ class ProductOutputSchema(BaseModel):
     uid: uuid.UUID = Field(..., description="Unique identifier of the product.", example="c4a1b2d3-e4f5-6789-0123-456789abcdef")
     name: Optional[str] = Field(None, description="Name of the product.", example="Smartphone Model X")
     properties: List[PropertyOutputSchema] = Field(default_factory=list, description="List of properties associated with the product.")
+    _omitted_fields: FrozenSet[str] = PrivateAttr(default=frozenset())
 
     class Config:
         from_attributes = True
 
+    @model_serializer(mode="wrap")
+    def omit_fields(self, handler):
+        data = handler(self)
+        for field in self._omitted_fields:
+            data.pop(field, None)
+        return data
+
+
+class ProductProjection(NamedTuple):
+    """Parts of a product to load and return, requested with `fields=` and `properties=`."""
+    name: bool = True
+    properties: bool = True
+    property_uids: Optional[FrozenSet[uuid.UUID]] = None # None: every property
+
+    @property
+    def is_full(self) -> bool:
+        return self.name and self.properties and self.property_uids is None
+
+    def apply(self, product: ProductOutputSchema) -> ProductOutputSchema:
+        """
+        Drops the properties and fields not requested from a fully loaded product.
+        """
+        if self.is_full:
+            return product
+        if self.property_uids is not None:
+            product.properties = [prop for prop in product.properties if prop.uid in self.property_uids]
+        product._omitted_fields = frozenset(
+            field for field, included in (("name", self.name), ("properties", self.properties)) if not included
+        )
+        return product
+
 class CatalogOutputSchema(BaseModel):
     """Response schema for the catalog endpoint, containing products and total count."""
     products: List[ProductOutputSchema] = Field(..., description="List of products matching the query criteria for the current page.")
@@ -29,3 +61,14 @@ class ProductInputSchema(BaseModel):
     uid: uuid.UUID = Field(..., description="Desired unique identifier for the new product.", example="c4a1b2d3-e4f5-6789-0123-456789abcdef")
     name: str = Field(..., description="Name of the new product.", example="Laptop Pro")
     properties: List[PropertyValueInputSchema] = Field(default_factory=list, description="List of property values to assign to the new product.")
+
+class ProductBulkDeleteInputSchema(BaseModel):
+    """Schema for the products to delete by UID; leave it out to delete by catalog filters instead."""
+    uids: List[uuid.UUID] = Field(..., min_length=1, description="UIDs of the products to delete. UIDs that do not exist are skipped.")
+
+class ProductBulkDeleteOutputSchema(BaseModel):
+    """Response schema for a bulk delete."""
+    matched: int = Field(..., description="Number of products matching the UIDs or filters when the delete started.", example=1200)
+    deleted: int = Field(..., description="Number of products deleted; 0 for a dry run.", example=1200)
+    batches: int = Field(..., description="Number of committed DELETE batches.", example=2)
+    dry_run: bool = Field(..., description="Whether products were only counted.")
@@ -0,0 +1,52 @@
+"""
+Fills products.document for existing rows.
+
+Usage (from repo root):
+    python -m src.scripts.backfill_product_documents [--batch-size 1000] [--all]
+"""
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from sqlalchemy import select
+from src.db.base import SessionLocal
+from src.db.models import Product
+from src.repositories import ProductRepository
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(batch_size: int, rebuild_all: bool) -> int:
+    """
+    Renders documents batch by batch, committing after each batch so
+    the job can be interrupted and resumed. Returns the number of updated rows.
+    """
+    total = 0
+    last_uid = None
+    with SessionLocal() as session:
+        product_repo = ProductRepository(session)
+        while True:
+            stmt = select(Product.uid).order_by(Product.uid).limit(batch_size)
+            if not rebuild_all:
+                stmt = stmt.where(Product.document.is_(None))
+            if last_uid is not None:
+                stmt = stmt.where(Product.uid > last_uid)
+            uids = session.execute(stmt).scalars().all()
+            if not uids:
+                break
+            total += product_repo.refresh_documents(product_uids=uids)
+            session.commit()
+            last_uid = uids[-1]
+            logger.info("Backfilled %d product documents", total)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill denormalized product documents.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="Re-render every document, not only missing ones.")
+    args = parser.parse_args()
+    backfill(args.batch_size, args.all)
@@ -0,0 +1,50 @@
+"""
+Builds the shared catalog snapshot file that workers map with CATALOG_SNAPSHOT_DIR.
+Run one instance per host.
+
+Usage (from repo root):
+    python -m src.scripts.build_catalog_snapshot /var/lib/catalog-snapshot [--interval 30] [--keep 2]
+"""
+import argparse
+import logging
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from src.db.base import SessionLocal
+from src.services.catalog_engine import CatalogSnapshot
+from src.services.catalog_snapshot_file import write_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def build(directory: str, keep: int) -> str:
+    """
+    Loads a snapshot from the database and publishes it as the next generation.
+    """
+    started = time.perf_counter()
+    with SessionLocal() as session:
+        snapshot = CatalogSnapshot.load(session)
+    path = write_snapshot(snapshot, directory, keep=keep)
+    logger.info("Wrote %s (%d products) in %.1f ms", path, snapshot.product_count, (time.perf_counter() - started) * 1000)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the shared memory-mapped catalog snapshot.")
+    parser.add_argument("directory")
+    parser.add_argument("--interval", type=float, default=0, help="Rebuild every N seconds; build once if 0.")
+    parser.add_argument("--keep", type=int, default=2, help="Number of generations to keep on disk.")
+    args = parser.parse_args()
+    while True:
+        try:
+            build(args.directory, args.keep)
+        except Exception:
+            if not args.interval:
+                raise
+            logger.exception("Catalog snapshot build failed")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,164 @@
+"""
+In-memory stand-in for a Redis server, for running RESULT_CACHE_BACKEND=redis
+locally and in tests without installing Redis.
+
+Speaks RESP and implements the commands the result cache and simple manual
+checks use: PING, AUTH, SELECT, GET, SET (EX/PX, NX/XX), DEL, EXISTS, TTL,
+DBSIZE, FLUSHDB/FLUSHALL and QUIT. All databases share one keyspace, expired
+keys are dropped when touched and by a sweep once a second. Not meant for
+production: nothing is persisted and memory is unbounded.
+
+Usage (from repo root):
+    python -m src.scripts.cache_server [--host 127.0.0.1] [--port 6379]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SWEEP_SECONDS = 1.0
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Store:
+    def __init__(self):
+        self.values: Dict[bytes, Tuple[bytes, Optional[float]]] = {} # key -> (value, expires at)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.values[key]
+            return None
+        return entry[0]
+
+    def sweep(self):
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in self.values.items() if expires is not None and expires <= now]:
+            del self.values[key]
+
+
+def encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, ProtocolError):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+def execute(store: Store, args: List[bytes]):
+    command, args = args[0].upper(), args[1:]
+    if command == b"PING":
+        return args[0] if args else "PONG"
+    if command in (b"AUTH", b"SELECT"):
+        return "OK"
+    if command == b"GET":
+        return store.get(args[0])
+    if command == b"SET":
+        key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+        expires = None
+        for unit, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+            if unit in options:
+                expires = time.monotonic() + int(options[options.index(unit) + 1]) * scale
+        exists = store.get(key) is not None
+        if (b"NX" in options and exists) or (b"XX" in options and not exists):
+            return None
+        store.values[key] = (value, expires)
+        return "OK"
+    if command == b"DEL":
+        return sum(store.values.pop(key, None) is not None for key in args)
+    if command == b"EXISTS":
+        return sum(store.get(key) is not None for key in args)
+    if command == b"TTL":
+        if store.get(args[0]) is None:
+            return -2
+        expires = store.values[args[0]][1]
+        return -1 if expires is None else max(0, round(expires - time.monotonic()))
+    if command == b"DBSIZE":
+        store.sweep()
+        return len(store.values)
+    if command in (b"FLUSHDB", b"FLUSHALL"):
+        store.values.clear()
+        return "OK"
+    raise ProtocolError(f"unknown command '{command.decode(errors='replace')}'")
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split() # inline command, e.g. from telnet
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        if not header.startswith(b"$"):
+            raise ProtocolError("expected a bulk string")
+        data = await reader.readexactly(int(header[1:]) + 2)
+        args.append(data[:-2])
+    return args
+
+
+async def serve_client(store: Store, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                args = await read_command(reader)
+            except (ProtocolError, ValueError) as error:
+                writer.write(encode(ProtocolError(str(error))))
+                break
+            if args is None:
+                break
+            if not args:
+                continue
+            if args[0].upper() == b"QUIT":
+                writer.write(encode("OK"))
+                break
+            try:
+                reply = execute(store, args)
+            except (ProtocolError, IndexError, ValueError) as error:
+                reply = ProtocolError(str(error) or "wrong number of arguments")
+            writer.write(encode(reply))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def sweep_forever(store: Store):
+    while True:
+        await asyncio.sleep(SWEEP_SECONDS)
+        store.sweep()
+
+
+async def main(host: str, port: int):
+    store = Store()
+    server = await asyncio.start_server(lambda reader, writer: serve_client(store, reader, writer), host, port)
+    logger.info("Cache server listening on %s:%d", host, port)
+    sweeper = asyncio.create_task(sweep_forever(store))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sweeper.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory Redis-protocol server for local runs and tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port))
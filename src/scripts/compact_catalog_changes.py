@@ -0,0 +1,74 @@
+"""
+Retention and compaction of the catalog change feed.
+
+Retention deletes entries older than the retention period and moves the feed
+horizon past them; consumers resuming from before the horizon get 410 and
+resync. Compaction deletes entries superseded by a later entry for the same
+entity, which keeps the feed short without hiding any final state.
+Run it periodically, e.g. from cron.
+
+Usage (from repo root):
+    python -m src.scripts.compact_catalog_changes [--retention-days 7] [--batch-size 10000] [--no-compact]
+"""
+import argparse
+import datetime
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from src.core.config import settings
+from src.db.base import SessionLocal
+from src.repositories import ChangeRepository
+
+logger = logging.getLogger(__name__)
+
+
+def apply_retention(retention_days: float, batch_size: int) -> int:
+    """
+    Deletes expired entries batch by batch, committing after each batch. Returns the number of deleted entries.
+    """
+    older_than = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=retention_days)
+    total = 0
+    with SessionLocal() as session:
+        change_repo = ChangeRepository(session)
+        while True:
+            deleted, horizon = change_repo.apply_retention(older_than, batch_size)
+            session.commit()
+            total += deleted
+            if deleted < batch_size:
+                break
+            logger.info("Removed %d expired changes, horizon %d", total, horizon)
+    logger.info("Retention removed %d changes", total)
+    return total
+
+
+def compact(batch_size: int) -> int:
+    """
+    Removes superseded entries batch by batch, committing after each batch. Returns the number of deleted entries.
+    """
+    total = 0
+    last_seq = 0
+    with SessionLocal() as session:
+        change_repo = ChangeRepository(session)
+        while True:
+            deleted, scanned_to = change_repo.compact(last_seq, batch_size)
+            session.commit()
+            if scanned_to == last_seq:
+                break
+            total += deleted
+            last_seq = scanned_to
+            logger.info("Compacted changes up to seq %d, %d removed", last_seq, total)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply retention to and compact the catalog change feed.")
+    parser.add_argument("--retention-days", type=float, default=None, help="Defaults to CHANGES_RETENTION_DAYS.")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--no-compact", action="store_true", help="Only apply retention.")
+    args = parser.parse_args()
+    apply_retention(settings.CHANGES_RETENTION_DAYS if args.retention_days is None else args.retention_days, args.batch_size)
+    if not args.no_compact:
+        compact(args.batch_size)
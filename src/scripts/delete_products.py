@@ -0,0 +1,65 @@
+"""
+Deletes products in bulk, like POST /product/bulk-delete but without the
+request deadline, for deletes too large for one request (a delisted brand, a
+past season): the products listed in a file of UIDs, one per line, or the ones
+matching /catalog/ filters. Products are deleted and committed in batches,
+with progress logged after each; an interrupted run can simply be restarted.
+
+Usage (from repo root, DATABASE_URL in .env):
+    python -m src.scripts.delete_products --uids-file uids.txt [--batch-size 1000] [--dry-run]
+    python -m src.scripts.delete_products [--name <substring>] [--filter property_<uid>=<value> ...] [--dry-run]
+"""
+import argparse
+import logging
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from fastapi import HTTPException
+from starlette.datastructures import QueryParams
+from src.api.endpoints.products import bulk_delete_sources, delete_in_batches
+from src.core.config import settings
+from src.db.base import SessionLocal, close_shard_sessions
+
+logger = logging.getLogger(__name__)
+
+
+def read_uids(path: str) -> list:
+    with open(path) as uids_file:
+        return [uuid.UUID(line.strip()) for line in uids_file if line.strip()]
+
+
+def delete_products(uids_file: str, name: str, filters: list, batch_size: int, dry_run: bool):
+    query_params = QueryParams([tuple(item.split("=", 1)) for item in filters])
+    if uids_file is None and not name and not query_params:
+        raise SystemExit("Pass --uids-file or at least one of --name and --filter.")
+    uids = read_uids(uids_file) if uids_file is not None else None
+    session = SessionLocal()
+    try:
+        sources = bulk_delete_sources(session, uids, name, query_params, batch_size)
+        result = delete_in_batches(sources, batch_size, dry_run)
+    except HTTPException as error:
+        raise SystemExit(error.detail)
+    finally:
+        close_shard_sessions(session)
+        session.close()
+    if dry_run:
+        logger.info("%d products would be deleted", result.matched)
+    else:
+        logger.info("Deleted %d of %d matching products in %d batches", result.deleted, result.matched, result.batches)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete products by UID list or catalog filters, in batches.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--uids-file", help="File with one product UID per line.")
+    source.add_argument("--name", help="Substring of the product name (case-insensitive), as on /catalog/.")
+    parser.add_argument("--filter", action="append", default=[], help="A /catalog/ property filter, e.g. property_<uid>=<value_uid>; repeatable.")
+    parser.add_argument("--batch-size", type=int, default=settings.PRODUCT_BULK_DELETE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the products that would be deleted.")
+    args = parser.parse_args()
+    if args.uids_file and args.filter:
+        parser.error("--filter cannot be combined with --uids-file")
+    delete_products(args.uids_file, args.name, args.filter, args.batch_size, args.dry_run)
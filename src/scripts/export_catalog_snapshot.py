@@ -0,0 +1,89 @@
+"""
+Exports the catalog into a read-only SQLite snapshot for READ_BACKEND=snapshot read nodes.
+
+Tables are copied from one consistent database snapshot, indexes are built after
+the load and the file is published atomically as the next generation in the
+directory. Ship the directory to edge nodes (e.g. rsync the new file first, the
+`current` link last) or point them at shared storage.
+
+Usage (from repo root):
+    python -m src.scripts.export_catalog_snapshot /var/lib/catalog/sqlite [--batch-size 10000] [--keep 2] [--interval 60]
+"""
+import argparse
+import logging
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.schema import CreateTable
+from src.db.base import SessionLocal
+from src.db.models import CatalogVersion, Product, ProductPropertyValue, Property, PropertyListValue
+from src.db.read_snapshot import current_generation, publish_snapshot, snapshot_path
+
+logger = logging.getLogger(__name__)
+
+EXPORTED_TABLES = [
+    Property.__table__,
+    PropertyListValue.__table__,
+    Product.__table__,
+    ProductPropertyValue.__table__,
+    CatalogVersion.__table__,
+]
+
+
+def export(directory: str, batch_size: int, keep: int) -> str:
+    """
+    Writes and publishes the next snapshot generation. Returns its path.
+    """
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(directory, current_generation(directory) + 1)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+
+    target = create_engine(f"sqlite:///{tmp_path}")
+    with target.connect() as target_connection, SessionLocal() as session:
+        target_connection.exec_driver_sql("PRAGMA page_size = 8192")
+        target_connection.exec_driver_sql("PRAGMA journal_mode = OFF")
+        target_connection.exec_driver_sql("PRAGMA synchronous = OFF")
+        if session.get_bind().dialect.name == "postgresql":
+            # all tables from one MVCC snapshot
+            session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        for table in EXPORTED_TABLES:
+            target_connection.execute(CreateTable(table))
+            rows = session.execute(select(table).execution_options(yield_per=batch_size)).mappings()
+            copied = 0
+            for batch in rows.partitions():
+                target_connection.execute(insert(table), [dict(row) for row in batch])
+                copied += len(batch)
+            logger.info("Exported %d rows of %s", copied, table.name)
+        for table in EXPORTED_TABLES:
+            for index in table.indexes:
+                index.create(target_connection)
+        target_connection.exec_driver_sql("ANALYZE")
+        target_connection.commit()
+    target.dispose()
+
+    os.replace(tmp_path, path)
+    publish_snapshot(directory, path, keep)
+    logger.info("Published %s (%.1f MB) in %.1fs", path, os.path.getsize(path) / 2**20, time.perf_counter() - started)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a read-only SQLite catalog snapshot.")
+    parser.add_argument("directory")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--keep", type=int, default=2, help="Generations to keep on disk.")
+    parser.add_argument("--interval", type=float, default=None, help="Re-export every N seconds instead of once.")
+    args = parser.parse_args()
+    while True:
+        export(args.directory, args.batch_size, args.keep)
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
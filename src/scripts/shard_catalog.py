@@ -0,0 +1,130 @@
+"""
+Brings the catalog shards (CATALOG_SHARD_URLS, see src/db/sharding.py) in line:
+- properties and list values are synced from shard 0 to every other shard by
+  surrogate id: missing ones are copied, ones shard 0 no longer has are
+  deleted. A property whose id or list values differ from shard 0's stops the
+  run, that shard needs manual repair;
+- products stored on a shard other than the one their UID hashes to (after
+  adding a shard, or data loaded into one database) are moved in batches:
+  copied to their shard and committed there, then deleted from the old one.
+  An interrupted run can simply be restarted.
+Run it after every change to the shard list, with writes paused, and after a
+property write failed on some shards.
+
+Usage (from repo root, DATABASE_URL and CATALOG_SHARD_URLS in .env):
+    python -m src.scripts.shard_catalog [--batch-size 500] [--dry-run]
+"""
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from src.db.base import SessionLocal
+from src.db.events import record_product_change
+from src.db.models import Product, ProductPropertyValue, Property
+from src.db.sharding import get_shard_engines, shard_count, shard_index, sharding_enabled
+from src.repositories import PropertyRepository, ProductRepository, VersionRepository
+
+logger = logging.getLogger(__name__)
+
+
+def property_signature(prop: Property) -> tuple:
+    return prop.uid, prop.type, frozenset((value.id, value.value_uid) for value in prop.values)
+
+
+def sync_properties(source: Session, target: Session, shard: int, dry_run: bool) -> int:
+    """
+    Makes the target's properties match the source's. Returns the number of properties changed.
+    """
+    def load(session: Session):
+        return {prop.id: prop for prop in session.execute(select(Property).options(selectinload(Property.values))).scalars()}
+
+    source_properties, target_properties = load(source), load(target)
+    for prop_id in source_properties.keys() & target_properties.keys():
+        if property_signature(source_properties[prop_id]) != property_signature(target_properties[prop_id]):
+            raise SystemExit(f"Property id {prop_id} differs between shard 0 and shard {shard}, repair it manually.")
+
+    missing = [source_properties[prop_id] for prop_id in source_properties.keys() - target_properties.keys()]
+    extra = [target_properties[prop_id] for prop_id in target_properties.keys() - source_properties.keys()]
+    logger.info("Shard %d: %d properties to copy, %d to delete", shard, len(missing), len(extra))
+    if dry_run:
+        return len(missing) + len(extra)
+    property_repo = PropertyRepository(target)
+    for prop in extra:
+        property_repo.delete_property(prop.uid)
+    target.flush() # a recreated property may reuse a deleted one's uid
+    for prop in missing:
+        property_repo.copy_property(prop)
+    target.commit()
+    return len(missing) + len(extra)
+
+
+def move_product(source: Session, target: Session, product: Product):
+    """
+    Copies a product with its property values to the target and commits there, then deletes it from the source.
+    Products the target already has (from an interrupted run) are only deleted.
+    """
+    if target.execute(select(Product.id).where(Product.uid == product.uid)).scalar_one_or_none() is None:
+        # the target's catalog version is raised past the product's, see VersionRepository
+        version = VersionRepository(target).bump_catalog_version(at_least=product.version + 1)
+        moved = Product(uid=product.uid, name=product.name, version=version, document=product.document)
+        for value in product.property_values:
+            moved.property_values.append(ProductPropertyValue(
+                property_id=value.property_id,
+                int_value=value.int_value,
+                list_value_id=value.list_value_id
+            ))
+        target.add(moved)
+        record_product_change(target, product.uid)
+        target.commit()
+    ProductRepository(source).delete_product(product.uid)
+
+
+def move_products(sessions: list, batch_size: int, dry_run: bool) -> int:
+    """
+    Moves every product to the shard its UID hashes to. Returns the number of products moved.
+    """
+    moved = 0
+    for shard, source in enumerate(sessions):
+        last_uid = None
+        while True:
+            stmt = select(Product).options(selectinload(Product.property_values)).order_by(Product.uid).limit(batch_size)
+            if last_uid is not None:
+                stmt = stmt.where(Product.uid > last_uid)
+            products = source.execute(stmt).scalars().all()
+            if not products:
+                break
+            last_uid = products[-1].uid
+            misplaced = [product for product in products if shard_index(product.uid) != shard]
+            if not dry_run:
+                for product in misplaced:
+                    move_product(source, sessions[shard_index(product.uid)], product)
+                source.commit()
+            moved += len(misplaced)
+        logger.info("Shard %d: %d products %s so far", shard, moved, "to move" if dry_run else "moved")
+    return moved
+
+
+def shard_catalog(batch_size: int, dry_run: bool):
+    if not sharding_enabled():
+        raise SystemExit("CATALOG_SHARD_URLS is not set, there is nothing to shard.")
+    sessions = [SessionLocal()] + [Session(bind=engine) for engine in get_shard_engines()[1:]]
+    try:
+        for shard in range(1, shard_count()):
+            sync_properties(sessions[0], sessions[shard], shard, dry_run)
+        move_products(sessions, batch_size, dry_run)
+    finally:
+        for session in sessions:
+            session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync properties to and rebalance products across catalog shards.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    args = parser.parse_args()
+    shard_catalog(args.batch_size, args.dry_run)
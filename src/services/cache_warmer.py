@@ -0,0 +1,181 @@
+"""
+Background re-execution of the most popular catalog queries.
+
+After a deploy every cache is cold, and after a catalog write the shared
+result cache (src/core/result_cache.py) is cold too: the new data version
+moves every response to a new key. The warmer re-runs the top
+CACHE_WARMER_TOP_K signatures from src/services/query_stats.py:
+- once after startup;
+- after this process commits a catalog write, once writes have paused for
+  CACHE_WARMER_DEBOUNCE_SECONDS (other workers then hit the shared cache);
+- when its marker entry disappears from the result cache, i.e. the cache was
+  flushed or restarted.
+The write and flush triggers only apply with a result cache; without one there
+is nothing the warm-up fills that the writes invalidated.
+
+Queries go through the app in-process like real requests (src/core/inprocess.py),
+so they fill the same caches through the same code. They run one at a time,
+only while the read pool has an idle connection and the query's admission
+class is at most half busy, and CACHE_WARMER_PAUSE_MS apart, so live traffic
+always comes first.
+A run stops early when a newer write arrives, and starts over after it.
+
+The same loop flushes the query sketch every QUERY_STATS_FLUSH_SECONDS.
+"""
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Optional
+import anyio
+from src.core.admission import get_admission_controller
+from src.core.config import settings
+from src.core.inprocess import inprocess_get
+from src.core.result_cache import get_result_cache
+from src.db.base import get_read_engine
+from src.db.events import on_catalog_commit
+from src.services.query_stats import flush_query_stats, popular_queries
+
+logger = logging.getLogger(__name__)
+
+PATHS = {"catalog": "/catalog/", "catalog_filter": "/catalog/filter/"}
+# result cache entry whose absence means the cache lost its contents
+MARKER_KEY = "cache_warmer:marker"
+MARKER_TTL_SECONDS = 24 * 3600.0
+
+
+def has_spare_capacity(cost_class: str) -> bool:
+    """True while the read pool has an idle connection and the admission class is at most half busy."""
+    pool = get_read_engine().pool
+    if hasattr(pool, "checkedout") and hasattr(pool, "size") and pool.checkedout() >= pool.size():
+        return False
+    if settings.ADMISSION_ENABLED:
+        cost = get_admission_controller().classes[cost_class]
+        if cost.waiters or cost.in_flight * 2 >= cost.limit:
+            return False
+    return True
+
+
+class CacheWarmer:
+    def __init__(self, top_k: int, debounce_seconds: float, pause_seconds: float, flush_seconds: float):
+        self.top_k = top_k
+        self.debounce_seconds = debounce_seconds
+        self.pause_seconds = pause_seconds
+        self.flush_seconds = flush_seconds
+        self.stats = {"runs": 0, "interrupted": 0, "warmed": 0, "failed": 0}
+        self._app = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[asyncio.Event] = None
+        self._requested_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, app):
+        """Starts the loop on the running event loop with a startup run pending."""
+        self._app = app
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Event()
+        self._pending.set()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Stops the loop and flushes the query sketch one last time."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._flush()
+
+    def schedule(self):
+        """Requests a run after the debounce period; safe to call from any thread."""
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._request_run)
+        except RuntimeError: # the loop was closed meanwhile
+            pass
+
+    def _request_run(self):
+        self._requested_at = self._loop.time()
+        self._pending.set()
+
+    async def _run(self):
+        next_flush = self._loop.time() + self.flush_seconds
+        while True:
+            try:
+                await asyncio.wait_for(self._pending.wait(), max(0.0, next_flush - self._loop.time()))
+            except asyncio.TimeoutError:
+                pass
+            if self._loop.time() >= next_flush:
+                next_flush = self._loop.time() + self.flush_seconds
+                await self._flush()
+                await self._check_marker()
+            if not self._pending.is_set():
+                continue
+            quiet_for = self._loop.time() - self._requested_at
+            if quiet_for < self.debounce_seconds:
+                await asyncio.sleep(self.debounce_seconds - quiet_for)
+                continue
+            self._pending.clear()
+            try:
+                await self.warm()
+            except Exception:
+                logger.exception("Cache warm-up failed")
+
+    async def _flush(self):
+        if not settings.QUERY_STATS_ENABLED:
+            return
+        try:
+            await anyio.to_thread.run_sync(flush_query_stats)
+        except Exception:
+            logger.exception("Query stats flush failed")
+
+    async def _check_marker(self):
+        cache = get_result_cache()
+        if cache is not None and await cache.lookup(MARKER_KEY) is None:
+            self.schedule()
+
+    async def warm(self):
+        if not settings.CACHE_WARMER_ENABLED:
+            return
+        queries = await anyio.to_thread.run_sync(popular_queries, self.top_k)
+        self.stats["runs"] += 1
+        warmed = 0
+        for endpoint, query in queries:
+            while not has_spare_capacity(endpoint):
+                if self._pending.is_set():
+                    break
+                await asyncio.sleep(self.pause_seconds)
+            if self._pending.is_set(): # a newer write moved the keys again
+                self.stats["interrupted"] += 1
+                return
+            status = await inprocess_get(self._app, PATHS[endpoint], query)
+            if status == 200:
+                warmed += 1
+            else:
+                self.stats["failed"] += 1
+            await asyncio.sleep(self.pause_seconds)
+        self.stats["warmed"] += warmed
+        cache = get_result_cache()
+        if cache is not None:
+            await cache.store(MARKER_KEY, b"1", MARKER_TTL_SECONDS)
+        logger.info("Cache warm-up ran %d of %d popular queries", warmed, len(queries))
+
+
+@lru_cache
+def get_cache_warmer() -> CacheWarmer:
+    return CacheWarmer(
+        top_k=settings.CACHE_WARMER_TOP_K,
+        debounce_seconds=settings.CACHE_WARMER_DEBOUNCE_SECONDS,
+        pause_seconds=settings.CACHE_WARMER_PAUSE_MS / 1000,
+        flush_seconds=settings.QUERY_STATS_FLUSH_SECONDS,
+    )
+
+
+@on_catalog_commit
+def _warm_after_write(changes):
+    # nothing to re-warm before the warmer was started, or without a result cache
+    if get_cache_warmer.cache_info().currsize and get_result_cache() is not None:
+        get_cache_warmer().schedule()
@@ -0,0 +1,403 @@
+"""
+Optional in-process catalog engine.
+
+Keeps a columnar NumPy snapshot of product_property_values and evaluates the
+catalog filters (parse_property_filters output), sorting and pagination as
+vectorized operations, so browse traffic does not hit Postgres for filtering.
+Only the page of products is hydrated from the database.
+"""
+import logging
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.db.events import on_catalog_commit
+from src.db.models import Product, ProductPropertyValue, Property, PropertyListValue
+from src.repositories.version_repository import VersionRepository
+from src.schemas import PropertyTypeEnum, SortOptions, PropertySort
+
+try:
+    import numpy as np
+except ImportError: # numpy is an optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+INT32_MIN = -2**31
+INT32_MAX = 2**31 - 1
+LIKE_WILDCARDS = ("%", "_", "\\")
+
+
+def uid_to_bytes(uid: uuid.UUID) -> bytes:
+    return uid.bytes
+
+
+def bytes_to_uid(raw: bytes) -> uuid.UUID:
+    # numpy strips trailing NUL bytes from fixed-width 'S' values
+    return uuid.UUID(bytes=raw.ljust(16, b"\0"))
+
+
+class CatalogSnapshot:
+    """
+    Immutable columnar view of the catalog.
+
+    Products are addressed by ordinal, which is their position in UID order, so
+    ordinal order is also the `sort=uid` order. INT properties are stored as an
+    int32 product x property matrix with a null mask, LIST properties as int32
+    value codes (-1 for no value) indexing `list_value_uids`. The postings
+    (CSR offsets + sorted ordinals) list the products holding each value code.
+    """
+
+    def __init__(
+        self,
+        uids: "np.ndarray",
+        names_lower: "np.ndarray",
+        name_order: "np.ndarray",
+        int_property_uids: List[uuid.UUID],
+        int_values: "np.ndarray",
+        int_mask: "np.ndarray",
+        list_property_uids: List[uuid.UUID],
+        list_codes: "np.ndarray",
+        list_value_uids: "np.ndarray",
+        list_value_columns: "np.ndarray",
+        postings_offsets: "np.ndarray",
+        postings: "np.ndarray",
+        exact: bool = True,
+        generation: int = 0,
+        built_at: float = 0.0,
+        catalog_version: Optional[int] = None,
+    ):
+        self.uids = uids
+        self.names_lower = names_lower
+        self.name_order = name_order
+        self.int_property_uids = int_property_uids
+        self.int_values = int_values
+        self.int_mask = int_mask
+        self.list_property_uids = list_property_uids
+        self.list_codes = list_codes
+        self.list_value_uids = list_value_uids
+        self.list_value_columns = list_value_columns
+        self.postings_offsets = postings_offsets
+        self.postings = postings
+        self.exact = exact
+        self.generation = generation
+        self.built_at = built_at
+        self.catalog_version = catalog_version
+        self.int_columns = {uid: i for i, uid in enumerate(int_property_uids)}
+        self.list_columns = {uid: i for i, uid in enumerate(list_property_uids)}
+        self.list_value_codes = {bytes_to_uid(raw): code for code, raw in enumerate(list_value_uids.tolist())}
+        self._orders: Dict[PropertySort, "np.ndarray"] = {}
+
+    @property
+    def product_count(self) -> int:
+        return len(self.uids)
+
+    @classmethod
+    def load(cls, session: Session) -> "CatalogSnapshot":
+        """
+        Reads products, properties and property values into columnar arrays,
+        together with the catalog version they belong to.
+        """
+        if np is None:
+            raise RuntimeError("numpy is required for the catalog engine (pip install numpy).")
+
+        if session.get_bind().dialect.name == "postgresql":
+            # all reads below see the same committed state as the version read first
+            session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        built_at = time.time()
+        catalog_version = VersionRepository(session).get_catalog_version()
+        product_rows = session.execute(
+            select(
+                Product.uid,
+                Product.id,
+                Product.name,
+                func.row_number().over(order_by=(Product.name.asc().nulls_last(), Product.uid)).label("name_rank"),
+            ).order_by(Product.uid)
+        ).all()
+        property_rows = session.execute(select(Property.uid, Property.id, Property.type).order_by(Property.uid)).all()
+        list_value_rows = session.execute(
+            select(PropertyListValue.value_uid, PropertyListValue.id, PropertyListValue.property_uid).order_by(PropertyListValue.value_uid)
+        ).all()
+        value_rows = session.execute(
+            select(
+                ProductPropertyValue.product_id,
+                ProductPropertyValue.property_id,
+                ProductPropertyValue.int_value,
+                ProductPropertyValue.list_value_id,
+            )
+        ).all()
+
+        # value rows reference the surrogate ids
+        product_ordinals = {row.id: i for i, row in enumerate(product_rows)}
+        property_uids_by_id = {row.id: row.uid for row in property_rows}
+        n_products = len(product_rows)
+        uids = np.array([uid_to_bytes(row.uid) for row in product_rows], dtype="S16")
+        names_lower = np.array([(row.name or "").lower().encode() for row in product_rows], dtype=bytes)
+        # name_rank comes from the database so the order matches its collation
+        name_ranks = np.array([row.name_rank for row in product_rows], dtype=np.int64)
+        name_order = np.argsort(name_ranks, kind="stable").astype(np.int32)
+
+        int_property_uids = [row.uid for row in property_rows if row.type == PropertyTypeEnum.INT]
+        list_property_uids = [row.uid for row in property_rows if row.type == PropertyTypeEnum.LIST]
+        int_columns = {uid: i for i, uid in enumerate(int_property_uids)}
+        list_columns = {uid: i for i, uid in enumerate(list_property_uids)}
+        list_value_uids = np.array([uid_to_bytes(row.value_uid) for row in list_value_rows], dtype="S16")
+        list_value_codes = {row.id: code for code, row in enumerate(list_value_rows)}
+        list_value_columns = np.array([list_columns.get(row.property_uid, -1) for row in list_value_rows], dtype=np.int32)
+
+        int_values = np.zeros((n_products, len(int_property_uids)), dtype=np.int32)
+        int_mask = np.zeros((n_products, len(int_property_uids)), dtype=bool)
+        list_codes = np.full((n_products, len(list_property_uids)), -1, dtype=np.int32)
+
+        exact = True
+        for row in value_rows:
+            ordinal = product_ordinals.get(row.product_id)
+            prop_uid = property_uids_by_id.get(row.property_id)
+            if ordinal is None:
+                continue
+            if prop_uid in int_columns and row.int_value is not None:
+                column = int_columns[prop_uid]
+                if int_mask[ordinal, column]:
+                    exact = False # multi-valued property, cannot be represented as one cell
+                int_values[ordinal, column] = row.int_value
+                int_mask[ordinal, column] = True
+            elif prop_uid in list_columns and row.list_value_id in list_value_codes:
+                column = list_columns[prop_uid]
+                if list_codes[ordinal, column] != -1:
+                    exact = False
+                list_codes[ordinal, column] = list_value_codes[row.list_value_id]
+
+        if not exact:
+            logger.warning("Catalog snapshot has multi-valued properties; catalog queries will use SQL.")
+
+        # postings: product ordinals per list value code, ordinals ascending within a code
+        ordinals, columns = np.nonzero(list_codes >= 0)
+        codes = list_codes[ordinals, columns]
+        by_code = np.argsort(codes, kind="stable")
+        postings = ordinals[by_code].astype(np.int32)
+        postings_offsets = np.searchsorted(codes[by_code], np.arange(len(list_value_rows) + 1)).astype(np.int64)
+
+        return cls(
+            uids=uids,
+            names_lower=names_lower,
+            name_order=name_order,
+            int_property_uids=int_property_uids,
+            int_values=int_values,
+            int_mask=int_mask,
+            list_property_uids=list_property_uids,
+            list_codes=list_codes,
+            list_value_uids=list_value_uids,
+            list_value_columns=list_value_columns,
+            postings_offsets=postings_offsets,
+            postings=postings,
+            exact=exact,
+            built_at=built_at,
+            catalog_version=catalog_version,
+        )
+
+    def filter_mask(self, name: Optional[str], property_filters: Dict[uuid.UUID, Dict[str, Any]]) -> Optional["np.ndarray"]:
+        """
+        Evaluates the name and property filters into a boolean mask over product ordinals.
+        Returns None when the snapshot cannot answer with the same semantics as
+        build_filtered_product_query (unknown property, LIKE wildcards in name).
+        """
+        mask = np.ones(self.product_count, dtype=bool)
+        if name:
+            if any(char in name for char in LIKE_WILDCARDS):
+                return None
+            mask &= np.char.find(self.names_lower, name.lower().encode()) >= 0
+
+        for prop_uid, filter_data in property_filters.items():
+            if prop_uid in self.int_columns:
+                int_from, int_to = filter_data["int_from"], filter_data["int_to"]
+                if int_from is None and int_to is None:
+                    continue
+                column = self.int_columns[prop_uid]
+                condition = self.int_mask[:, column].copy()
+                if int_from is not None:
+                    if int_from > INT32_MAX:
+                        condition[:] = False
+                    else:
+                        condition &= self.int_values[:, column] >= max(int_from, INT32_MIN)
+                if int_to is not None:
+                    if int_to < INT32_MIN:
+                        condition[:] = False
+                    else:
+                        condition &= self.int_values[:, column] <= min(int_to, INT32_MAX)
+                mask &= condition
+            elif prop_uid in self.list_columns:
+                if not filter_data["list_values"]:
+                    continue
+                column = self.list_columns[prop_uid]
+                condition = np.zeros(self.product_count, dtype=bool)
+                for value_uid in filter_data["list_values"]:
+                    code = self.list_value_codes.get(value_uid)
+                    if code is not None and self.list_value_columns[code] == column:
+                        condition[self.postings[self.postings_offsets[code]:self.postings_offsets[code + 1]]] = True
+                mask &= condition
+            else:
+                return None # property created after the snapshot, or invalid: let SQL decide
+        return mask
+
+    def order(self, sort: SortOptions | PropertySort) -> Optional["np.ndarray"]:
+        """
+        Product ordinals in the requested sort order, or None if the sort has to go to SQL.
+        INT property orders (nulls last, ties by UID) are computed once per snapshot;
+        LIST property sorts need the database collation and are not handled here.
+        """
+        if sort == SortOptions.NAME:
+            return self.name_order
+        if not isinstance(sort, PropertySort):
+            return np.arange(self.product_count, dtype=np.int32)
+        column = self.int_columns.get(sort.property_uid)
+        if column is None:
+            return None
+        order = self._orders.get(sort)
+        if order is None:
+            values = self.int_values[:, column].astype(np.int64)
+            if sort.descending:
+                values = -values
+            missing = ~self.int_mask[:, column]
+            order = np.lexsort((np.arange(self.product_count), values, missing)).astype(np.int32)
+            self._orders[sort] = order
+        return order
+
+    def query(
+        self,
+        name: Optional[str],
+        property_filters: Dict[uuid.UUID, Dict[str, Any]],
+        sort: SortOptions | PropertySort,
+        offset: int,
+        limit: int,
+    ) -> Optional[Tuple[int, List[uuid.UUID]]]:
+        """
+        Returns (total_count, page UIDs) or None if the query has to go to SQL.
+        """
+        if not self.exact:
+            return None
+        mask = self.filter_mask(name, property_filters)
+        if mask is None:
+            return None
+        order = self.order(sort)
+        if order is None:
+            return None
+        matching = order[mask[order]]
+        page = matching[offset:offset + limit]
+        return int(matching.size), [bytes_to_uid(raw) for raw in self.uids[page].tolist()]
+
+
+class CatalogEngine:
+    """
+    Holds the current snapshot. Without a snapshot directory it rebuilds the
+    snapshot from the database in a background thread, periodically and after
+    local catalog writes commit. With a snapshot directory it maps the files
+    published by the builder process instead. Queries fall back to SQL (return
+    None) while the snapshot is missing, older than the last local write, or of
+    another catalog version than the request's, which also catches writes made
+    by other processes.
+    """
+
+    def __init__(self, refresh_seconds: float, snapshot_directory: Optional[str] = None, check_seconds: float = 1.0):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._stale_since = 0.0
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._watcher = None
+        if snapshot_directory:
+            from .catalog_snapshot_file import SnapshotFileWatcher
+            self._watcher = SnapshotFileWatcher(snapshot_directory, check_seconds)
+
+    def load_snapshot(self) -> CatalogSnapshot:
+        from src.db.base import SessionLocal
+        with SessionLocal() as session:
+            return CatalogSnapshot.load(session)
+
+    def refresh(self):
+        """
+        Rebuilds the snapshot from the database synchronously.
+        """
+        started = time.perf_counter()
+        snapshot = self.load_snapshot()
+        snapshot.generation = self.snapshot.generation + 1 if self.snapshot else 1
+        self.snapshot = snapshot
+        logger.info(
+            "Catalog snapshot %d loaded: %d products in %.1f ms",
+            snapshot.generation, snapshot.product_count, (time.perf_counter() - started) * 1000,
+        )
+
+    def mark_stale(self):
+        """
+        Marks the snapshot as outdated and schedules a rebuild.
+        """
+        self._stale_since = time.time()
+        self._wakeup.set()
+
+    def start(self):
+        """
+        Starts the background refresh thread once.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="catalog-engine-refresh", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            # cleared before the rebuild, so a write committed during it wakes the next one
+            self._wakeup.clear()
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Catalog snapshot refresh failed")
+            self._wakeup.wait(timeout=self.refresh_seconds)
+
+    def current(self, catalog_version: Optional[int] = None) -> Optional[CatalogSnapshot]:
+        """
+        The snapshot queries can use right now, or None. With a catalog version,
+        only a snapshot of exactly that version is returned; an older one is
+        rebuilt (without a snapshot directory) so the next requests can use it.
+        """
+        if self._watcher is not None:
+            self.snapshot = self._watcher.poll()
+        else:
+            self.start()
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.built_at < self._stale_since:
+            return None
+        if catalog_version is not None and snapshot.catalog_version != catalog_version:
+            if self._watcher is None and (snapshot.catalog_version or 0) < catalog_version:
+                self._wakeup.set() # written by another process
+            return None
+        return snapshot
+
+    def query(self, catalog_version: Optional[int], *args, **kwargs) -> Optional[Tuple[int, List[uuid.UUID]]]:
+        """
+        Evaluates a catalog query on the snapshot of the given catalog version,
+        see CatalogSnapshot.query; None if there is none right now.
+        """
+        snapshot = self.current(catalog_version)
+        if snapshot is None:
+            return None
+        return snapshot.query(*args, **kwargs)
+
+
+@lru_cache
+def get_catalog_engine() -> CatalogEngine:
+    return CatalogEngine(
+        refresh_seconds=settings.CATALOG_ENGINE_REFRESH_SECONDS,
+        snapshot_directory=settings.CATALOG_SNAPSHOT_DIR,
+        check_seconds=settings.CATALOG_SNAPSHOT_CHECK_SECONDS,
+    )
+
+
+# registered on import; src.main imports this module at startup when the engine is enabled
+@on_catalog_commit
+def _refresh_on_write(changes):
+    if settings.CATALOG_ENGINE_ENABLED:
+        get_catalog_engine().mark_stale()
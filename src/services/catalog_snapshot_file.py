@@ -0,0 +1,191 @@
+"""
+Shared, memory-mapped, read-only catalog snapshot files.
+
+One builder process (src.scripts.build_catalog_snapshot) writes CatalogSnapshot
+arrays into `<directory>/catalog-<generation>.snap` and atomically repoints the
+`<directory>/current` symlink. Worker processes mmap the current file and use
+the arrays zero-copy, so all workers on a host share the same page cache pages
+and a new worker is warm as soon as it maps the file.
+
+File layout:
+    8 bytes   magic b"CATSNAP1"
+    8 bytes   header length (little-endian uint64)
+    N bytes   JSON header: generation, built_at, catalog_version, exact, arrays {name: dtype, shape, offset}
+    padding   to a 64-byte boundary, then the arrays, each 64-byte aligned
+"""
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import time
+import uuid
+from typing import Dict, List, Optional
+from .catalog_engine import CatalogSnapshot, bytes_to_uid, np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CATSNAP1"
+ALIGNMENT = 64
+CURRENT_LINK = "current"
+FILE_PATTERN = re.compile(r"^catalog-(\d+)\.snap$")
+ARRAY_FIELDS = (
+    "uids",
+    "names_lower",
+    "name_order",
+    "int_property_uids",
+    "int_values",
+    "int_mask",
+    "list_property_uids",
+    "list_codes",
+    "list_value_uids",
+    "list_value_columns",
+    "postings_offsets",
+    "postings",
+)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _uids_array(uids: List[uuid.UUID]) -> "np.ndarray":
+    return np.array([uid.bytes for uid in uids], dtype="S16")
+
+
+def _snapshot_arrays(snapshot: CatalogSnapshot) -> Dict[str, "np.ndarray"]:
+    arrays = {}
+    for name in ARRAY_FIELDS:
+        value = getattr(snapshot, name)
+        if name in ("int_property_uids", "list_property_uids"):
+            value = _uids_array(value)
+        arrays[name] = np.ascontiguousarray(value)
+    return arrays
+
+
+def current_generation(directory: str) -> int:
+    """
+    Generation the `current` link points to, or 0 if there is none yet.
+    """
+    try:
+        target = os.readlink(os.path.join(directory, CURRENT_LINK))
+    except OSError:
+        return 0
+    match = FILE_PATTERN.match(os.path.basename(target))
+    return int(match.group(1)) if match else 0
+
+
+def write_snapshot(snapshot: CatalogSnapshot, directory: str, keep: int = 2) -> str:
+    """
+    Writes the snapshot as the next generation and atomically makes it current.
+    Older generations beyond `keep` are unlinked; workers still mapping them keep
+    their pages until they switch. Returns the path of the written file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    generation = current_generation(directory) + 1
+    arrays = _snapshot_arrays(snapshot)
+
+    descriptors = {}
+    offset = 0
+    for name, array in arrays.items():
+        descriptors[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({
+        "generation": generation,
+        "built_at": snapshot.built_at,
+        "catalog_version": snapshot.catalog_version,
+        "exact": snapshot.exact,
+        "arrays": descriptors,
+    }).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    path = os.path.join(directory, f"catalog-{generation}.snap")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + descriptors[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    link_tmp = os.path.join(directory, f".{CURRENT_LINK}.{os.getpid()}")
+    if os.path.lexists(link_tmp):
+        os.unlink(link_tmp)
+    os.symlink(os.path.basename(path), link_tmp)
+    os.replace(link_tmp, os.path.join(directory, CURRENT_LINK))
+
+    generations = sorted(
+        int(match.group(1)) for match in map(FILE_PATTERN.match, os.listdir(directory)) if match
+    )
+    for old in generations[:-keep] if keep > 0 else []:
+        os.unlink(os.path.join(directory, f"catalog-{old}.snap"))
+    return path
+
+
+def open_snapshot(path: str) -> CatalogSnapshot:
+    """
+    Maps a snapshot file read-only and wraps its arrays without copying them.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a catalog snapshot file.")
+    (header_length,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+    header_start = len(MAGIC) + 8
+    header = json.loads(buffer[header_start:header_start + header_length])
+    data_start = _align(header_start + header_length)
+
+    arrays = {}
+    for name, descriptor in header["arrays"].items():
+        dtype = np.dtype(descriptor["dtype"])
+        shape = tuple(descriptor["shape"])
+        count = int(np.prod(shape)) if shape else 1
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + descriptor["offset"]).reshape(shape)
+
+    arrays["int_property_uids"] = [bytes_to_uid(raw) for raw in arrays["int_property_uids"].tolist()]
+    arrays["list_property_uids"] = [bytes_to_uid(raw) for raw in arrays["list_property_uids"].tolist()]
+    return CatalogSnapshot(
+        **arrays,
+        exact=header["exact"],
+        generation=header["generation"],
+        built_at=header["built_at"],
+        catalog_version=header.get("catalog_version"), # files written before it was recorded have none
+    )
+
+
+class SnapshotFileWatcher:
+    """
+    Follows the `current` link of a snapshot directory and remaps when the
+    builder publishes a new generation. Checks at most every `check_seconds`.
+    """
+
+    def __init__(self, directory: str, check_seconds: float):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+
+    def poll(self) -> Optional[CatalogSnapshot]:
+        """
+        Returns the current snapshot, switching to a newer generation if one was published.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return self.snapshot
+        self._checked_at = now
+        generation = current_generation(self.directory)
+        if generation and (self.snapshot is None or generation != self.snapshot.generation):
+            path = os.path.join(self.directory, f"catalog-{generation}.snap")
+            try:
+                self.snapshot = open_snapshot(path)
+            except (OSError, ValueError):
+                logger.exception("Could not map catalog snapshot %s", path)
+            else:
+                logger.info("Mapped catalog snapshot generation %d (%d products)", generation, self.snapshot.product_count)
+        return self.snapshot
@@ -0,0 +1,60 @@
+"""
+Wakes long-polling /changes requests when this process commits catalog changes.
+
+Commits happen on whatever thread ran the transaction (request handlers, the
+group committer), so waiters are woken through their event loop with
+call_soon_threadsafe. Changes committed by other processes are picked up by
+the periodic re-check in the endpoint.
+"""
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Set, Tuple
+from src.db.events import on_catalog_commit
+
+
+class ChangeNotifier:
+    def __init__(self):
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+        self._lock = threading.Lock()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Waits until the next local commit or the timeout. Returns True if woken by a commit.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def notify(self):
+        with self._lock:
+            waiters, self._waiters = self._waiters, set()
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError: # the loop was closed meanwhile
+                pass
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+@lru_cache
+def get_change_notifier() -> ChangeNotifier:
+    return ChangeNotifier()
+
+
+@on_catalog_commit
+def _notify_waiters(changes):
+    get_change_notifier().notify()
@@ -0,0 +1,231 @@
+"""
+Compilation of /catalog/search filter trees into product queries.
+
+A tree is an AND / OR / NOT of property predicates (any of a LIST property's
+values, an INT range) and name matches; a predicate on a property means "has
+a value that ...", as the query-string filters of GET /catalog/. The tree is
+normalized first: nested ANDs and ORs are flattened, double negations dropped
+and LIST predicates on one property under the same OR merged into one IN list.
+Then every node gets the plan that suits it:
+- AND: its property predicates go through the filter planner
+  (src/services/filter_planner.py) like query-string filters, so an AND of
+  predicates gets the same EXISTS chain, driving semi-join or INTERSECT as the
+  equivalent GET /catalog/ request; name matches filter the products directly,
+  nested ORs and NOTs become further conditions;
+- OR: Product.id IN a UNION of the product id sets of its branches, i.e. one
+  index scan of product_property_values per branch, instead of an OR of EXISTS
+  subqueries that can only be checked product by product;
+- NOT: NOT EXISTS for a single predicate, otherwise Product.id NOT IN the
+  product id set of its condition.
+"""
+import uuid
+from typing import Any, Dict, Iterator, List, Union
+from fastapi import HTTPException, status
+from sqlalchemy import select, union, and_, or_
+from sqlalchemy.orm import Session, aliased
+from src.core.config import settings
+from src.db.models import Product, ProductPropertyValue, Property
+from src.schemas import (
+    AndFilterSchema,
+    FilterExpression,
+    ListFilterSchema,
+    NameFilterSchema,
+    NotFilterSchema,
+    OrFilterSchema,
+    PropertyTypeEnum,
+    RangeFilterSchema,
+)
+from src.services.filter_planner import apply_filters, filter_conditions, plan_filters
+
+Predicate = Union[ListFilterSchema, RangeFilterSchema]
+PREDICATES = (ListFilterSchema, RangeFilterSchema)
+
+
+def predicates(expression: FilterExpression) -> Iterator[Predicate]:
+    if isinstance(expression, PREDICATES):
+        yield expression
+    elif isinstance(expression, NotFilterSchema):
+        yield from predicates(expression.condition)
+    elif isinstance(expression, (AndFilterSchema, OrFilterSchema)):
+        for condition in expression.conditions:
+            yield from predicates(condition)
+
+
+def depth(expression: FilterExpression) -> int:
+    if isinstance(expression, NotFilterSchema):
+        return 1 + depth(expression.condition)
+    if isinstance(expression, (AndFilterSchema, OrFilterSchema)):
+        return 1 + max(depth(condition) for condition in expression.conditions)
+    return 1
+
+
+def check_search_limits(expression: FilterExpression):
+    """
+    Raises HTTPException(400) when a filter tree exceeds the configured limits:
+    every predicate counts as one filter, and the nesting depth is capped.
+    """
+    tree_predicates = list(predicates(expression))
+    if len(tree_predicates) > settings.CATALOG_MAX_FILTERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many filter predicates: {len(tree_predicates)}, at most {settings.CATALOG_MAX_FILTERS} are allowed.",
+        )
+    for predicate in tree_predicates:
+        if isinstance(predicate, ListFilterSchema) and len(predicate.values) > settings.CATALOG_MAX_LIST_VALUES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many values for property {predicate.property}: {len(predicate.values)}, at most {settings.CATALOG_MAX_LIST_VALUES} are allowed.",
+            )
+    if depth(expression) > settings.CATALOG_SEARCH_MAX_DEPTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Filter is nested too deeply, at most {settings.CATALOG_SEARCH_MAX_DEPTH} levels are allowed.",
+        )
+
+
+def normalize(expression: FilterExpression) -> FilterExpression:
+    """
+    Flattens nested ANDs and ORs, removes double negations and merges LIST
+    predicates on the same property under one OR.
+    """
+    if isinstance(expression, NotFilterSchema):
+        condition = normalize(expression.condition)
+        if isinstance(condition, NotFilterSchema):
+            return condition.condition
+        return NotFilterSchema(condition=condition)
+    if not isinstance(expression, (AndFilterSchema, OrFilterSchema)):
+        return expression
+
+    kind = type(expression)
+    conditions = []
+    for condition in map(normalize, expression.conditions):
+        conditions.extend(condition.conditions if isinstance(condition, kind) else [condition])
+    if kind is OrFilterSchema:
+        merged: Dict[uuid.UUID, ListFilterSchema] = {}
+        for index, condition in enumerate(conditions):
+            if not isinstance(condition, ListFilterSchema):
+                continue
+            if condition.property in merged:
+                first = merged[condition.property]
+                first.values = list(dict.fromkeys(first.values + condition.values))
+                conditions[index] = None
+            else:
+                merged[condition.property] = conditions[index] = condition.model_copy()
+        conditions = [condition for condition in conditions if condition is not None]
+    if len(conditions) == 1:
+        return conditions[0]
+    return kind(conditions=conditions)
+
+
+def name_match(expression: NameFilterSchema):
+    return Product.name.ilike(f"%{expression.name}%")
+
+
+class FilterCompiler:
+    """
+    Turns a filter tree into conditions on a Product query; see the module docstring.
+    Resolves and validates the tree's properties on construction.
+    """
+
+    def __init__(self, session: Session, expression: FilterExpression):
+        self.db = session
+        self.expression = normalize(expression)
+        property_uids = {predicate.property for predicate in predicates(self.expression)}
+        self.properties = {}
+        if property_uids:
+            self.properties = {
+                row.uid: row
+                for row in session.execute(
+                    select(Property.uid, Property.id, Property.type).where(Property.uid.in_(property_uids))
+                ).all()
+            }
+        for predicate in predicates(self.expression):
+            self._validate(predicate)
+
+    def _validate(self, predicate: Predicate):
+        prop = self.properties.get(predicate.property)
+        if prop is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Property with UID {predicate.property} used in filter does not exist.",
+            )
+        if isinstance(predicate, ListFilterSchema) and prop.type != PropertyTypeEnum.LIST:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Property {predicate.property} is an INT property, filter it with 'from' and 'to'.",
+            )
+        if isinstance(predicate, RangeFilterSchema):
+            if prop.type != PropertyTypeEnum.INT:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Property {predicate.property} is a LIST property, filter it with 'values'.",
+                )
+            if predicate.int_from is None and predicate.int_to is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Range filter on property {predicate.property} needs 'from' or 'to'.",
+                )
+
+    def apply(self, query: select) -> select:
+        """Adds the tree's conditions to a product query."""
+        if isinstance(self.expression, AndFilterSchema):
+            return self._apply_and(query, self.expression.conditions)
+        return self._apply_and(query, [self.expression])
+
+    @staticmethod
+    def _filter_data(predicate: Predicate) -> Dict[str, Any]:
+        """The predicate in the shape of parse_property_filters' output, for the filter planner."""
+        if isinstance(predicate, ListFilterSchema):
+            return {"list_values": predicate.values, "int_from": None, "int_to": None}
+        return {"list_values": [], "int_from": predicate.int_from, "int_to": predicate.int_to}
+
+    def _predicate_conditions(self, ppv, predicate: Predicate) -> list:
+        prop = self.properties[predicate.property]
+        return filter_conditions(ppv, prop.type, prop.id, self._filter_data(predicate))
+
+    def _apply_and(self, query: select, conditions: List[FilterExpression]) -> select:
+        property_filters: Dict[uuid.UUID, Dict[str, Any]] = {}
+        nested = []
+        for condition in conditions:
+            if isinstance(condition, NameFilterSchema):
+                query = query.where(name_match(condition))
+            elif isinstance(condition, PREDICATES) and condition.property not in property_filters:
+                property_filters[condition.property] = self._filter_data(condition)
+            else: # ORs, NOTs and further predicates on an already filtered property
+                nested.append(condition)
+        if property_filters:
+            prop_type_map = {uid: self.properties[uid].type for uid in property_filters}
+            prop_id_map = {uid: self.properties[uid].id for uid in property_filters}
+            query = apply_filters(query, plan_filters(property_filters, prop_type_map, prop_id_map))
+        for condition in nested:
+            query = query.where(self._condition(condition))
+        return query
+
+    def _condition(self, expression: FilterExpression):
+        """A condition on the Product row of the enclosing query."""
+        if isinstance(expression, NameFilterSchema):
+            return name_match(expression)
+        if isinstance(expression, PREDICATES):
+            ppv = aliased(ProductPropertyValue)
+            return select(1).select_from(ppv).where(ppv.product_id == Product.id, *self._predicate_conditions(ppv, expression)).exists()
+        if isinstance(expression, NotFilterSchema):
+            condition = expression.condition
+            if isinstance(condition, NameFilterSchema): # products without a name do not match it either
+                return or_(Product.name.is_(None), ~name_match(condition))
+            if isinstance(condition, PREDICATES):
+                return ~self._condition(condition)
+            return Product.id.not_in(self._product_ids(condition))
+        return Product.id.in_(self._product_ids(expression))
+
+    def _product_ids(self, expression: FilterExpression) -> select:
+        """A query of the ids of the products matching the expression."""
+        if isinstance(expression, PREDICATES):
+            ppv = aliased(ProductPropertyValue)
+            return select(ppv.product_id).where(and_(*self._predicate_conditions(ppv, expression)))
+        if isinstance(expression, OrFilterSchema):
+            return union(*[self._product_ids(condition) for condition in expression.conditions])
+        # its own products, not correlated with the enclosing query's
+        products = select(Product.id).correlate(None)
+        if isinstance(expression, AndFilterSchema):
+            return self._apply_and(products, expression.conditions)
+        return products.where(self._condition(expression))
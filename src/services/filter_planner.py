@@ -0,0 +1,290 @@
+"""
+Selectivity-aware planning of catalog property filters.
+
+build_filtered_product_query used to append one EXISTS per filter in query
+string order. With many filters on skewed data that order (and Postgres'
+estimates for correlated EXISTS) often produces poor plans. The planner
+estimates how many products each filter matches from cached per-value
+statistics, orders the filters most selective first and picks a strategy:
+
+- exists:    EXISTS chain in selectivity order (default, good for 1-2 filters)
+- driving:   semi-join on the product set of the most selective filter, EXISTS for the rest
+- intersect: INTERSECT of the product_id sets of all filters
+"""
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, func, and_, intersect, text
+from sqlalchemy.orm import Session, aliased
+from src.core.config import settings
+from src.db.models import Product, ProductPropertyValue, Property, PropertyListValue
+from src.schemas import PropertyTypeEnum
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("exists", "driving", "intersect")
+# most common values of a product_property_values column: one row, the table in the current
+# schema, and for the partitioned table the statistics over all partitions (inherited)
+PG_STATS_MCV = text(
+    "SELECT most_common_vals::text::int[] AS vals, most_common_freqs AS freqs FROM pg_stats "
+    "WHERE schemaname = current_schema() AND tablename = 'product_property_values' AND attname = :attname "
+    "AND inherited = (SELECT relkind = 'p' FROM pg_class WHERE oid = 'product_property_values'::regclass)"
+)
+
+
+@dataclass
+class PropertyStats:
+    """Distinct products having the property and, for INT properties, the value range."""
+    product_count: int
+    min_value: Optional[int] = None
+    max_value: Optional[int] = None
+
+
+class FilterStatistics:
+    """
+    Per-value cardinalities used for selectivity estimates.
+
+    Collected either exactly from the same aggregates as the catalog facets
+    (source 'facets', a full scan of product_property_values) or approximately
+    from pg_stats (source 'pg_stats', cheap on very large tables). Requests never
+    wait for them: they are loaded by a background thread, started at warmup or
+    by the first filtered request, and reloaded the same way once they are older
+    than FILTER_STATS_TTL_SECONDS. Until the first load finishes, filters are
+    planned without estimates (query-string order, EXISTS).
+    """
+
+    def __init__(self, ttl_seconds: float, source: str):
+        self.ttl_seconds = ttl_seconds
+        self.source = source
+        self.product_count = 0
+        self.value_counts: Dict[uuid.UUID, int] = {}
+        self.property_stats: Dict[uuid.UUID, PropertyStats] = {}
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def refresh_if_stale(self) -> bool:
+        """
+        Starts a background reload when the statistics are missing or expired and
+        no reload is running. Returns whether statistics are available.
+        """
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl_seconds:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, name="filter-stats-refresh", daemon=True).start()
+        return self.loaded
+
+    def _refresh_in_background(self):
+        from src.db.base import SessionLocal
+        try:
+            with SessionLocal() as session:
+                self.load(session)
+        except Exception:
+            logger.exception("Filter statistics refresh failed")
+        finally:
+            self._refreshing = False
+
+    def load(self, session: Session):
+        """
+        Reloads the statistics from the configured source.
+        """
+        if self.source == "pg_stats" and session.get_bind().dialect.name == "postgresql":
+            self._load_from_pg_stats(session)
+        else:
+            self._load_from_facets(session)
+        self.loaded_at = time.monotonic()
+
+    def _load_from_facets(self, session: Session):
+        product_count = session.execute(select(func.count()).select_from(Product)).scalar_one()
+        value_rows = session.execute(
+            select(PropertyListValue.value_uid, func.count(func.distinct(ProductPropertyValue.product_id)))
+            .join(PropertyListValue, ProductPropertyValue.list_value_id == PropertyListValue.id)
+            .group_by(PropertyListValue.value_uid)
+        ).all()
+        property_rows = session.execute(
+            select(
+                Property.uid,
+                func.count(func.distinct(ProductPropertyValue.product_id)),
+                func.min(ProductPropertyValue.int_value),
+                func.max(ProductPropertyValue.int_value),
+            )
+            .join(Property, ProductPropertyValue.property_id == Property.id)
+            .group_by(Property.uid)
+        ).all()
+        self.product_count = product_count
+        self.value_counts = {value_uid: count for value_uid, count in value_rows}
+        self.property_stats = {
+            prop_uid: PropertyStats(count, min_value, max_value)
+            for prop_uid, count, min_value, max_value in property_rows
+        }
+
+    def _load_from_pg_stats(self, session: Session):
+        # reltuples is the planner's row estimate; -1 means never analyzed
+        product_count = session.execute(
+            text("SELECT greatest(reltuples, 0)::bigint FROM pg_class WHERE oid = 'products'::regclass")
+        ).scalar_one()
+        # a partitioned table has no rows of its own, its partitions have them
+        ppv_rows = session.execute(text(
+            "SELECT coalesce(sum(greatest(c.reltuples, 0)), 0)::bigint FROM pg_class c "
+            "WHERE c.oid = 'product_property_values'::regclass AND c.relkind = 'r' "
+            "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'product_property_values'::regclass)"
+        )).scalar_one()
+        mcv = session.execute(PG_STATS_MCV, {"attname": "list_value_id"}).one_or_none()
+        value_counts = {}
+        if mcv and mcv.vals:
+            # the statistics are on the surrogate ids, estimates are looked up by UUID
+            value_uids = dict(session.execute(
+                select(PropertyListValue.id, PropertyListValue.value_uid).where(PropertyListValue.id.in_(mcv.vals))
+            ).all())
+            value_counts = {
+                value_uids[value_id]: int(freq * ppv_rows)
+                for value_id, freq in zip(mcv.vals, mcv.freqs)
+                if value_id in value_uids
+            }
+        property_mcv = session.execute(PG_STATS_MCV, {"attname": "property_id"}).one_or_none()
+        property_stats = {}
+        if property_mcv and property_mcv.vals:
+            prop_uids = dict(session.execute(
+                select(Property.id, Property.uid).where(Property.id.in_(property_mcv.vals))
+            ).all())
+            property_stats = {
+                prop_uids[prop_id]: PropertyStats(int(freq * ppv_rows))
+                for prop_id, freq in zip(property_mcv.vals, property_mcv.freqs)
+                if prop_id in prop_uids
+            }
+        self.product_count = product_count
+        self.value_counts = value_counts
+        self.property_stats = property_stats
+
+    def estimate(self, prop_uid: uuid.UUID, prop_type: str, filter_data: Dict[str, Any]) -> float:
+        """
+        Estimated number of products matching one property filter.
+        Values and properties missing from the statistics get average estimates.
+        """
+        prop_stats = self.property_stats.get(prop_uid)
+        prop_count = prop_stats.product_count if prop_stats else self.product_count
+        if prop_type == PropertyTypeEnum.LIST:
+            default = prop_count / max(len(self.value_counts), 1)
+            return min(prop_count, sum(self.value_counts.get(value_uid, default) for value_uid in filter_data["list_values"]))
+
+        if not prop_stats or prop_stats.min_value is None or prop_stats.max_value is None:
+            return prop_count / 3 # the classic default range selectivity
+        low = prop_stats.min_value if filter_data["int_from"] is None else max(filter_data["int_from"], prop_stats.min_value)
+        high = prop_stats.max_value if filter_data["int_to"] is None else min(filter_data["int_to"], prop_stats.max_value)
+        if high < low:
+            return 0
+        width = prop_stats.max_value - prop_stats.min_value + 1
+        return prop_count * (high - low + 1) / width
+
+
+@dataclass
+class PlannedFilter:
+    prop_uid: uuid.UUID
+    prop_id: int
+    prop_type: str
+    filter_data: Dict[str, Any]
+    estimate: float
+
+
+@lru_cache
+def get_filter_statistics() -> FilterStatistics:
+    return FilterStatistics(settings.FILTER_STATS_TTL_SECONDS, settings.FILTER_STATS_SOURCE)
+
+
+def filter_conditions(ppv, prop_type: str, prop_id: int, filter_data: Dict[str, Any]) -> Optional[list]:
+    """
+    WHERE conditions on a ProductPropertyValue alias for one filter, or None if
+    the filter has no usable values for the property's type and is skipped.
+    The property is given by its surrogate id so the partition is known at plan time.
+    """
+    conditions = [ppv.property_id == prop_id]
+    if prop_type == PropertyTypeEnum.INT:
+        if filter_data["int_from"] is None and filter_data["int_to"] is None:
+            return None # Skip if _from/_to keys present but no valid values parsed
+        if filter_data["int_from"] is not None:
+            conditions.append(ppv.int_value >= filter_data["int_from"])
+        if filter_data["int_to"] is not None:
+            conditions.append(ppv.int_value <= filter_data["int_to"])
+    elif prop_type == PropertyTypeEnum.LIST:
+        if not filter_data["list_values"]:
+            return None # Skip if property_uid key present but no valid list values parsed
+        list_value_ids = select(PropertyListValue.id).where(PropertyListValue.value_uid.in_(filter_data["list_values"]))
+        conditions.append(ppv.list_value_id.in_(list_value_ids))
+    return conditions
+
+
+def plan_filters(
+    property_filters: Dict[uuid.UUID, Dict[str, Any]],
+    prop_type_map: Dict[uuid.UUID, str],
+    prop_id_map: Dict[uuid.UUID, int],
+) -> List[PlannedFilter]:
+    """
+    Drops filters that do not apply and orders the rest by estimated matches, most selective first.
+    """
+    planned = [
+        PlannedFilter(prop_uid, prop_id_map[prop_uid], prop_type_map[prop_uid], filter_data, 0.0)
+        for prop_uid, filter_data in property_filters.items()
+        if filter_conditions(ProductPropertyValue, prop_type_map[prop_uid], prop_id_map[prop_uid], filter_data) is not None
+    ]
+    if len(planned) < 2 or settings.FILTER_PLANNER == "off":
+        return planned
+    statistics = get_filter_statistics()
+    if not statistics.refresh_if_stale():
+        return planned
+    for planned_filter in planned:
+        planned_filter.estimate = statistics.estimate(planned_filter.prop_uid, planned_filter.prop_type, planned_filter.filter_data)
+    return sorted(planned, key=lambda planned_filter: planned_filter.estimate)
+
+
+def choose_strategy(planned: List[PlannedFilter]) -> str:
+    """
+    'exists' for up to two filters, 'driving' when the most selective filter
+    matches a small fraction of the catalog, otherwise 'intersect'.
+    A strategy can be forced with FILTER_PLANNER.
+    """
+    if settings.FILTER_PLANNER in STRATEGIES:
+        return settings.FILTER_PLANNER
+    if settings.FILTER_PLANNER == "off" or len(planned) < 3 or not get_filter_statistics().loaded:
+        return "exists"
+    product_count = get_filter_statistics().product_count
+    if product_count and planned[0].estimate <= product_count * settings.FILTER_PLANNER_DRIVING_FRACTION:
+        return "driving"
+    return "intersect"
+
+
+def _product_ids(planned_filter: PlannedFilter):
+    ppv = aliased(ProductPropertyValue)
+    conditions = filter_conditions(ppv, planned_filter.prop_type, planned_filter.prop_id, planned_filter.filter_data)
+    return select(ppv.product_id).where(and_(*conditions))
+
+
+def _exists(planned_filter: PlannedFilter):
+    ppv = aliased(ProductPropertyValue)
+    conditions = filter_conditions(ppv, planned_filter.prop_type, planned_filter.prop_id, planned_filter.filter_data)
+    return select(1).select_from(ppv).where(ppv.product_id == Product.id, *conditions).exists()
+
+
+def apply_filters(query: select, planned: List[PlannedFilter], strategy: Optional[str] = None) -> select:
+    """
+    Adds the planned filters to a product query using the chosen strategy.
+    """
+    if not planned:
+        return query
+    strategy = strategy or choose_strategy(planned)
+    if strategy == "intersect" and len(planned) > 1:
+        return query.where(Product.id.in_(intersect(*[_product_ids(planned_filter) for planned_filter in planned])))
+    if strategy == "driving":
+        driving, planned = planned[0], planned[1:]
+        query = query.where(Product.id.in_(_product_ids(driving)))
+    for planned_filter in planned:
+        query = query.where(_exists(planned_filter))
+    return query
@@ -0,0 +1,143 @@
+"""
+Group commit for write bursts.
+
+Concurrent writes submitted to the GroupCommitter are run by one background
+thread in a shared transaction and committed together, so a burst of N
+creates pays for one commit (one WAL flush) instead of N. A batch is closed
+once it holds `max_batch` operations or its first operation has waited
+`max_wait_seconds`.
+
+Operations are callables taking the batch session. An operation may reject
+its input with HTTPException as long as it has not written anything yet
+(e.g. validation errors, or a conflict detected by ON CONFLICT DO NOTHING);
+the rest of the batch goes on. If an operation fails in the database, or the
+commit fails, the batch is rolled back and every operation is retried in its
+own transaction, so one bad request never fails its neighbours.
+
+Operations carry the deadline of the request that submitted them
+(src/db/deadline.py). One whose deadline passed while it was queued fails with
+DeadlineExceeded without running; a batch runs under the earliest deadline of
+its operations, and the one-by-one retries under each operation's own. The
+committer uses one connection at a time, so it needs no admission slot.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.db.deadline import DeadlineExceeded, set_deadline
+
+logger = logging.getLogger(__name__)
+
+Operation = Callable[[Session], Any]
+
+_STOP = object()
+
+
+class _BatchAborted(Exception):
+    pass
+
+
+class GroupCommitter:
+    def __init__(self, max_batch: int, max_wait_seconds: float, session_factory: Optional[Callable[[], Session]] = None):
+        if session_factory is None:
+            from src.db.base import SessionLocal
+            session_factory = SessionLocal
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_seconds
+        self.session_factory = session_factory
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: Operation, deadline: Optional[float] = None) -> Future:
+        """
+        Queues an operation; the future resolves with its result once the batch is committed.
+        `deadline` is a time.monotonic() value, usually the request session's get_deadline().
+        """
+        future = Future()
+        self._queue.put((operation, future, deadline))
+        return future
+
+    def close(self):
+        """
+        Commits what is queued and stops the worker thread.
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch: List[Tuple[Operation, Future, Optional[float]]]):
+        now = time.monotonic()
+        for operation, future, deadline in batch:
+            if deadline is not None and deadline <= now:
+                future.set_exception(DeadlineExceeded("Request deadline exceeded while waiting for the group commit."))
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+        deadlines = [deadline for _, _, deadline in batch if deadline is not None]
+        results = []
+        try:
+            with self.session_factory() as session:
+                set_deadline(session, min(deadlines, default=None))
+                for operation, future, _ in batch:
+                    try:
+                        results.append((future, operation(session), None))
+                    except HTTPException as error:
+                        if isinstance(error.__cause__, SQLAlchemyError):
+                            raise _BatchAborted() from error
+                        results.append((future, None, error))
+                    except Exception as error:
+                        raise _BatchAborted() from error
+                session.commit()
+        except Exception:
+            logger.warning("Group commit of %d operations failed, retrying them one by one", len(batch), exc_info=True)
+            for operation, future, deadline in batch:
+                self._commit_one(operation, future, deadline)
+            return
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _commit_one(self, operation: Operation, future: Future, deadline: Optional[float]):
+        try:
+            with self.session_factory() as session:
+                set_deadline(session, deadline)
+                result = operation(session)
+                session.commit()
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+@lru_cache
+def get_group_committer() -> GroupCommitter:
+    return GroupCommitter(settings.GROUP_COMMIT_MAX_BATCH, settings.GROUP_COMMIT_MAX_WAIT_MS / 1000)
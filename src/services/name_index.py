@@ -0,0 +1,185 @@
+"""
+In-process prefix index over product names for /catalog/suggest.
+
+Names are kept lower-cased in one sorted list of (folded name, uid) keys, so a
+prefix lookup is a binary search plus a short forward scan, and products with
+the same name always come out in uid order. suggest_query() is the same lookup
+in SQL, for when the index is disabled or still loading. Writes committed by
+this process are applied by a background thread right after commit; the index
+is also rebuilt every `refresh_seconds` to pick up writes made by other
+processes.
+"""
+import bisect
+import logging
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.db.events import on_catalog_commit
+from src.db.sharding import scatter
+from src.db.models import Product
+
+logger = logging.getLogger(__name__)
+
+# above this many pending changes a rebuild is cheaper than shifting the list per change
+MAX_INCREMENTAL_CHANGES = 1000
+
+
+def fold(text: str) -> str:
+    # lower() rather than casefold(), which SQL has no equivalent of ("ß" would fold to "ss");
+    # PostgreSQL lowers the same characters, SQLite only ASCII
+    return text.lower()
+
+
+def suggest_query(prefix: str, limit: int, dialect_name: str) -> Select:
+    """
+    ProductNameIndex.suggest() as a query: names whose lower-cased form starts with
+    the folded prefix, ordered by that form compared by code point, then by uid.
+    """
+    folded_name = func.lower(Product.name)
+    if dialect_name == "postgresql":
+        # the database collation need not compare by code point like the index's sort does
+        folded_name = folded_name.collate("C")
+    return (
+        select(Product.uid, Product.name)
+        .where(folded_name.startswith(fold(prefix), autoescape=True))
+        .order_by(folded_name, Product.uid)
+        .limit(limit)
+    )
+
+
+class ProductNameIndex:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.ready = False
+        self.built_at = 0.0
+        self._keys: List[Tuple[str, uuid.UUID]] = []
+        self._names: Dict[uuid.UUID, str] = {}
+        self._pending: Set[uuid.UUID] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[uuid.UUID, str]]:
+        """
+        Returns up to `limit` (uid, name) pairs whose name starts with `prefix`
+        (case-insensitive), ordered by name and then uid.
+        """
+        folded = fold(prefix)
+        suggestions = []
+        with self._lock:
+            keys, names = self._keys, self._names
+            position = bisect.bisect_left(keys, (folded,))
+            while position < len(keys) and len(suggestions) < limit:
+                key, uid = keys[position]
+                if not key.startswith(folded):
+                    break
+                suggestions.append((uid, names[uid]))
+                position += 1
+        return suggestions
+
+    def load(self, session: Session):
+        """
+        Rebuilds the index from all products, on every catalog shard.
+        """
+        started = time.perf_counter()
+        built_at = time.time()
+        query = select(Product.uid, Product.name).where(Product.name.is_not(None))
+        names = {
+            row.uid: row.name
+            for rows in scatter(session, lambda shard_session: shard_session.execute(query).all())
+            for row in rows
+        }
+        keys = sorted((fold(name), uid) for uid, name in names.items())
+        with self._lock:
+            self._keys, self._names = keys, names
+            self.built_at = built_at
+            self.ready = True
+        logger.info("Product name index loaded: %d names in %.1f ms", len(keys), (time.perf_counter() - started) * 1000)
+
+    def apply(self, session: Session, product_uids: Iterable[uuid.UUID]):
+        """
+        Re-reads the names of the given products and updates their entries;
+        products that no longer exist (or have no name) are removed.
+        """
+        product_uids = list(product_uids)
+        query = select(Product.uid, Product.name).where(Product.uid.in_(product_uids), Product.name.is_not(None))
+        current = {
+            uid: name
+            for rows in scatter(session, lambda shard_session: shard_session.execute(query).all())
+            for uid, name in rows
+        }
+        with self._lock:
+            for uid in product_uids:
+                old_name, new_name = self._names.get(uid), current.get(uid)
+                if old_name == new_name:
+                    continue
+                if old_name is not None:
+                    position = bisect.bisect_left(self._keys, (fold(old_name), uid))
+                    del self._keys[position]
+                    del self._names[uid]
+                if new_name is not None:
+                    bisect.insort(self._keys, (fold(new_name), uid))
+                    self._names[uid] = new_name
+
+    def mark_changed(self, product_uids: Iterable[uuid.UUID]):
+        """
+        Queues products written by a committed transaction for the background thread.
+        """
+        with self._lock:
+            self._pending.update(product_uids)
+        self._wakeup.set()
+
+    def start(self):
+        """
+        Starts the background thread once.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="product-name-index", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        from src.db.base import SessionLocal, close_shard_sessions
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                pending, self._pending = self._pending, set()
+            try:
+                with SessionLocal() as session:
+                    try:
+                        if (
+                            not self.ready
+                            or len(pending) > MAX_INCREMENTAL_CHANGES
+                            or time.time() - self.built_at >= self.refresh_seconds
+                        ):
+                            self.load(session)
+                        elif pending:
+                            self.apply(session, pending)
+                    finally:
+                        close_shard_sessions(session)
+            except Exception:
+                logger.exception("Product name index update failed")
+                with self._lock:
+                    self._pending.update(pending)
+            timeout = max(0.0, self.built_at + self.refresh_seconds - time.time()) if self.ready else self.refresh_seconds
+            self._wakeup.wait(timeout=timeout)
+
+
+@lru_cache
+def get_product_name_index() -> ProductNameIndex:
+    index = ProductNameIndex(settings.SUGGEST_INDEX_REFRESH_SECONDS)
+    index.start()
+    return index
+
+
+@on_catalog_commit
+def _update_on_write(changes):
+    product_uids = changes.products | changes.deleted_products
+    # nothing to update before the first suggest request created the index
+    if product_uids and get_product_name_index.cache_info().currsize:
+        get_product_name_index().mark_changed(product_uids)
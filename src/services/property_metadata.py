@@ -0,0 +1,115 @@
+"""
+In-process cache of property and list value metadata used to validate product writes.
+
+Product creation validates every property value against the properties and
+list values tables; with this cache the fast write path does it without a
+round trip. Entries are loaded on first use (only the UIDs a request asks
+for) and the whole cache is dropped when a transaction in this process
+changes properties.
+
+Changes made by other processes are not seen until then, so callers treat the
+cache as a hint: input the cached metadata rejects is checked again against
+freshly loaded entries (forget(), then lookup()), and a property or list value
+deleted or re-created elsewhere (re-created ones get a new id) is caught by the
+foreign keys on insert, after which the caller invalidates the cache and retries
+in a new transaction.
+"""
+import threading
+import uuid
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.db.events import on_catalog_commit
+from src.db.models import Property, PropertyListValue
+
+
+class PropertyMetadata(NamedTuple):
+    uid: uuid.UUID
+    id: int
+    name: str
+    type: str
+
+
+class ListValueMetadata(NamedTuple):
+    value_uid: uuid.UUID
+    id: int
+    property_uid: uuid.UUID
+    value: str
+
+
+class PropertyMetadataCache:
+    def __init__(self):
+        self._properties: Dict[uuid.UUID, PropertyMetadata] = {}
+        self._list_values: Dict[uuid.UUID, ListValueMetadata] = {}
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        session: Session,
+        property_uids: Iterable[uuid.UUID],
+        list_value_uids: Iterable[uuid.UUID],
+    ) -> Tuple[Dict[uuid.UUID, PropertyMetadata], Dict[uuid.UUID, ListValueMetadata]]:
+        """
+        Returns the known properties and list values among the given UIDs,
+        loading the ones not cached yet. UIDs that do not exist are left out.
+        """
+        property_uids, list_value_uids = set(property_uids), set(list_value_uids)
+        properties, list_values = self._properties, self._list_values
+        missing_properties = property_uids - properties.keys()
+        missing_values = list_value_uids - list_values.keys()
+        if missing_properties or missing_values:
+            self._load(session, missing_properties, missing_values)
+            properties, list_values = self._properties, self._list_values
+        return (
+            {uid: properties[uid] for uid in property_uids if uid in properties},
+            {uid: list_values[uid] for uid in list_value_uids if uid in list_values},
+        )
+
+    def _load(self, session: Session, property_uids: set, list_value_uids: set):
+        loaded_properties = {}
+        if property_uids:
+            loaded_properties = {
+                row.uid: PropertyMetadata(row.uid, row.id, row.name, row.type)
+                for row in session.execute(
+                    select(Property.uid, Property.id, Property.name, Property.type).where(Property.uid.in_(property_uids))
+                ).all()
+            }
+        loaded_values = {}
+        if list_value_uids:
+            loaded_values = {
+                row.value_uid: ListValueMetadata(row.value_uid, row.id, row.property_uid, row.value)
+                for row in session.execute(
+                    select(PropertyListValue.value_uid, PropertyListValue.id, PropertyListValue.property_uid, PropertyListValue.value)
+                    .where(PropertyListValue.value_uid.in_(list_value_uids))
+                ).all()
+            }
+        with self._lock:
+            # copy-on-write, so readers never see a dict being resized
+            self._properties = {**self._properties, **loaded_properties}
+            self._list_values = {**self._list_values, **loaded_values}
+
+    def forget(self, property_uids: Iterable[uuid.UUID], list_value_uids: Iterable[uuid.UUID]):
+        """
+        Drops the given entries, so the next lookup loads them again.
+        """
+        property_uids, list_value_uids = set(property_uids), set(list_value_uids)
+        with self._lock:
+            self._properties = {uid: value for uid, value in self._properties.items() if uid not in property_uids}
+            self._list_values = {uid: value for uid, value in self._list_values.items() if uid not in list_value_uids}
+
+    def invalidate(self):
+        with self._lock:
+            self._properties = {}
+            self._list_values = {}
+
+
+@lru_cache
+def get_property_metadata_cache() -> PropertyMetadataCache:
+    return PropertyMetadataCache()
+
+
+@on_catalog_commit
+def _invalidate_on_property_change(changes):
+    if changes.properties or changes.deleted_properties:
+        get_property_metadata_cache().invalidate()
@@ -0,0 +1,60 @@
+"""
+Cost guardrails for catalog queries.
+
+Every property filter becomes another semi-join and every list value another
+IN entry, so the number of filters and list values per request is capped.
+Optionally, the catalog count query is EXPLAINed first (PostgreSQL) and
+rejected when the planner's total cost estimate is above a threshold, before
+it can hold a connection for long.
+"""
+import json
+import uuid
+from typing import Any, Dict
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.core.config import settings
+
+
+def check_filter_limits(property_filters: Dict[uuid.UUID, Dict[str, Any]]):
+    """
+    Raises HTTPException(400) when parsed property filters exceed the configured limits.
+    """
+    if len(property_filters) > settings.CATALOG_MAX_FILTERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many property filters: {len(property_filters)}, at most {settings.CATALOG_MAX_FILTERS} are allowed.",
+        )
+    for prop_uid, filter_data in property_filters.items():
+        if len(filter_data["list_values"]) > settings.CATALOG_MAX_LIST_VALUES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many values for property {prop_uid}: {len(filter_data['list_values'])}, at most {settings.CATALOG_MAX_LIST_VALUES} are allowed.",
+            )
+
+
+def estimate_cost(session: Session, query: select) -> float:
+    """
+    Planner total cost estimate of a query (PostgreSQL EXPLAIN, nothing is executed).
+    """
+    # expanding IN parameters are rendered as individual placeholders
+    compiled = query.compile(dialect=session.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+    plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return float(plan[0]["Plan"]["Total Cost"])
+
+
+def check_query_cost(session: Session, query: select):
+    """
+    Raises HTTPException(422) when the planner estimates the query above CATALOG_MAX_QUERY_COST.
+    A no-op when no threshold is set or off PostgreSQL.
+    """
+    if settings.CATALOG_MAX_QUERY_COST is None or session.get_bind().dialect.name != "postgresql":
+        return
+    cost = estimate_cost(session, query)
+    if cost > settings.CATALOG_MAX_QUERY_COST:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Query is too expensive (estimated cost {cost:.0f}, limit {settings.CATALOG_MAX_QUERY_COST:.0f}); narrow the filters.",
+        )
@@ -0,0 +1,133 @@
+"""
+Popularity of catalog query signatures.
+
+Every /catalog/ and /catalog/filter/ request that passes validation is counted
+under its signature (endpoint + sorted query string) in a count-min sketch:
+fixed memory however many distinct queries arrive, estimates never below the
+true count and above it only through hash collisions. Conservative update
+(only the smallest counters grow) keeps those collisions small. The signatures
+whose estimate is among the top K of the window are tracked next to the sketch.
+
+Every QUERY_STATS_FLUSH_SECONDS the top K of the window are added to
+catalog_query_stats and a new window starts, so the table holds popularity
+across all workers and deploys. The cache warmer (src/services/cache_warmer.py)
+reads its most popular rows.
+"""
+import datetime
+import hashlib
+import threading
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+from fastapi import Request
+from src.core.config import settings
+from src.db.base import SessionLocal
+from src.repositories import QueryStatsRepository
+
+Signature = Tuple[str, str] # (endpoint, sorted query string)
+
+
+class CountMinSketch:
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("Q", bytes(8 * width)) for _ in range(depth)]
+
+    def _indexes(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=8 * self.depth).digest()
+        return [int.from_bytes(digest[8 * row:8 * row + 8], "little") % self.width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Adds count to the item and returns its new estimate."""
+        indexes = self._indexes(item)
+        estimate = min(row[index] for row, index in zip(self.rows, indexes)) + count
+        for row, index in zip(self.rows, indexes):
+            if row[index] < estimate:
+                row[index] = estimate
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(item)))
+
+    def clear(self):
+        for row in self.rows:
+            row[:] = array("Q", bytes(8 * self.width))
+
+
+class QuerySketch:
+    """
+    Count-min sketch plus the top K signatures of the current window.
+    Recorded from the event loop, taken from a worker thread.
+    """
+
+    def __init__(self, top_k: int, width: int, depth: int):
+        self.top_k = top_k
+        self.sketch = CountMinSketch(width, depth)
+        self.top: Dict[Signature, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, query: str):
+        signature = (endpoint, query)
+        with self._lock:
+            estimate = self.sketch.add(f"{endpoint}\x1f{query}")
+            if signature in self.top or len(self.top) < self.top_k:
+                self.top[signature] = estimate
+                return
+            least = min(self.top, key=self.top.__getitem__)
+            if estimate > self.top[least]:
+                del self.top[least]
+                self.top[signature] = estimate
+
+    def most_popular(self, limit: int) -> List[Signature]:
+        with self._lock:
+            return sorted(self.top, key=self.top.__getitem__, reverse=True)[:limit]
+
+    def take(self) -> Dict[Signature, int]:
+        """Returns the window's top signatures with their estimates and starts a new window."""
+        with self._lock:
+            top, self.top = self.top, {}
+            self.sketch.clear()
+        return top
+
+
+@lru_cache
+def get_query_sketch() -> QuerySketch:
+    return QuerySketch(settings.QUERY_STATS_TOP_K, settings.QUERY_STATS_SKETCH_WIDTH, settings.QUERY_STATS_SKETCH_DEPTH)
+
+
+def record_query(request: Request, endpoint: str):
+    """
+    Counts a catalog request under its query string with parameters sorted, so
+    it can be replayed and yields the same ETag; requests made by the cache
+    warmer are not counted.
+    """
+    if settings.QUERY_STATS_ENABLED and not getattr(request.state, "cache_warmup", False):
+        get_query_sketch().record(endpoint, urlencode(sorted(request.query_params.multi_items())))
+
+
+def _retention() -> datetime.timedelta:
+    return datetime.timedelta(hours=settings.QUERY_STATS_RETENTION_HOURS)
+
+
+def flush_query_stats():
+    """
+    Adds the window's top signatures to catalog_query_stats. Snapshot read
+    nodes have no primary database and keep their window in memory only.
+    """
+    if settings.READ_BACKEND != "database":
+        return
+    top = get_query_sketch().take()
+    with SessionLocal() as session:
+        QueryStatsRepository(session).add_hits(top, _retention())
+        session.commit()
+
+
+def popular_queries(limit: int) -> List[Signature]:
+    """
+    The most popular signatures across workers, or of this worker's current window on snapshot read nodes.
+    """
+    if settings.READ_BACKEND != "database":
+        return get_query_sketch().most_popular(limit)
+    with SessionLocal() as session:
+        return QueryStatsRepository(session).most_popular(limit, _retention())
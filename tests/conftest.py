@@ -0,0 +1,79 @@
+"""
+Shared fixtures: a SQLite catalog database and the in-memory Redis stand-in
+(src.scripts.cache_server) on a free port. Run from the repo root with
+`python -m pytest tests`.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="catalog-tests-"), "catalog.db")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+CACHE_SERVER_PORT = free_port()
+# settings are read on first use, so this has to happen before anything touches them
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DATABASE_PATH}",
+    "RESULT_CACHE_BACKEND": "redis",
+    "RESULT_CACHE_URL": f"redis://127.0.0.1:{CACHE_SERVER_PORT}/0",
+    "WARMUP_ENABLED": "false",
+    "QUERY_STATS_ENABLED": "false",
+    "CACHE_WARMER_ENABLED": "false",
+})
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def database():
+    from sqlalchemy import insert
+    from src.db.base import Base, get_engine
+    from src.db.models import CatalogVersion
+    from src.repositories.version_repository import CATALOG_VERSION
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(CatalogVersion).values(name=CATALOG_VERSION, version=1))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def cache_server():
+    """The URL of a running src.scripts.cache_server, the one RESULT_CACHE_URL points at."""
+    port = CACHE_SERVER_PORT
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.scripts.cache_server", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("cache_server did not start")
+            time.sleep(0.05)
+    yield f"redis://127.0.0.1:{port}/0"
+    process.terminate()
+    process.wait(timeout=5)
+
+
+@pytest.fixture
+def client(database, cache_server):
+    from fastapi.testclient import TestClient
+    from src.main import app
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,52 @@
+"""
+Admission control in front of the request's first query: a saturated cost
+class is answered with 503 before the pool is touched, and slots are given
+back once requests finish.
+"""
+import uuid
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    from src.core.admission import get_admission_controller
+    from src.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "ADMISSION_ENABLED", True)
+    get_admission_controller.cache_clear()
+    yield get_admission_controller()
+    get_admission_controller.cache_clear()
+
+
+@pytest.fixture
+def statements(database):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(database, "before_cursor_execute", record)
+    yield executed
+    event.remove(database, "before_cursor_execute", record)
+
+
+def test_saturated_class_is_rejected_before_any_query(client, admission, statements):
+    product = admission.classes["product"]
+    product.in_flight = product.limit
+    admission.queue_size = 0
+    response = client.get(f"/product/{uuid.uuid4()}")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(admission.retry_after_seconds)
+    assert statements == []
+    assert product.rejected == 1
+
+
+def test_slots_are_released_after_the_request(client, admission):
+    assert client.get(f"/product/{uuid.uuid4()}").status_code == 404
+    assert client.get("/catalog/", params={"page_size": 1}).status_code == 200
+    version = client.get("/catalog/filter/")
+    assert version.status_code == 200
+    assert client.get("/catalog/filter/", headers={"If-None-Match": version.headers["ETag"]}).status_code == 304
+    for name in ("product", "catalog", "catalog_filter"):
+        assert admission.classes[name].in_flight == 0
+        assert admission.classes[name].admitted >= 1
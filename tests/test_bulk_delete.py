@@ -0,0 +1,84 @@
+"""
+POST /product/bulk-delete by UIDs and by catalog filters, as a dry run and in
+batches, off the event loop.
+"""
+import asyncio
+import uuid
+import pytest
+
+
+@pytest.fixture
+def products(client):
+    """Five products named after the test with an INT property valued 0 to 4, as {value: uid}."""
+    tag = f"bulk {uuid.uuid4()}"
+    property_uid = str(uuid.uuid4())
+    response = client.post("/properties/", json={"uid": property_uid, "name": "bulk", "type": "int"})
+    assert response.status_code == 201
+    uids = {}
+    for value in range(5):
+        uids[value] = str(uuid.uuid4())
+        product = {"uid": uids[value], "name": f"{tag} {value}", "properties": [{"uid": property_uid, "value": value}]}
+        assert client.post("/product/", json=product).status_code == 201
+    return tag, property_uid, uids
+
+
+def existing(client, uids) -> set:
+    return {uid for uid in uids if client.get(f"/product/{uid}").status_code == 200}
+
+
+def test_dry_run_only_counts(client, products):
+    tag, property_uid, uids = products
+    response = client.post("/product/bulk-delete", params={"name": tag, "dry_run": "true"})
+    assert response.status_code == 200
+    assert response.json() == {"matched": 5, "deleted": 0, "batches": 0, "dry_run": True}
+    response = client.post("/product/bulk-delete", params={"dry_run": "true"}, json={"uids": [uids[0], str(uuid.uuid4())]})
+    assert response.json() == {"matched": 1, "deleted": 0, "batches": 0, "dry_run": True}
+    assert existing(client, uids.values()) == set(uids.values())
+
+
+def test_delete_by_uids_in_batches(client, products, monkeypatch):
+    from src.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "PRODUCT_BULK_DELETE_BATCH_SIZE", 2)
+    _, _, uids = products
+    doomed = [uids[0], uids[1], uids[3], uids[0], str(uuid.uuid4())] # a duplicate and an unknown UID
+    response = client.post("/product/bulk-delete", json={"uids": doomed})
+    assert response.status_code == 200
+    assert response.json() == {"matched": 3, "deleted": 3, "batches": 2, "dry_run": False}
+    assert existing(client, uids.values()) == {uids[2], uids[4]}
+
+
+def test_delete_by_filters(client, products, monkeypatch):
+    from src.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "PRODUCT_BULK_DELETE_BATCH_SIZE", 2)
+    tag, property_uid, uids = products
+    response = client.post("/product/bulk-delete", params={"name": tag, f"property_{property_uid}_from": 2})
+    assert response.status_code == 200
+    assert response.json() == {"matched": 3, "deleted": 3, "batches": 2, "dry_run": False}
+    assert existing(client, uids.values()) == {uids[0], uids[1]}
+    catalog = client.get("/catalog/", params={"name": tag}).json()
+    assert sorted(product["uid"] for product in catalog["products"]) == sorted([uids[0], uids[1]])
+
+
+def test_rejects_ambiguous_or_unbounded_deletes(client, products):
+    tag, _, uids = products
+    assert client.post("/product/bulk-delete", params={"name": tag}, json={"uids": [uids[0]]}).status_code == 400
+    assert client.post("/product/bulk-delete").status_code == 400
+    assert client.post("/product/bulk-delete", params={"name": tag, "page": 1}).status_code == 400
+    assert existing(client, uids.values()) == set(uids.values())
+
+
+def test_batches_run_off_the_event_loop(client, products, monkeypatch):
+    from src.api.endpoints import products as products_module
+    delete_in_batches, loops = products_module.delete_in_batches, []
+
+    def recording(*args, **kwargs):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return delete_in_batches(*args, **kwargs)
+
+    monkeypatch.setattr(products_module, "delete_in_batches", recording)
+    tag, _, _ = products
+    assert client.post("/product/bulk-delete", params={"name": tag}).json()["deleted"] == 5
+    assert loops == [None]
@@ -0,0 +1,65 @@
+"""
+The in-process catalog engine learns about local writes from startup on, a
+write committed during a rebuild triggers the next one, and a snapshot only
+answers requests of the catalog version it was read at.
+"""
+import os
+import subprocess
+import sys
+import threading
+from conftest import ROOT
+from src.services.catalog_engine import CatalogEngine
+
+# whether the engine's write listener is registered once the app has started, before any catalog read
+STARTUP = """
+from fastapi.testclient import TestClient
+from src.db import events
+from src.main import app
+with TestClient(app):
+    print(any(listener.__name__ == "_refresh_on_write" for listener in events._listeners))
+"""
+
+
+def test_write_listener_is_registered_at_startup():
+    env = {**os.environ, "CATALOG_ENGINE_ENABLED": "true"}
+    output = subprocess.run([sys.executable, "-c", STARTUP], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "True"
+
+
+def test_write_during_a_rebuild_triggers_the_next_one():
+    engine = CatalogEngine(refresh_seconds=60)
+    refreshes = []
+    second = threading.Event()
+
+    def refresh():
+        refreshes.append(len(refreshes))
+        if len(refreshes) == 1:
+            engine.mark_stale() # committed while the first snapshot is being built
+        else:
+            second.set()
+
+    engine.refresh = refresh
+    engine.start()
+    assert second.wait(timeout=5)
+
+
+def test_snapshot_answers_only_its_catalog_version(database):
+    from sqlalchemy import update
+    from src.db.models import CatalogVersion
+    from src.schemas import SortOptions
+    engine = CatalogEngine(refresh_seconds=60)
+    engine.start = lambda: None # refreshed by hand below
+    engine.refresh()
+    version = engine.snapshot.catalog_version
+    assert engine.query(version, None, {}, SortOptions.UID, 0, 10) is not None
+
+    # a write committed by another process: only the version changes here
+    with database.begin() as connection:
+        connection.execute(update(CatalogVersion).values(version=CatalogVersion.version + 1))
+    assert engine.query(version + 1, None, {}, SortOptions.UID, 0, 10) is None
+    assert engine._wakeup.is_set() # rebuild requested
+
+    engine.refresh()
+    assert engine.snapshot.catalog_version == version + 1
+    assert engine.query(version + 1, None, {}, SortOptions.UID, 0, 10) is not None
+    assert engine.query(version, None, {}, SortOptions.UID, 0, 10) is None
@@ -0,0 +1,177 @@
+"""
+POST /catalog/search returns what the equivalent GET /catalog/ request or,
+for OR and NOT, a direct evaluation of the filter tree returns, page after
+page through its cursors, and rejects trees over the configured limits.
+"""
+import uuid
+import pytest
+
+COLORS = ("red", "green", "blue")
+
+
+@pytest.fixture
+def catalog(client):
+    """Twelve products named after the test, with a color (or none) and zero to two sizes."""
+    tag = f"search {uuid.uuid4()}"
+    color, size = str(uuid.uuid4()), str(uuid.uuid4())
+    colors = {value: str(uuid.uuid4()) for value in COLORS}
+    response = client.post("/properties/", json={
+        "uid": color, "name": "color", "type": "list",
+        "values": [{"value_uid": value_uid, "value": value} for value, value_uid in colors.items()],
+    })
+    assert response.status_code == 201
+    assert client.post("/properties/", json={"uid": size, "name": "size", "type": "int"}).status_code == 201
+    products = []
+    for index in range(12):
+        product_color = None if index % 4 == 3 else COLORS[index % 3]
+        sizes = [] if index % 5 == 4 else [index % 6] + ([index + 10] if index % 3 == 0 else [])
+        uid = str(uuid.uuid4())
+        properties = [{"uid": size, "value": value} for value in sizes]
+        if product_color:
+            properties.append({"uid": color, "value_uid": colors[product_color]})
+        response = client.post("/product/", json={"uid": uid, "name": f"{tag} {index % 4}", "properties": properties})
+        assert response.status_code == 201
+        products.append({"uid": uid, "name": f"{tag} {index % 4}", "color": product_color, "sizes": sizes})
+    return {"tag": tag, "color": color, "size": size, "colors": colors, "products": products}
+
+
+def matches(product, expression, catalog) -> bool:
+    """Evaluates a filter tree on one of the catalog fixture's products."""
+    if "and" in expression:
+        return all(matches(product, condition, catalog) for condition in expression["and"])
+    if "or" in expression:
+        return any(matches(product, condition, catalog) for condition in expression["or"])
+    if "not" in expression:
+        return not matches(product, expression["not"], catalog)
+    if "name" in expression:
+        return expression["name"].lower() in product["name"].lower()
+    if expression["property"] == catalog["color"]:
+        return product["color"] is not None and catalog["colors"][product["color"]] in expression["values"]
+    return any(
+        expression.get("from", value) <= value <= expression.get("to", value) for value in product["sizes"]
+    )
+
+
+def search_all(client, body) -> tuple:
+    """Every page of a search through its cursors: (uids, counts of each page)."""
+    uids, counts, cursor = [], [], None
+    while True:
+        response = client.post("/catalog/search", json={**body, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        uids += [product["uid"] for product in response.json()["products"]]
+        counts.append(response.json()["count"])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return uids, counts
+
+
+def expected_uids(catalog, expression) -> list:
+    return sorted(product["uid"] for product in catalog["products"] if matches(product, expression, catalog))
+
+
+@pytest.mark.parametrize("sort", ["uid", "name", "size", "size:desc", "color:desc"])
+def test_and_matches_catalog(client, catalog, sort):
+    sort = {"size": f"property_{catalog['size']}", "size:desc": f"property_{catalog['size']}:desc", "color:desc": f"property_{catalog['color']}:desc"}.get(sort, sort)
+    red, green = catalog["colors"]["red"], catalog["colors"]["green"]
+    expression = {"and": [
+        {"name": catalog["tag"]},
+        {"property": catalog["color"], "values": [red, green]},
+        {"property": catalog["size"], "from": 1, "to": 12},
+    ]}
+    response = client.get("/catalog/", params={
+        "name": catalog["tag"], f"property_{catalog['color']}": [red, green],
+        f"property_{catalog['size']}_from": 1, f"property_{catalog['size']}_to": 12,
+        "sort": sort, "page_size": 100,
+    })
+    assert response.status_code == 200
+    uids, counts = search_all(client, {"filter": expression, "sort": sort, "page_size": 2})
+    assert uids == [product["uid"] for product in response.json()["products"]]
+    assert set(counts) == {response.json()["count"]}
+    assert sorted(uids) == expected_uids(catalog, expression) != []
+
+
+@pytest.mark.parametrize("expression", [
+    # NOT of a predicate: products without the property match
+    lambda c: {"not": {"property": c["color"], "values": [c["colors"]["red"]]}},
+    lambda c: {"not": {"property": c["size"], "from": 2}},
+    # NOT of an OR and of a name
+    lambda c: {"not": {"or": [{"property": c["color"], "values": [c["colors"]["blue"]]}, {"property": c["size"], "to": 1}]}},
+    lambda c: {"not": {"name": f"{c['tag']} 1"}},
+    # nested OR with an AND and a NOT inside
+    lambda c: {"or": [
+        {"property": c["color"], "values": [c["colors"]["red"]]},
+        {"and": [{"property": c["size"], "from": 4}, {"not": {"property": c["color"], "values": [c["colors"]["blue"]]}}]},
+    ]},
+    lambda c: {"and": [
+        {"or": [{"name": f"{c['tag']} 0"}, {"property": c["size"], "from": 10}]},
+        {"or": [{"property": c["color"], "values": [c["colors"]["green"]]}, {"not": {"not": {"property": c["size"], "to": 0}}}]},
+    ]},
+], ids=["not_list", "not_range", "not_or", "not_name", "nested_or", "and_of_ors"])
+def test_or_and_not_match_the_tree(client, catalog, expression):
+    expression = {"and": [{"name": catalog["tag"]}, expression(catalog)]}
+    uids, counts = search_all(client, {"filter": expression, "page_size": 3})
+    assert uids == expected_uids(catalog, expression)
+    assert set(counts) == {len(uids)}
+    assert 0 < len(uids) < len(catalog["products"])
+
+
+def test_list_predicates_merged_under_or(client, catalog):
+    from src.schemas import CatalogSearchInputSchema, ListFilterSchema
+    from src.services.filter_expressions import normalize
+    red, green = catalog["colors"]["red"], catalog["colors"]["green"]
+    expression = {"or": [
+        {"property": catalog["color"], "values": [red]},
+        {"property": catalog["size"], "from": 11},
+        {"or": [{"property": catalog["color"], "values": [green, red]}]},
+    ]}
+    normalized = normalize(CatalogSearchInputSchema(filter=expression).filter)
+    color_predicates = [condition for condition in normalized.conditions if isinstance(condition, ListFilterSchema)]
+    assert len(normalized.conditions) == 2
+    assert [str(value) for value in color_predicates[0].values] == [red, green]
+
+    tagged = {"and": [{"name": catalog["tag"]}, expression]}
+    uids, _ = search_all(client, {"filter": tagged, "page_size": 100})
+    assert uids == expected_uids(catalog, tagged)
+    # an OR of single values is the multi-value query-string filter
+    either = {"and": [{"name": catalog["tag"]}, {"or": [{"property": catalog["color"], "values": [red]}, {"property": catalog["color"], "values": [green]}]}]}
+    response = client.get("/catalog/", params={"name": catalog["tag"], f"property_{catalog['color']}": [red, green], "page_size": 100})
+    assert search_all(client, {"filter": either, "page_size": 100})[0] == [product["uid"] for product in response.json()["products"]]
+
+
+def test_limits(client, catalog, monkeypatch):
+    from src.core.config import get_settings
+    red, green = catalog["colors"]["red"], catalog["colors"]["green"]
+    color = lambda *values: {"property": catalog["color"], "values": list(values)}
+    monkeypatch.setattr(get_settings(), "CATALOG_MAX_FILTERS", 2)
+    monkeypatch.setattr(get_settings(), "CATALOG_MAX_LIST_VALUES", 1)
+    monkeypatch.setattr(get_settings(), "CATALOG_SEARCH_MAX_DEPTH", 3)
+    rejected = {
+        "predicates": {"or": [color(red), color(green), {"property": catalog["size"], "from": 1}]},
+        "values": color(red, green),
+        "depth": {"not": {"and": [{"or": [color(red), {"not": {"name": "x"}}]}]}},
+        "unknown property": {"property": str(uuid.uuid4()), "values": [red]},
+        "values on INT": {"property": catalog["size"], "values": [red]},
+        "range on LIST": {"property": catalog["color"], "from": 1},
+        "empty range": {"property": catalog["size"]},
+    }
+    for reason, expression in rejected.items():
+        assert client.post("/catalog/search", json={"filter": expression}).status_code == 400, reason
+    assert client.post("/catalog/search", json={"filter": {"and": [color(red), {"not": {"name": "x"}}]}}).status_code == 200
+    assert client.post("/catalog/search", json={"page_size": 101}).status_code == 422
+
+
+def test_cursor_round_trip(client, catalog):
+    body = {"filter": {"name": catalog["tag"]}, "sort": f"property_{catalog['size']}", "page_size": 5}
+    first = client.post("/catalog/search", json=body).json()
+    second = client.post("/catalog/search", json={**body, "cursor": first["next_cursor"]}).json()
+    assert client.post("/catalog/search", json={**body, "cursor": first["next_cursor"]}).json() == second
+    assert not {product["uid"] for product in first["products"]} & {product["uid"] for product in second["products"]}
+    response = client.get("/catalog/", params={"name": catalog["tag"], "sort": body["sort"], "page_size": 5, "page": 2})
+    assert [product["uid"] for product in second["products"]] == [product["uid"] for product in response.json()["products"]]
+
+    # a cursor only continues the search it was issued for
+    other_sort = client.post("/catalog/search", json={**body, "sort": "name", "cursor": first["next_cursor"]})
+    assert other_sort.status_code == 400
+    other_filter = client.post("/catalog/search", json={**body, "filter": {"name": "x"}, "cursor": first["next_cursor"]})
+    assert other_filter.status_code == 400
+    assert client.post("/catalog/search", json={**body, "cursor": "not a cursor"}).status_code == 400
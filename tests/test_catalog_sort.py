@@ -0,0 +1,113 @@
+"""
+/catalog/ property sorts order products by their smallest value ascending and
+their largest descending, looked up per product. Name sorts put products
+without a name last and break ties by UID. /catalog/search orders the same
+products the same way.
+"""
+import uuid
+from sqlalchemy import insert
+
+
+def catalog_products(client, sort: str) -> list:
+    products, page = [], 1
+    while True:
+        response = client.get("/catalog/", params={"sort": sort, "page_size": 100, "page": page})
+        assert response.status_code == 200
+        products += response.json()["products"]
+        if len(products) >= response.json()["count"]:
+            return products
+        page += 1
+
+
+def catalog_order(client, sort: str) -> list:
+    return [product["uid"] for product in catalog_products(client, sort)]
+
+
+def search_order(client, sort: str) -> list:
+    uids, cursor = [], None
+    while True:
+        body = {"sort": sort, "page_size": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.post("/catalog/search", json=body)
+        assert response.status_code == 200
+        uids += [product["uid"] for product in response.json()["products"]]
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return uids
+
+
+def test_name_sort_matches_search(client, database):
+    from src.db.models import Product
+    with database.begin() as connection:
+        # names are required by the API, older rows may still lack one
+        connection.execute(insert(Product), [
+            {"id": 100000 + index, "uid": uuid.uuid4(), "name": name, "version": 1}
+            for index, name in enumerate([None, "sort b", None, "sort b", "sort a"])
+        ])
+    order = catalog_order(client, "name")
+    assert order == search_order(client, "name")
+    names = {product["uid"]: product["name"] for product in catalog_products(client, "uid")}
+    ranked = [(names[uid], uid) for uid in order]
+    assert [name for name, _ in ranked[-2:]] == [None, None]
+    assert ranked[:-2] == sorted(ranked[:-2])
+    assert ranked[-2:] == sorted(ranked[-2:], key=lambda item: item[1])
+
+
+def test_property_sort(client):
+    property_uid = str(uuid.uuid4())
+    response = client.post("/properties/", json={"uid": property_uid, "name": "sort", "type": "int"})
+    assert response.status_code == 201
+    values = {"low": [1], "both": [3, 7], "high": [9]}
+    uids = {}
+    for name, product_values in values.items():
+        uids[name] = str(uuid.uuid4())
+        properties = [{"uid": property_uid, "value": value} for value in product_values]
+        response = client.post("/product/", json={"uid": uids[name], "name": name, "properties": properties})
+        assert response.status_code == 201
+
+    ascending = [uid for uid in catalog_order(client, f"property_{property_uid}") if uid in uids.values()]
+    descending = [uid for uid in catalog_order(client, f"property_{property_uid}:desc") if uid in uids.values()]
+    # by the smallest value ascending, by the largest descending
+    assert ascending == [uids["low"], uids["both"], uids["high"]]
+    assert descending == [uids["high"], uids["both"], uids["low"]]
+    assert catalog_order(client, f"property_{property_uid}") == search_order(client, f"property_{property_uid}")
+
+
+def test_list_property_sort(client):
+    property_uid = str(uuid.uuid4())
+    value_uids = {value: str(uuid.uuid4()) for value in ("large", "medium", "small")}
+    values = [{"value_uid": value_uid, "value": value} for value, value_uid in value_uids.items()]
+    response = client.post("/properties/", json={"uid": property_uid, "name": "sort", "type": "list", "values": values})
+    assert response.status_code == 201
+    product_values = {"m": ["medium"], "l_and_s": ["large", "small"], "s": ["small"]}
+    uids = {}
+    for name, names in product_values.items():
+        uids[name] = str(uuid.uuid4())
+        properties = [{"uid": property_uid, "value_uid": value_uids[value]} for value in names]
+        response = client.post("/product/", json={"uid": uids[name], "name": name, "properties": properties})
+        assert response.status_code == 201
+
+    ascending = [uid for uid in catalog_order(client, f"property_{property_uid}") if uid in uids.values()]
+    descending = [uid for uid in catalog_order(client, f"property_{property_uid}:desc") if uid in uids.values()]
+    # by value string: the smallest ascending, the largest descending, ties by uid
+    assert ascending == [uids["l_and_s"], uids["m"], uids["s"]]
+    assert descending == [*sorted([uids["l_and_s"], uids["s"]]), uids["m"]]
+    assert catalog_order(client, f"property_{property_uid}:desc") == search_order(client, f"property_{property_uid}:desc")
+
+
+def test_property_sort_plan(client):
+    from sqlalchemy import select, text
+    from src.api.endpoints.catalog import apply_sort
+    from src.db.base import SessionLocal
+    from src.db.models import Product
+    from src.schemas import PropertySort
+    property_uid = uuid.uuid4()
+    response = client.post("/properties/", json={"uid": str(property_uid), "name": "plan", "type": "int"})
+    assert response.status_code == 201
+    with SessionLocal() as session:
+        query = apply_sort(session, select(Product.uid), PropertySort(property_uid)).limit(10)
+        compiled = query.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+        plan = " | ".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    # one index probe per product, no aggregate over all values of the property
+    assert "CORRELATED SCALAR SUBQUERY" in plan
+    assert "ix_product_property_values_product_property_int (product_id=? AND property_id=?)" in plan
+    assert "GROUP BY" not in plan
@@ -0,0 +1,59 @@
+"""
+The change feed around retention: resuming from before the horizon is
+rejected, a new consumer starting at since=0 is not.
+"""
+import datetime
+import uuid
+
+
+def create_product(client) -> str:
+    uid = str(uuid.uuid4())
+    response = client.post("/product/", json={"uid": uid, "name": "changes", "properties": []})
+    assert response.status_code == 201
+    return uid
+
+
+def apply_retention():
+    from src.db.base import SessionLocal
+    from src.repositories import ChangeRepository
+    with SessionLocal() as session:
+        _, horizon = ChangeRepository(session).apply_retention(
+            datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1), batch_size=100000,
+        )
+        session.commit()
+    return horizon
+
+
+def test_new_consumers_start_from_the_horizon(client):
+    first = client.get("/changes/").json()
+    create_product(client)
+    assert client.get("/changes/", params={"since": first["latest"]}).json()["changes"]
+
+    horizon = apply_retention()
+    assert horizon > first["latest"]
+
+    uid = create_product(client)
+    response = client.get("/changes/", params={"since": 0})
+    assert response.status_code == 200
+    feed = response.json()
+    assert feed["horizon"] == horizon
+    assert [change["uid"] for change in feed["changes"]] == [uid]
+    assert feed["latest"] == feed["next_since"] > horizon
+
+
+def test_resuming_before_the_horizon_is_gone(client):
+    create_product(client)
+    horizon = apply_retention()
+    response = client.get("/changes/", params={"since": horizon - 1})
+    assert response.status_code == 410
+    empty = client.get("/changes/", params={"since": 0}).json()
+    assert (empty["changes"], empty["next_since"], empty["latest"]) == ([], horizon, horizon)
+
+
+def test_disabled_feed(client, monkeypatch):
+    from src.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "CHANGES_ENABLED", False)
+    assert client.get("/changes/", params={"since": 0}).status_code == 404
+    create_product(client)
+    monkeypatch.setattr(get_settings(), "CHANGES_ENABLED", True)
+    assert client.get("/changes/", params={"since": 0}).json()["changes"] == []
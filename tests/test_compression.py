@@ -0,0 +1,45 @@
+"""
+Every response through CompressionMiddleware says it varies on
+Accept-Encoding, whether it was compressed or sent as is, and carries a weak
+ETag whenever the client negotiated an encoding.
+"""
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from src.core.compression import CompressionMiddleware
+
+LARGE = {"items": ["x" * 100] * 100}
+ETAG = {"ETag": '"1"'}
+
+
+def make_client() -> TestClient:
+    app = Starlette(routes=[
+        Route("/large", lambda request: JSONResponse(LARGE, headers=ETAG)),
+        Route("/small", lambda request: JSONResponse({"ok": True}, headers=ETAG)),
+        Route("/binary", lambda request: Response(b"\0" * 4096, media_type="application/octet-stream", headers=ETAG)),
+        Route("/not-modified", lambda request: Response(status_code=304, headers=ETAG)),
+        Route("/encoded", lambda request: PlainTextResponse("x" * 4096, headers={"Content-Encoding": "identity", **ETAG})),
+        Route("/weak", lambda request: JSONResponse(LARGE, headers={"ETag": 'W/"1"'})),
+    ])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, preference=["gzip"])
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/large", "/small", "/binary", "/not-modified", "/encoded"])
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_vary_on_every_response(path, accept_encoding):
+    response = make_client().get(path, headers={"Accept-Encoding": accept_encoding})
+    assert response.headers["vary"] == "Accept-Encoding"
+    compressed = path == "/large" and accept_encoding == "gzip"
+    assert (response.headers.get("content-encoding") == "gzip") == compressed
+
+
+@pytest.mark.parametrize("path", ["/large", "/small", "/binary", "/not-modified", "/encoded", "/weak"])
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_etag_weak_for_negotiated_encodings(path, accept_encoding):
+    response = make_client().get(path, headers={"Accept-Encoding": accept_encoding})
+    # a client revalidating a compressed 200 gets the same validator on the 304
+    weak = accept_encoding == "gzip" or path == "/weak"
+    assert response.headers["etag"] == ('W/"1"' if weak else '"1"')
@@ -0,0 +1,43 @@
+"""
+Filter statistics are loaded in the background, never by the request that needs them.
+"""
+import time
+import uuid
+import pytest
+from src.schemas import PropertyTypeEnum
+from src.services.filter_planner import FilterStatistics, choose_strategy, plan_filters
+
+
+@pytest.fixture
+def statistics(database, monkeypatch):
+    from src.services import filter_planner
+    statistics = FilterStatistics(ttl_seconds=60, source="facets")
+    monkeypatch.setattr(filter_planner, "get_filter_statistics", lambda: statistics)
+    return statistics
+
+
+def property_filters(count: int):
+    uids = [uuid.uuid4() for _ in range(count)]
+    filters = {uid: {"int_from": 0, "int_to": index, "list_values": []} for index, uid in enumerate(uids)}
+    return filters, {uid: PropertyTypeEnum.INT for uid in uids}, {uid: index + 1 for index, uid in enumerate(uids)}
+
+
+def test_first_request_does_not_wait_for_statistics(statistics):
+    planned = plan_filters(*property_filters(3))
+    assert [planned_filter.estimate for planned_filter in planned] == [0.0, 0.0, 0.0]
+    assert choose_strategy(planned) == "exists"
+
+    deadline = time.monotonic() + 5
+    while not statistics.loaded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert statistics.loaded
+
+
+def test_stale_statistics_are_served_while_reloading(statistics):
+    statistics.loaded_at = time.monotonic() - 120
+    loaded_at = statistics.loaded_at
+    assert statistics.refresh_if_stale()
+    deadline = time.monotonic() + 5
+    while statistics.loaded_at == loaded_at and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert statistics.loaded_at > loaded_at
@@ -0,0 +1,66 @@
+"""
+Group commit runs concurrent operations in one transaction and retries them
+one by one when the batch fails, under the deadlines of the requests that
+submitted them.
+"""
+import time
+import pytest
+from src.db.deadline import DeadlineExceeded, get_deadline
+from src.services.group_commit import GroupCommitter
+
+
+@pytest.fixture
+def committer(database):
+    from src.db.base import SessionLocal
+    committer = GroupCommitter(max_batch=8, max_wait_seconds=0.05, session_factory=SessionLocal)
+    yield committer
+    committer.close()
+
+
+def test_failed_batch_is_retried_one_by_one(committer):
+    attempts = []
+
+    def failing(session):
+        attempts.append(session)
+        if len(attempts) == 1:
+            raise RuntimeError("fails in the batch only")
+        return "retried"
+
+    futures = [committer.submit(failing), committer.submit(lambda session: "neighbour")]
+    assert futures[0].result(timeout=5) == "retried"
+    assert futures[1].result(timeout=5) == "neighbour"
+    assert len(attempts) == 2
+
+
+def test_operations_past_their_deadline_do_not_run(committer):
+    calls = []
+    future = committer.submit(lambda session: calls.append(session), time.monotonic() - 1)
+    with pytest.raises(DeadlineExceeded):
+        future.result(timeout=5)
+    assert calls == []
+
+
+def test_batch_runs_under_the_earliest_deadline(committer):
+    now = time.monotonic()
+    deadlines = [now + 30, now + 10, None]
+    futures = [committer.submit(lambda session: get_deadline(session), deadline) for deadline in deadlines]
+    assert {future.result(timeout=5) for future in futures} == {now + 10}
+
+
+def test_retries_run_under_their_own_deadline(committer):
+    now = time.monotonic()
+    attempts = []
+
+    def failing(session):
+        attempts.append(get_deadline(session))
+        if len(attempts) == 1:
+            raise RuntimeError("fails in the batch only")
+        return "retried"
+
+    futures = [
+        committer.submit(failing, now + 30),
+        committer.submit(lambda session: get_deadline(session), now + 20),
+    ]
+    assert futures[0].result(timeout=5) == "retried"
+    assert futures[1].result(timeout=5) == now + 20
+    assert attempts == [now + 20, now + 30]
@@ -0,0 +1,55 @@
+"""
+run_in_snapshot workers on PostgreSQL see the exporting transaction's snapshot,
+not what commits after it. Needs a scratch PostgreSQL database in
+TEST_POSTGRES_URL (e.g. postgresql+psycopg2://postgres@localhost/catalog_test);
+skipped without one.
+"""
+import os
+import threading
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+TABLE = "test_parallel_snapshot"
+
+
+@pytest.fixture
+def postgres_engine():
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        connection.execute(text(f"CREATE TABLE {TABLE} (n integer)"))
+        connection.execute(text(f"INSERT INTO {TABLE} VALUES (1)"))
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE {TABLE}"))
+    engine.dispose()
+
+
+def count_rows(session: Session) -> int:
+    return session.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar_one()
+
+
+def test_workers_see_the_exported_snapshot(postgres_engine, monkeypatch):
+    from src.core.config import get_settings
+    from src.db.parallel import run_in_snapshot
+    monkeypatch.setattr(get_settings(), "CATALOG_PARALLEL_QUERIES", True)
+    committed = threading.Event()
+
+    def commit_after_export(session: Session) -> int:
+        # runs once the snapshot is exported; the workers may import it before or after this commit
+        with postgres_engine.begin() as connection:
+            connection.execute(text(f"INSERT INTO {TABLE} VALUES (2)"))
+        committed.set()
+        return count_rows(session)
+
+    def count_after_commit(session: Session) -> int:
+        assert committed.wait(timeout=10)
+        return count_rows(session)
+
+    with Session(bind=postgres_engine) as session:
+        assert run_in_snapshot(session, [commit_after_export, count_after_commit, count_after_commit]) == [1, 1, 1]
+        assert count_rows(session) == 2
@@ -0,0 +1,60 @@
+"""
+Product documents are kept current by writes while PRODUCT_DOCUMENTS_ENABLED
+is off, so turning it on later serves what the joined read would, and by
+property deletes, which also bump the products and record them in the feed.
+"""
+import uuid
+
+
+def test_documents_written_while_disabled(client, monkeypatch):
+    from src.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "PRODUCT_DOCUMENTS_ENABLED", True)
+    property_uid = str(uuid.uuid4())
+    response = client.post("/properties/", json={"uid": property_uid, "name": "documents", "type": "int"})
+    assert response.status_code == 201
+    product_uid = str(uuid.uuid4())
+    product = {"uid": product_uid, "name": "documents", "properties": [{"uid": property_uid, "value": 1}]}
+    assert client.post("/product/", json=product).status_code == 201
+    monkeypatch.setattr(get_settings(), "PRODUCT_DOCUMENTS_ENABLED", False)
+    product.update(name="documents, updated", properties=[{"uid": property_uid, "value": 2}])
+    assert client.put(f"/product/{product_uid}", json=product).status_code == 200
+    joined = client.get(f"/product/{product_uid}").json()
+    assert joined["name"] == "documents, updated"
+    assert [prop["value"] for prop in joined["properties"]] == [2]
+
+    # read through the repository, the response for this product version is cached already
+    from src.db.base import SessionLocal
+    from src.repositories import ProductRepository
+    monkeypatch.setattr(get_settings(), "PRODUCT_DOCUMENTS_ENABLED", True)
+    with SessionLocal() as session:
+        assert ProductRepository(session).get_product(uuid.UUID(product_uid)).model_dump(mode="json") == joined
+
+
+def test_deleting_an_assigned_property(client, monkeypatch):
+    from src.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "PRODUCT_DOCUMENTS_ENABLED", True)
+    kept, dropped = str(uuid.uuid4()), str(uuid.uuid4())
+    for property_uid in (kept, dropped):
+        response = client.post("/properties/", json={"uid": property_uid, "name": "documents", "type": "int"})
+        assert response.status_code == 201
+    product_uid = str(uuid.uuid4())
+    product = {"uid": product_uid, "name": "documents", "properties": [{"uid": kept, "value": 1}, {"uid": dropped, "value": 2}]}
+    assert client.post("/product/", json=product).status_code == 201
+    etag = client.get(f"/product/{product_uid}").headers["etag"]
+    since = client.get("/changes/").json()["latest"]
+
+    assert client.delete(f"/properties/{dropped}").status_code == 200
+
+    response = client.get(f"/product/{product_uid}")
+    assert response.headers["etag"] != etag
+    assert [prop["uid"] for prop in response.json()["properties"]] == [kept]
+    from sqlalchemy import select
+    from src.db.base import SessionLocal
+    from src.db.models import Product
+    with SessionLocal() as session:
+        document = session.execute(select(Product.document).where(Product.uid == uuid.UUID(product_uid))).scalar_one()
+    assert document == response.json()
+    changes = client.get("/changes/", params={"since": since}).json()["changes"]
+    assert {(change["entity"], change["uid"], change["op"]) for change in changes} == {
+        ("product", product_uid, "upsert"), ("property", dropped, "delete"),
+    }
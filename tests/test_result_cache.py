@@ -0,0 +1,151 @@
+"""
+The shared result cache against the in-memory Redis stand-in: hits, new keys
+after writes, the lock other processes wait on, and serving without the cache
+when the server is down.
+"""
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import uuid
+import pytest
+from conftest import ROOT, free_port
+from src.core.result_cache import DEFLATED, RedisCache, ResultCache
+
+# fills "key" under the prefix given on the command line, taking a second to compute it
+FILLER = """
+import asyncio, sys
+from src.core.result_cache import RedisCache, ResultCache
+
+async def compute():
+    await asyncio.sleep(1.0)
+    return {"filled_by": "other process"}
+
+cache = ResultCache(RedisCache(sys.argv[1], timeout=1), ttl_seconds=60, key_prefix=sys.argv[2],
+                    compress_min_size=4096, lock_seconds=5, wait_seconds=5)
+asyncio.run(cache.get_or_compute("key", compute))
+"""
+
+
+def make_cache(url: str, **options) -> ResultCache:
+    values = {"ttl_seconds": 60, "key_prefix": f"test:{uuid.uuid4()}:", "compress_min_size": 4096,
+              "lock_seconds": 5, "wait_seconds": 5}
+    values.update(options)
+    return ResultCache(RedisCache(url, timeout=1), **values)
+
+
+class Computation:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def test_second_lookup_is_a_hit(cache_server):
+    cache = make_cache(cache_server)
+    compute = Computation({"products": [], "count": 0})
+    first = asyncio.run(cache.get_or_compute("catalog", compute))
+    second = asyncio.run(cache.get_or_compute("catalog", compute))
+    assert json.loads(first) == json.loads(second) == {"products": [], "count": 0}
+    assert compute.calls == 1
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.fills) == (1, 1, 1)
+
+
+def test_large_bodies_are_stored_deflated(cache_server):
+    cache = make_cache(cache_server, compress_min_size=16)
+    result = {"names": ["product"] * 100}
+    body = asyncio.run(cache.get_or_compute("large", Computation(result)))
+    assert json.loads(body) == result
+    assert cache.backend.get(cache.key_prefix + "large")[:1] == DEFLATED
+
+
+def test_none_is_not_cached(cache_server):
+    cache = make_cache(cache_server)
+    compute = Computation(None)
+    assert asyncio.run(cache.get_or_compute("missing", compute)) is None
+    assert asyncio.run(cache.get_or_compute("missing", compute)) is None
+    assert compute.calls == 2
+
+
+def test_waits_for_the_fill_of_another_process(cache_server):
+    cache = make_cache(cache_server)
+    filler = subprocess.Popen([sys.executable, "-c", FILLER, cache_server, cache.key_prefix], cwd=ROOT)
+    try:
+        deadline = time.monotonic() + 10
+        while cache.backend.get(cache.key_prefix + "key:lock") is None:
+            assert filler.poll() is None and time.monotonic() < deadline, "the filler never took the lock"
+            time.sleep(0.01)
+        compute = Computation({"filled_by": "this process"})
+        body = asyncio.run(cache.get_or_compute("key", compute))
+    finally:
+        assert filler.wait(timeout=10) == 0
+    assert json.loads(body) == {"filled_by": "other process"}
+    assert compute.calls == 0
+    assert cache.stats.waits == 1
+    assert cache.backend.get(cache.key_prefix + "key:lock") is None # released after the fill
+
+
+def test_computes_itself_when_the_lock_holder_never_fills(cache_server):
+    cache = make_cache(cache_server, wait_seconds=0.2)
+    cache.backend.add(cache.key_prefix + "key:lock", b"1", 5) # a worker that died while filling
+    compute = Computation({"filled_by": "this process"})
+    body = asyncio.run(cache.get_or_compute("key", compute))
+    assert json.loads(body) == {"filled_by": "this process"}
+    assert (compute.calls, cache.stats.waits) == (1, 0)
+    assert cache.backend.get(cache.key_prefix + "key") is not None
+
+
+def test_serves_without_the_cache_when_the_server_is_down():
+    cache = make_cache(f"redis://127.0.0.1:{free_port()}/0")
+    compute = Computation({"count": 1})
+    for _ in range(2):
+        assert json.loads(asyncio.run(cache.get_or_compute("key", compute))) == {"count": 1}
+    assert compute.calls == 2
+    assert cache.stats.errors > 0
+    assert cache.stats.hits == 0
+
+
+def test_product_writes_move_reads_to_new_keys(client):
+    from src.core.result_cache import get_result_cache
+    stats = get_result_cache().stats
+    uid = str(uuid.uuid4())
+
+    def write(method: str, name: str):
+        response = client.request(method, "/product/" + ("" if method == "POST" else uid), json={"uid": uid, "name": name, "properties": []})
+        assert response.status_code in (200, 201)
+
+    def read(expected_name: str) -> str:
+        response = client.get(f"/product/{uid}")
+        assert response.status_code == 200
+        assert response.json()["name"] == expected_name
+        return response.headers["etag"]
+
+    write("POST", "first")
+    hits = stats.hits
+    etags = [read("first")]
+    assert read("first") == etags[0]
+    assert stats.hits == hits + 1
+
+    write("PUT", "second")
+    etags.append(read("second"))
+
+    # the same UID created again must not get the deleted product's version, ETag or cached body
+    assert client.delete(f"/product/{uid}").status_code == 200
+    assert client.get(f"/product/{uid}").status_code == 404
+    write("POST", "third")
+    etags.append(read("third"))
+    assert len(set(etags)) == 3
+
+
+def test_catalog_writes_move_reads_to_new_keys(client):
+    count = client.get("/catalog/").json()["count"]
+    assert client.get("/catalog/").json()["count"] == count
+    uid = str(uuid.uuid4())
+    assert client.post("/product/", json={"uid": uid, "name": "new", "properties": []}).status_code == 201
+    assert client.get("/catalog/").json()["count"] == count + 1
+    assert client.delete(f"/product/{uid}").status_code == 200
+    assert client.get("/catalog/").json()["count"] == count
@@ -0,0 +1,211 @@
+"""
+A catalog spread over three SQLite shards answers pages, counts and filter
+statistics exactly like one database holding all of its products, including
+for sort values tied across shards and products without the sort property.
+"""
+import os
+import uuid
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.datastructures import QueryParams
+
+SHARDS = 3
+PAGE_SIZE = 7
+INT_PROPERTY = uuid.uuid5(uuid.NAMESPACE_URL, "test_sharding/size")
+LIST_PROPERTY = uuid.uuid5(uuid.NAMESPACE_URL, "test_sharding/color")
+LIST_VALUES = {color: uuid.uuid5(LIST_PROPERTY, color) for color in ("red", "green", "blue")}
+SORTS = {
+    "uid": "uid",
+    "name": "name",
+    "int": f"property_{INT_PROPERTY}",
+    "int_desc": f"property_{INT_PROPERTY}:desc",
+    "list": f"property_{LIST_PROPERTY}",
+    "list_desc": f"property_{LIST_PROPERTY}:desc",
+}
+FILTERS = {
+    "none": "",
+    "list": f"property_{LIST_PROPERTY}={LIST_VALUES['red']}",
+    "int_from": f"property_{INT_PROPERTY}_from=2",
+    "name": "name=product",
+}
+
+
+def catalog_products():
+    """60 products with few distinct names and values, so sort values tie across shards."""
+    products = []
+    for index in range(60):
+        sizes = [] if index % 7 == 0 else [index % 4] + ([index % 5 + 1] if index % 9 == 0 else [])
+        colors = [] if index % 5 == 0 else [list(LIST_VALUES)[index % 3]]
+        name = None if index % 11 == 0 else f"product {index % 4}"
+        products.append((uuid.uuid5(INT_PROPERTY, str(index)), name, sizes, colors))
+    return products
+
+
+def fill(session: Session, products):
+    from src.db.models import Product, ProductPropertyValue, Property, PropertyListValue
+    session.add(Property(id=1, uid=INT_PROPERTY, name="size", type="int"))
+    session.add(Property(id=2, uid=LIST_PROPERTY, name="color", type="list"))
+    for value_id, (value, value_uid) in enumerate(LIST_VALUES.items(), start=1):
+        session.add(PropertyListValue(id=value_id, value_uid=value_uid, value=value, property_uid=LIST_PROPERTY))
+    for uid, name, sizes, colors in products:
+        session.add(Product(uid=uid, name=name, version=1, property_values=[
+            *(ProductPropertyValue(property_id=1, int_value=size) for size in sizes),
+            *(ProductPropertyValue(property_id=2, list_value_id=list(LIST_VALUES).index(color) + 1) for color in colors),
+        ]))
+    session.commit()
+
+
+@pytest.fixture(scope="module")
+def databases(tmp_path_factory):
+    """The shard engines and an oracle engine with every product."""
+    from src.db.base import Base, create_database_engine
+    from src.db import sharding
+    directory = tmp_path_factory.mktemp("shards")
+    shards = [create_database_engine(f"sqlite:///{directory / f'shard{index}.db'}") for index in range(SHARDS)]
+    oracle = create_database_engine(f"sqlite:///{directory / 'oracle.db'}")
+    for engine in (*shards, oracle):
+        Base.metadata.create_all(engine)
+
+    products = catalog_products()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(sharding, "sharding_enabled", lambda: True)
+        patch.setattr(sharding, "get_shard_engines", lambda: shards)
+        placement = [sharding.shard_index(uid) for uid, *_ in products]
+    assert set(placement) == set(range(SHARDS))
+    for index, engine in enumerate(shards):
+        with Session(bind=engine) as session:
+            fill(session, [product for product, shard in zip(products, placement) if shard == index])
+    with Session(bind=oracle) as session:
+        fill(session, products)
+    yield shards, oracle
+    for engine in (*shards, oracle):
+        engine.dispose()
+
+
+@pytest.fixture
+def sharded(databases, monkeypatch):
+    """Runs a function on the sharded catalog and on the oracle, returns both results."""
+    from src.core.config import get_settings
+    from src.db import sharding
+    from src.db.base import close_shard_sessions
+    shards, oracle = databases
+    monkeypatch.setattr(sharding, "get_shard_engines", lambda: shards)
+
+    def run(function):
+        results = []
+        for engine, shard_urls in ((oracle, None), (shards[0], "shard1,shard2")):
+            monkeypatch.setattr(get_settings(), "CATALOG_SHARD_URLS", shard_urls)
+            with Session(bind=engine) as session:
+                try:
+                    results.append(function(session))
+                finally:
+                    close_shard_sessions(session)
+        return results
+    return run
+
+
+@pytest.mark.parametrize("sort", SORTS.values(), ids=SORTS.keys())
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+def test_pages_match_single_database(sharded, sort, filters):
+    from src.api.endpoints.catalog import parse_sort, query_catalog_page
+    from src.schemas.product import ProductProjection
+    query_params = QueryParams(filters)
+    name = query_params.get("name")
+
+    def pages(session: Session):
+        results, offset = [], 0
+        while True:
+            page = query_catalog_page(session, query_params, name, parse_sort(sort), offset, PAGE_SIZE, ProductProjection())
+            results.append(page.model_dump(mode="json"))
+            offset += PAGE_SIZE
+            if offset >= page.count:
+                return results
+
+    oracle_pages, sharded_pages = sharded(pages)
+    assert sharded_pages == oracle_pages
+    assert oracle_pages[0]["count"] > PAGE_SIZE
+
+
+@pytest.mark.parametrize("sort", SORTS.values(), ids=SORTS.keys())
+def test_candidates_match_single_database(sharded, sort):
+    from src.api.endpoints.catalog import gather_candidates, parse_sort
+    from sqlalchemy import select
+    from src.db.models import Product
+
+    def keyset_pages(session: Session):
+        # walks the catalog 5 candidates at a time, as POST /catalog/search does
+        candidates, after = [], None
+        while True:
+            count, merged = gather_candidates(session, lambda shard_session: select(Product), parse_sort(sort), 5, after)
+            page = merged[:5] # every shard contributes up to 5
+            candidates += [(uid, value) for uid, value, _ in page]
+            if len(page) < 5:
+                return count, candidates
+            uid, value, _ = page[-1]
+            after = (None if sort == "uid" else value, uid)
+
+    oracle, sharded_result = sharded(keyset_pages)
+    assert sharded_result == oracle
+    count, candidates = oracle
+    assert count == len(candidates) == 60
+
+
+def test_sort_values_tie_across_shards(sharded):
+    from src.api.endpoints.catalog import gather_candidates, parse_sort
+    from sqlalchemy import select
+    from src.db.models import Product
+    _, (_, candidates) = sharded(
+        lambda session: gather_candidates(session, lambda shard_session: select(Product), parse_sort(f"property_{INT_PROPERTY}"), 60)
+    )
+    shards_per_value = {}
+    for _, value, shard in candidates:
+        shards_per_value.setdefault(value, set()).add(shard)
+    # every value, and the missing one, is held by products on several shards
+    assert None in shards_per_value
+    assert all(len(shards) > 1 for shards in shards_per_value.values())
+
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+def test_filter_stats_match_single_database(sharded, filters):
+    from src.api.endpoints.catalog import query_catalog_filter
+    query_params = QueryParams(filters)
+    oracle, sharded_stats = sharded(lambda session: query_catalog_filter(session, query_params, query_params.get("name"), None, 10))
+    assert sharded_stats == oracle
+    assert oracle[f"property_{INT_PROPERTY}"]
+
+
+def test_merge_filter_stats():
+    from src.api.endpoints.catalog import merge_filter_stats
+    merged = merge_filter_stats([
+        {"count": 2, "property_list": {"red": 1, "blue": 1}, "property_int": {"min_value": 3, "max_value": 5}},
+        {"count": 0},
+        {"count": 4, "property_list": {"red": 3}, "property_int": {"min_value": 1, "max_value": 4}},
+    ])
+    assert merged == {"count": 6, "property_list": {"red": 4, "blue": 1}, "property_int": {"min_value": 1, "max_value": 5}}
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+@pytest.mark.parametrize("descending", [False, True])
+def test_merge_sort_candidates_on_postgresql(descending):
+    from src.api.endpoints.catalog import merge_sort_candidates
+    from src.db.base import create_database_engine
+    from src.schemas.catalog import PropertySort
+    values = ["b", "B", "a", None, "A", "b", "ä", None, "a b", "a-b"]
+    candidates = [(uuid.uuid5(LIST_PROPERTY, str(index)), value, index % SHARDS) for index, value in enumerate(values)]
+    engine = create_database_engine(os.environ["TEST_POSTGRES_URL"])
+    try:
+        with Session(bind=engine) as session:
+            # the order the database itself gives these rows, whatever its collation
+            direction = "DESC" if descending else "ASC"
+            rows = ", ".join(f"(:value{index}, CAST(:uid{index} AS uuid))" for index in range(len(candidates)))
+            parameters = {f"value{index}": value for index, (_, value, _) in enumerate(candidates)}
+            parameters.update({f"uid{index}": str(uid) for index, (uid, _, _) in enumerate(candidates)})
+            expected = session.execute(text(
+                f"SELECT uid FROM (VALUES {rows}) AS rows (sort_value, uid) ORDER BY sort_value {direction} NULLS LAST, uid"
+            ), parameters).scalars().all()
+            merged = merge_sort_candidates(session, list(reversed(candidates)), PropertySort(LIST_PROPERTY, descending))
+    finally:
+        engine.dispose()
+    assert [uid for uid, _, _ in merged] == expected
+    assert {candidate for candidate in merged} == set(candidates)
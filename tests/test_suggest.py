@@ -0,0 +1,32 @@
+"""
+/catalog/suggest answers the same from the name index and from the SQL
+fallback, including names whose case folding differs from lower-casing.
+"""
+import uuid
+
+NAMES = ["Straße 1", "STRASSE 2", "strasse 3", "Strand", "straw"]
+
+
+def suggest(client, prefix: str) -> list:
+    response = client.get("/catalog/suggest", params={"prefix": prefix, "limit": 10})
+    assert response.status_code == 200
+    return [suggestion["name"] for suggestion in response.json()["suggestions"]]
+
+
+def test_index_and_sql_agree(client, monkeypatch):
+    from src.core.config import get_settings
+    from src.db.base import SessionLocal
+    from src.services.name_index import get_product_name_index
+    for name in NAMES:
+        response = client.post("/product/", json={"uid": str(uuid.uuid4()), "name": name, "properties": []})
+        assert response.status_code == 201
+
+    monkeypatch.setattr(get_settings(), "SUGGEST_INDEX_ENABLED", False)
+    from_sql = {prefix: suggest(client, prefix) for prefix in ("str", "STRA", "straß", "strass")}
+    assert from_sql["straß"] == ["Straße 1"]
+    assert from_sql["strass"] == ["STRASSE 2", "strasse 3"]
+
+    monkeypatch.setattr(get_settings(), "SUGGEST_INDEX_ENABLED", True)
+    with SessionLocal() as session:
+        get_product_name_index().load(session)
+    assert {prefix: suggest(client, prefix) for prefix in from_sql} == from_sql
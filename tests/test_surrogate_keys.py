@@ -0,0 +1,20 @@
+"""
+A product created after another was deleted may get its id on SQLite; it must
+not inherit the deleted product's property values.
+"""
+import uuid
+
+
+def test_reused_id_starts_without_values(client):
+    property_uid = str(uuid.uuid4())
+    response = client.post("/properties/", json={"uid": property_uid, "name": "x", "type": "int"})
+    assert response.status_code == 201
+    deleted_uid, created_uid = str(uuid.uuid4()), str(uuid.uuid4())
+    deleted = {"uid": deleted_uid, "name": "A", "properties": [{"uid": property_uid, "value": 5}]}
+    assert client.post("/product/", json=deleted).status_code == 201
+    assert client.delete(f"/product/{deleted_uid}").status_code == 200
+    assert client.post("/product/", json={"uid": created_uid, "name": "B", "properties": []}).status_code == 201
+
+    assert client.get(f"/product/{created_uid}").json()["properties"] == []
+    catalog = client.get("/catalog/", params={f"property_{property_uid}_from": 0}).json()
+    assert catalog["count"] == 0
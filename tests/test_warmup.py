@@ -0,0 +1,24 @@
+"""
+Startup warmup runs its requests through the app.
+"""
+import asyncio
+import logging
+from src.api import warmup
+
+
+def test_warm_statements_requests_succeed(database, caplog, monkeypatch):
+    from src.main import app
+    responses = []
+    inprocess_get = warmup.inprocess_get
+
+    async def recording_get(app, path, query=""):
+        status = await inprocess_get(app, path, query)
+        responses.append((path, status))
+        return status
+
+    monkeypatch.setattr(warmup, "inprocess_get", recording_get)
+    with caplog.at_level(logging.WARNING, logger="src.api.warmup"):
+        asyncio.run(warmup.warm_statements(app))
+    assert not [record for record in caplog.records if record.name in ("src.api.warmup", "src.core.inprocess")]
+    assert {path for path, _ in responses} >= {"/catalog/", "/catalog/filter/"}
+    assert all(status in (200, 404) for _, status in responses)